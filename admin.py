@@ -1,14 +1,39 @@
 # admin_dashboard.py
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import time
 import random
+import calendar
+import sys
+import os
+import csv
+import json
+import html
+import argparse
 from datetime import datetime, timedelta
+from dataclasses import dataclass, field
 import sqlite3
 import logging
+import re
+import threading
+import functools
+import hashlib
+import gzip
+import tempfile
+from collections import OrderedDict
+from contextlib import contextmanager
 import altair as alt
-from io import StringIO  # Added for CSV export functionality
+from db_pool import ConnectionPool, DB_PRAGMAS
+import io
+
+# Parquet export is optional and only offered when pyarrow is installed
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
 
 # Set up logging for better debugging and monitoring
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -397,12 +422,328 @@ if 'current_page' not in st.session_state:
     st.session_state.current_page = "Dashboard"
 if 'dark_mode' not in st.session_state:
     st.session_state.dark_mode = False
-if 'notifications' not in st.session_state:
-    st.session_state.notifications = [
-        {"type": "info", "message": "System update available", "time": "5 min ago"},
-        {"type": "warning", "message": "3 pending approvals", "time": "10 min ago"},
-        {"type": "success", "message": "Monthly target achieved", "time": "1 hour ago"}
-    ]
+
+# Storage format for created_date columns: fixed-width ISO so string order equals time order
+# and range predicates can use the created_date indexes.
+DB_DATETIME_FORMAT = '%Y-%m-%d %H:%M'
+
+# Notifications are shared by all admin sessions and kept as a bounded ring buffer:
+# anything beyond the newest max_rows, or older than max_age_days, is pruned
+NOTIFICATION_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+NOTIFICATION_RETENTION = {'max_rows': 1000, 'max_age_days': 30}
+# Prune on every Nth insert rather than on each one
+NOTIFICATION_PRUNE_EVERY = 50
+
+# Live activity stream event types: type -> (icon, filter label)
+ACTIVITY_TYPES = {
+    'request': ('💻', 'Requests'),
+    'completion': ('🛡️', 'Completions'),
+    'status': ('🔄', 'Status Changes'),
+    'ticket': ('🎫', 'Tickets'),
+    'rating': ('✨', 'Ratings'),
+    'registration': ('⭐', 'Registrations'),
+    'technician': ('👤', 'Team Changes')
+}
+# Events shown in the dashboard feed and its polling interval
+ACTIVITY_FEED_SIZE = 20
+ACTIVITY_POLL_SECONDS = 5
+# activity_events keeps only the newest ACTIVITY_RETENTION_ROWS events, trimmed by a trigger on
+# every ACTIVITY_PRUNE_EVERY-th insert (both are baked into the trigger when it is created)
+ACTIVITY_RETENTION_ROWS = 5000
+ACTIVITY_PRUNE_EVERY = 100
+
+# Time Frame filter options mapped to a look-back window in days (None = no lower bound)
+TIME_FRAMES = {
+    'All Time': None,
+    'Last 7 Days': 7,
+    'Last 30 Days': 30,
+    'Last 90 Days': 90
+}
+
+# Tables tracked by the kpi_counters table: (summed value column, rating column).
+# Counters are kept per status by triggers so dashboard reads never scan these tables.
+KPI_COUNTER_SOURCES = {
+    'technicians': (None, 'rating'),
+    'service_requests': ('revenue', 'client_rating'),
+    'support_tickets': ('resolution_time', 'satisfaction_score')
+}
+
+# service_requests columns feeding the analytics rollups; updates to any of them are logged in request_changes
+ROLLUP_SOURCE_COLUMNS = ('client_name', 'status', 'assigned_tech_id', 'created_date', 'revenue', 'client_rating', 'actual_hours')
+
+# Join tables holding technician skills and certifications: key -> (table, value column)
+TECHNICIAN_TAG_TABLES = {
+    'skills': ('technician_skills', 'skill'),
+    'certifications': ('technician_certifications', 'certification')
+}
+
+# Fields update_technician accepts; anything else is rejected before SQL is built
+TECHNICIAN_EDITABLE_COLUMNS = frozenset([
+    'name', 'email', 'phone', 'specialty', 'location', 'rating', 'completed_jobs', 'hourly_rate',
+    'status', 'join_date', 'experience', 'performance_score', 'last_active', *TECHNICIAN_TAG_TABLES
+])
+# Choices offered by the technician edit form
+TECHNICIAN_LOCATIONS = ["Cairo HQ", "Alexandria Branch", "Giza Center", "Luxor Office", "Aswan Station"]
+TECHNICIAN_STATUSES = ["Active", "Pending", "Inactive"]
+
+# Secondary indexes for the hot filter/sort paths: (index name, table, indexed columns)
+SCHEMA_INDEXES = [
+    ('idx_technicians_status_performance', 'technicians', 'status, performance_score DESC'),
+    ('idx_technicians_performance', 'technicians', 'performance_score DESC'),
+    ('idx_technicians_location', 'technicians', 'location'),
+    ('idx_technicians_specialty', 'technicians', 'specialty'),
+    ('idx_technician_skills_skill', 'technician_skills', 'skill, technician_id'),
+    ('idx_technician_certifications_certification', 'technician_certifications', 'certification, technician_id'),
+    ('idx_requests_created', 'service_requests', 'created_date'),
+    ('idx_requests_status_created', 'service_requests', 'status, created_date'),
+    ('idx_requests_priority_created', 'service_requests', 'priority, created_date'),
+    ('idx_requests_tech', 'service_requests', 'assigned_tech_id'),
+    ('idx_requests_status_client', 'service_requests', 'status, client_name'),
+    ('idx_tickets_created', 'support_tickets', 'created_date'),
+    ('idx_tickets_status_created', 'support_tickets', 'status, created_date'),
+    ('idx_tickets_priority', 'support_tickets', 'priority'),
+    ('idx_client_rollup_completed', 'client_rollup', 'completed_count'),
+    ('idx_client_rollup_first_day', 'client_rollup', 'first_day'),
+    ('idx_requests_client_created', 'service_requests', 'client_name, created_date'),
+    ('idx_notifications_created', 'notifications', 'created_at'),
+    ('idx_notifications_unread', 'notifications', 'is_read, created_at'),
+    ('idx_activity_type', 'activity_events', 'type, id')
+]
+
+# Period series persisted in the analytics table: category -> chart label format
+ANALYTICS_SERIES = {
+    'monthly': '%b %Y',
+    'weekly': 'Wk %d %b'
+}
+
+@dataclass(frozen=True)
+class DashboardStats:
+    """
+    Immutable snapshot of the dashboard KPIs.
+    Per-status counts are kept as dicts so new statuses show up without schema changes.
+    """
+    total_users: int = 1560
+    technicians_by_status: dict = field(default_factory=dict)
+    requests_by_status: dict = field(default_factory=dict)
+    tickets_by_status: dict = field(default_factory=dict)
+    total_revenue: float = 0
+    avg_rating: float = 4.5
+    avg_response_time: str = 'N/A'
+    on_time_delivery: str = 'N/A'
+    
+    @property
+    def total_technicians(self):
+        return sum(self.technicians_by_status.values())
+    
+    @property
+    def active_technicians(self):
+        return self.technicians_by_status.get('Active', 0)
+    
+    @property
+    def total_requests(self):
+        return sum(self.requests_by_status.values())
+    
+    @property
+    def pending_requests(self):
+        return self.requests_by_status.get('Pending', 0)
+    
+    @property
+    def in_progress_requests(self):
+        return self.requests_by_status.get('In Progress', 0)
+    
+    @property
+    def completed_requests(self):
+        return self.requests_by_status.get('Completed', 0)
+    
+    @property
+    def open_tickets(self):
+        return self.tickets_by_status.get('Open', 0)
+    
+    @property
+    def satisfaction_rate(self):
+        """Average client rating converted from 5-star to percentage."""
+        return round(self.avg_rating * 20, 1)
+
+# Column types applied by the columnar DataFrame loader (_read_frame)
+TECHNICIAN_FRAME_DTYPES = {
+    'status': 'category', 'location': 'category', 'specialty': 'category', 'rating': 'float',
+    'join_date': 'datetime', 'last_active': 'datetime', 'created_at': 'datetime'
+}
+SERVICE_REQUEST_FRAME_DTYPES = {
+    'status': 'category', 'priority': 'category', 'tech_specialty': 'category',
+    'revenue': 'float', 'client_rating': 'float', 'created_date': 'datetime'
+}
+SUPPORT_TICKET_FRAME_DTYPES = {
+    'status': 'category', 'priority': 'category', 'category': 'category', 'created_date': 'datetime'
+}
+
+# Rows fetched from SQLite per chunk when streaming an export
+EXPORT_CHUNK_ROWS = 20000
+
+# Download formats: label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'CSV (gzip)': ('csv.gz', 'application/gzip')
+}
+if pq is not None:
+    EXPORT_FORMATS['Parquet'] = ('parquet', 'application/vnd.apache.parquet')
+
+# Bulk import schema: table -> {column: type}. 'tags' columns hold skills/certifications and
+# assigned_tech_email is resolved to assigned_tech_id during the insert.
+IMPORT_COLUMNS = {
+    'technicians': {
+        'name': 'text', 'email': 'text', 'phone': 'text', 'specialty': 'text', 'location': 'text',
+        'rating': 'real', 'completed_jobs': 'int', 'hourly_rate': 'int', 'status': 'text',
+        'join_date': 'date', 'experience': 'text', 'performance_score': 'int', 'last_active': 'datetime',
+        'skills': 'tags', 'certifications': 'tags'
+    },
+    'service_requests': {
+        'client_name': 'text', 'description': 'text', 'status': 'text', 'assigned_tech_id': 'int',
+        'assigned_tech_email': 'text', 'created_date': 'datetime', 'priority': 'text',
+        'estimated_hours': 'int', 'actual_hours': 'int', 'client_rating': 'int', 'revenue': 'real', 'due_date': 'date'
+    },
+    'support_tickets': {
+        'client_name': 'text', 'issue': 'text', 'status': 'text', 'created_date': 'datetime', 'priority': 'text',
+        'category': 'text', 'resolution_time': 'int', 'satisfaction_score': 'int'
+    }
+}
+IMPORT_REQUIRED = {
+    'technicians': ('name', 'email'),
+    'service_requests': ('client_name',),
+    'support_tickets': ('client_name',)
+}
+# Allowed values per (table, column); the first entry is the default for new rows
+IMPORT_CHOICES = {
+    ('technicians', 'status'): ('Pending', 'Active', 'Inactive'),
+    ('service_requests', 'status'): ('Pending', 'In Progress', 'Completed', 'Cancelled'),
+    ('service_requests', 'priority'): ('Medium', 'Low', 'High', 'Critical'),
+    ('support_tickets', 'status'): ('Open', 'In Progress', 'Resolved', 'Closed'),
+    ('support_tickets', 'priority'): ('Medium', 'Low', 'High', 'Critical')
+}
+# Rows per import transaction, and the import size above which rollups are rebuilt in one pass
+IMPORT_BATCH_SIZE = 10000
+IMPORT_ROLLUP_REBUILD_ROWS = 10000
+# Writer page cache during imports (KiB when negative); random index inserts thrash the default
+IMPORT_CACHE_SIZE = -65536
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+# A range comparison in an audited query, as traced with its parameters filled in
+RANGE_PREDICATE = re.compile(r"\w\s*(?:>=|<=|>|<)\s*['\w(]|\bBETWEEN\b", re.IGNORECASE)
+
+# Whitelisted ORDER BY clauses for query_service_requests()
+SERVICE_REQUEST_SORTS = {
+    'Newest': 'sr.created_date DESC, sr.id DESC',
+    'Oldest': 'sr.created_date ASC, sr.id ASC',
+    'Highest Revenue': 'sr.revenue DESC, sr.id DESC',
+    'Priority': "CASE sr.priority WHEN 'Critical' THEN 0 WHEN 'High' THEN 1 WHEN 'Medium' THEN 2 ELSE 3 END, sr.created_date DESC",
+    'Client': 'sr.client_name ASC, sr.id ASC'
+}
+
+@dataclass(frozen=True)
+class ServiceRequestPage:
+    """One page of filtered service requests plus totals over the whole filtered set."""
+    frame: pd.DataFrame = field(default_factory=pd.DataFrame)
+    total: int = 0
+    limit: int = None
+    offset: int = 0
+    completed_revenue: float = 0
+    avg_client_rating: float = None
+    pending_count: int = 0
+    critical_count: int = 0
+    
+    @property
+    def page_count(self):
+        if not self.limit:
+            return 1
+        return max(1, -(-self.total // self.limit))
+
+@dataclass
+class ImportReport:
+    """Running totals of a bulk import, passed to the progress callback after every batch."""
+    table: str
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+    seconds: float = 0.0
+    
+    @property
+    def processed(self):
+        return self.inserted + self.updated + self.skipped
+    
+    @property
+    def rows_per_second(self):
+        return (self.inserted + self.updated) / self.seconds if self.seconds else 0.0
+
+class StaleWriteError(ValueError):
+    """Raised when a write was based on a row version that someone else has since changed."""
+
+def cached_read(*tables):
+    """
+    Caches a ProfessionalDBManager read method by its arguments and the version of each
+    table it reads. Writers bump those versions, so entries are never served stale.
+    Table versions only count writes made through this process's manager; commits from other
+    processes are caught by the pool's external_version, which invalidates every entry at once
+    since it cannot tell which tables they touched.
+    Cached results are shared between sessions and must be treated as read-only.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            versions = (self.pool.external_version(), *self._get_versions(tables))
+            with self._cache_lock:
+                entry = self._result_cache.get(key)
+                if entry is not None and entry[0] == versions:
+                    self._result_cache.move_to_end(key)
+                    self._cache_hits += 1
+                    return entry[1]
+                self._cache_misses += 1
+            
+            self._read_state.failed = False
+            result = method(self, *args, **kwargs)
+            # Fallback values returned after an error are not worth remembering
+            if not self._read_state.failed:
+                with self._cache_lock:
+                    self._result_cache[key] = (versions, result)
+                    self._result_cache.move_to_end(key)
+                    while len(self._result_cache) > self.RESULT_CACHE_SIZE:
+                        self._result_cache.popitem(last=False)
+            return result
+        return wrapper
+    return decorator
+
+def iter_import_records(source, name=None):
+    """
+    Yields (line number, record dict) pairs from a CSV or JSON Lines file, optionally gzipped.
+    source is a path or a binary file object; the format comes from its (or name's) extension.
+    A JSON line that cannot be parsed is yielded as a ValueError in place of the record, so
+    bulk_import reports it against its line and carries on.
+    """
+    name = (name or getattr(source, 'name', None) or str(source)).lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+        raw = gzip.open(source, 'rb')
+    else:
+        raw = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    try:
+        if name.endswith('.csv'):
+            # Line 1 is the header, so data rows start at line 2
+            for line, row in enumerate(csv.DictReader(text), start=2):
+                yield line, row
+        elif name.endswith(('.jsonl', '.ndjson')):
+            for line, row in enumerate(text, start=1):
+                if row.strip():
+                    try:
+                        yield line, json.loads(row)
+                    except json.JSONDecodeError as e:
+                        yield line, ValueError(f"invalid JSON: {e.msg} (column {e.colno})")
+        else:
+            raise ValueError(f"Unsupported import file {name!r}; expected .csv or .jsonl (optionally .gz)")
+    finally:
+        text.detach()
+        if raw is not source:
+            raw.close()
 
 # Enhanced Professional Database Manager with improved error handling and docstrings
 class ProfessionalDBManager:
@@ -410,257 +751,1334 @@ class ProfessionalDBManager:
     Manages the SQLite database for the TechPro Enterprise Dashboard.
     Handles connections, table creation, data seeding, and CRUD operations with enhanced error handling.
     """
-    def __init__(self, db_path="techpro_enterprise.db"):
+    # Maximum number of cached read results kept by cached_read
+    RESULT_CACHE_SIZE = 128
+    
+    # The cached manager outlives script reruns, which redefine module classes; catch conflicts
+    # as db.StaleWriteError so the class matches the one this instance raises
+    StaleWriteError = StaleWriteError
+    
+    # Read paths exercised by audit_query_plans()
+    AUDITED_READS = (
+        'get_dashboard_stats',
+        'get_technicians_data',
+        'get_technicians_frame',
+        'get_service_requests',
+        'get_service_requests_frame',
+        'query_service_requests',
+        'get_support_tickets',
+        'get_support_tickets_frame',
+        'get_analytics_data',
+        'get_revenue_insights',
+        'get_performance_data'
+    )
+    
+    def __init__(self, db_path="techpro_enterprise.db", pool_size=24, busy_timeout_ms=5000, seed=True):
         self.db_path = db_path
-        self.conn = None
+        self.pool_size = pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.pool = None
+        self.fts_enabled = False
+        self._table_versions = {}
+        self._result_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._read_state = threading.local()
+        self._unit_of_work = threading.local()
         self._connect()
         self._create_tables()
-        self.seed_data_if_empty()
+        if seed:
+            self.seed_data_if_empty()
     
     def _connect(self):
-        """Establishes connection to the SQLite database with thread safety disabled for Streamlit."""
+        """Opens the WAL-mode connection pool shared by every Streamlit session."""
         try:
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.conn.execute("PRAGMA foreign_keys = ON")
+            self.pool = ConnectionPool(self.db_path, max_readers=self.pool_size, busy_timeout_ms=self.busy_timeout_ms)
             logger.info("Enterprise database connection established.")
         except sqlite3.Error as e:
             logger.error(f"Database connection error: {e}")
             st.error("🚨 Failed to connect to database. Please try again later.")
     
+    @property
+    def conn(self):
+        """Reader connection bound to the calling thread; writes go through self.pool.writer()."""
+        return self.pool.reader()
+    
     def _create_tables(self):
         """Creates necessary database tables if they do not exist."""
-        if self.conn:
+        if self.pool:
             try:
-                cursor = self.conn.cursor()
-                
-                # Enhanced Technicians table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS technicians (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        name TEXT NOT NULL,
-                        email TEXT UNIQUE NOT NULL,
-                        phone TEXT,
-                        specialty TEXT,
-                        location TEXT,
-                        skills TEXT,
-                        rating REAL DEFAULT 0.0,
-                        completed_jobs INTEGER DEFAULT 0,
-                        hourly_rate INTEGER,
-                        status TEXT DEFAULT 'Pending',
-                        join_date TEXT,
-                        experience TEXT,
-                        certifications TEXT,
-                        performance_score INTEGER DEFAULT 0,
-                        last_active TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # Enhanced Service Requests table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS service_requests (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        client_name TEXT NOT NULL,
-                        description TEXT,
-                        status TEXT DEFAULT 'Pending',
-                        assigned_tech_id INTEGER,
-                        created_date TEXT,
-                        priority TEXT DEFAULT 'Medium',
-                        estimated_hours INTEGER,
-                        actual_hours INTEGER,
-                        client_rating INTEGER,
-                        revenue DECIMAL(10,2),
-                        due_date TEXT,
-                        FOREIGN KEY (assigned_tech_id) REFERENCES technicians(id)
-                    )
-                ''')
+                with self.pool.writer() as conn:
+                    cursor = conn.cursor()
+                    
+                    # Enhanced Technicians table
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS technicians (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            name TEXT NOT NULL,
+                            email TEXT UNIQUE NOT NULL,
+                            phone TEXT,
+                            specialty TEXT,
+                            location TEXT,
+                            rating REAL DEFAULT 0.0,
+                            completed_jobs INTEGER DEFAULT 0,
+                            hourly_rate INTEGER,
+                            status TEXT DEFAULT 'Pending',
+                            join_date TEXT,
+                            experience TEXT,
+                            performance_score INTEGER DEFAULT 0,
+                            last_active TEXT,
+                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )
+                    ''')
+                    
+                    # Normalized technician skills and certifications
+                    for table, column in TECHNICIAN_TAG_TABLES.values():
+                        cursor.execute(f'''
+                            CREATE TABLE IF NOT EXISTS {table} (
+                                technician_id INTEGER NOT NULL REFERENCES technicians(id) ON DELETE CASCADE,
+                                {column} TEXT NOT NULL,
+                                PRIMARY KEY (technician_id, {column})
+                            ) WITHOUT ROWID
+                        ''')
+                    
+                    # Enhanced Service Requests table
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS service_requests (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            client_name TEXT NOT NULL,
+                            description TEXT,
+                            status TEXT DEFAULT 'Pending',
+                            assigned_tech_id INTEGER,
+                            created_date TEXT,
+                            priority TEXT DEFAULT 'Medium',
+                            estimated_hours INTEGER,
+                            actual_hours INTEGER,
+                            client_rating INTEGER,
+                            revenue DECIMAL(10,2),
+                            due_date TEXT,
+                            FOREIGN KEY (assigned_tech_id) REFERENCES technicians(id)
+                        )
+                    ''')
+                    
+                    # Enhanced Support Tickets table
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS support_tickets (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            client_name TEXT NOT NULL,
+                            issue TEXT,
+                            status TEXT DEFAULT 'Open',
+                            created_date TEXT,
+                            priority TEXT DEFAULT 'Medium',
+                            category TEXT,
+                            resolution_time INTEGER,
+                            satisfaction_score INTEGER
+                        )
+                    ''')
+                    
+                    # Admin notifications shared across sessions
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS notifications (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            type TEXT NOT NULL DEFAULT 'info',
+                            message TEXT NOT NULL,
+                            created_at TEXT NOT NULL,
+                            is_read INTEGER NOT NULL DEFAULT 0
+                        )
+                    ''')
+                    
+                    # Analytics table
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS analytics (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            metric_name TEXT,
+                            metric_value REAL,
+                            recorded_date TEXT,
+                            category TEXT
+                        )
+                    ''')
+                    # One row per (series, metric, period start) so refreshes can upsert in place
+                    cursor.execute('''
+                        CREATE UNIQUE INDEX IF NOT EXISTS idx_analytics_series
+                        ON analytics (category, metric_name, recorded_date)
+                    ''')
+                    
+                    # Materialized KPI counters maintained by triggers
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS kpi_counters (
+                            scope TEXT NOT NULL,
+                            status TEXT NOT NULL,
+                            row_count INTEGER DEFAULT 0,
+                            value_sum REAL DEFAULT 0,
+                            rating_sum REAL DEFAULT 0,
+                            rating_count INTEGER DEFAULT 0,
+                            PRIMARY KEY (scope, status)
+                        ) WITHOUT ROWID
+                    ''')
+                    self._create_kpi_triggers(cursor)
+                    
+                    # Analytics rollups: one row per day/technician/status and per client,
+                    # refreshed from the request_changes log past the rollup_state watermark
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS request_daily_rollup (
+                            day TEXT NOT NULL,
+                            technician_id INTEGER NOT NULL,
+                            status TEXT NOT NULL,
+                            request_count INTEGER DEFAULT 0,
+                            revenue_sum REAL DEFAULT 0,
+                            rating_sum REAL DEFAULT 0,
+                            rating_count INTEGER DEFAULT 0,
+                            hours_sum REAL DEFAULT 0,
+                            hours_count INTEGER DEFAULT 0,
+                            PRIMARY KEY (day, technician_id, status)
+                        ) WITHOUT ROWID
+                    ''')
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS client_rollup (
+                            client_name TEXT PRIMARY KEY,
+                            completed_count INTEGER DEFAULT 0,
+                            first_day TEXT
+                        ) WITHOUT ROWID
+                    ''')
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS request_changes (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            day TEXT,
+                            client_name TEXT
+                        )
+                    ''')
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS rollup_state (
+                            name TEXT PRIMARY KEY,
+                            watermark INTEGER NOT NULL DEFAULT 0
+                        )
+                    ''')
+                    self._create_rollup_triggers(cursor)
+                    
+                    # Append-only activity log written by triggers, read incrementally by id
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS activity_events (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            type TEXT NOT NULL,
+                            actor TEXT,
+                            action TEXT NOT NULL,
+                            priority TEXT,
+                            amount TEXT,
+                            entity_id INTEGER,
+                            created_at TEXT NOT NULL
+                        )
+                    ''')
+                    # Single-row switch the activity triggers check; set only inside a bulk load's
+                    # own transaction, so other connections never see it on
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS activity_control (
+                            id INTEGER PRIMARY KEY CHECK (id = 1),
+                            muted INTEGER NOT NULL DEFAULT 0
+                        )
+                    ''')
+                    cursor.execute("INSERT OR IGNORE INTO activity_control (id, muted) VALUES (1, 0)")
+                    self._create_activity_triggers(cursor)
+                    self._create_search_index(cursor)
                 
-                # Enhanced Support Tickets table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS support_tickets (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        client_name TEXT NOT NULL,
-                        issue TEXT,
-                        status TEXT DEFAULT 'Open',
-                        created_date TEXT,
-                        priority TEXT DEFAULT 'Medium',
-                        category TEXT,
-                        resolution_time INTEGER,
-                        satisfaction_score INTEGER
-                    )
-                ''')
+                logger.info("Database tables created or verified.")
                 
-                # Analytics table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS analytics (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        metric_name TEXT,
-                        metric_value REAL,
-                        recorded_date TEXT,
-                        category TEXT
-                    )
-                ''')
+                self._run_migrations()
+                self.ensure_indexes()
                 
-                self.conn.commit()
-                logger.info("Database tables created or verified.")
+                # Counters start empty for databases created before kpi_counters existed
+                if self.conn.execute("SELECT COUNT(*) FROM kpi_counters").fetchone()[0] == 0:
+                    self.rebuild_kpi_counters()
             except sqlite3.Error as e:
                 logger.error(f"Error creating tables: {e}")
                 st.error("🚨 Failed to create database tables.")
     
+    def _create_kpi_triggers(self, cursor):
+        """Creates INSERT/UPDATE/DELETE triggers that keep kpi_counters in sync with each source table."""
+        upsert = """
+            INSERT INTO kpi_counters (scope, status, row_count, value_sum, rating_sum, rating_count)
+            VALUES ('{table}', COALESCE({row}.status, ''), {sign}1, {sign}COALESCE({value}, 0),
+                    {sign}COALESCE({row}.{rating}, 0), {sign}({row}.{rating} IS NOT NULL))
+            ON CONFLICT (scope, status) DO UPDATE SET
+                row_count = row_count + excluded.row_count,
+                value_sum = value_sum + excluded.value_sum,
+                rating_sum = rating_sum + excluded.rating_sum,
+                rating_count = rating_count + excluded.rating_count;
+        """
+        for table, (value_col, rating_col) in KPI_COUNTER_SOURCES.items():
+            def delta(row, sign):
+                value = f"{row}.{value_col}" if value_col else "0"
+                return upsert.format(table=table, row=row, sign=sign, value=value, rating=rating_col)
+            
+            watched = ', '.join(c for c in ('status', value_col, rating_col) if c)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_kpi_insert AFTER INSERT ON {table}
+                BEGIN {delta('NEW', '')} END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_kpi_update AFTER UPDATE OF {watched} ON {table}
+                BEGIN {delta('OLD', '-')} {delta('NEW', '')} END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_kpi_delete AFTER DELETE ON {table}
+                BEGIN {delta('OLD', '-')} END
+            """)
+    
+    def _create_rollup_triggers(self, cursor):
+        """Creates triggers that log the day and client touched by every service_requests change."""
+        log = """
+            INSERT INTO request_changes (day, client_name)
+            VALUES (COALESCE(substr({row}.created_date, 1, 10), ''), {row}.client_name);
+        """
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_service_requests_rollup_insert AFTER INSERT ON service_requests
+            BEGIN {log.format(row='NEW')} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_service_requests_rollup_update
+            AFTER UPDATE OF {', '.join(ROLLUP_SOURCE_COLUMNS)} ON service_requests
+            BEGIN {log.format(row='OLD')} {log.format(row='NEW')} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_service_requests_rollup_delete AFTER DELETE ON service_requests
+            BEGIN {log.format(row='OLD')} END
+        """)
+    
+    def _create_activity_triggers(self, cursor):
+        """
+        Creates triggers that append an activity_events row for every request, ticket and technician
+        change, unless activity_control is muted, plus the trigger that trims the log to
+        ACTIVITY_RETENTION_ROWS.
+        """
+        event = """
+            INSERT INTO activity_events (type, actor, action, priority, amount, entity_id, created_at)
+            VALUES ({type}, {actor}, {action}, {priority}, {amount}, {entity},
+                    strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime'));
+        """
+        triggers = {
+            'service_requests_insert': ("AFTER INSERT ON service_requests", "1", event.format(
+                type="'request'", actor="NEW.client_name",
+                action="'requested ' || lower(COALESCE(NEW.description, 'a service'))",
+                priority="lower(NEW.priority)",
+                amount="printf('$%,d', CAST(round(COALESCE(NEW.revenue, 0)) AS INTEGER))", entity="NEW.id")),
+            'service_requests_status': ("AFTER UPDATE OF status ON service_requests", "OLD.status IS NOT NEW.status", event.format(
+                type="CASE WHEN NEW.status = 'Completed' THEN 'completion' ELSE 'status' END", actor="NEW.client_name",
+                action="CASE WHEN NEW.status = 'Completed' THEN 'completed request #' || NEW.id "
+                       "ELSE 'moved request #' || NEW.id || ' to ' || NEW.status END",
+                priority="lower(NEW.priority)",
+                amount="printf('$%,d', CAST(round(COALESCE(NEW.revenue, 0)) AS INTEGER))", entity="NEW.id")),
+            'service_requests_rating': ("AFTER UPDATE OF client_rating ON service_requests",
+                                        "NEW.client_rating IS NOT NULL AND OLD.client_rating IS NOT NEW.client_rating", event.format(
+                type="'rating'", actor="NEW.client_name",
+                action="'rated request #' || NEW.id || ' ' || NEW.client_rating || ' stars'",
+                priority="CASE WHEN NEW.client_rating <= 2 THEN 'high' ELSE 'medium' END",
+                amount="NEW.client_rating || '.0⭐'", entity="NEW.id")),
+            'support_tickets_insert': ("AFTER INSERT ON support_tickets", "1", event.format(
+                type="'ticket'", actor="NEW.client_name",
+                action="'submitted ' || lower(COALESCE(NEW.priority, '')) || ' support ticket #TKT-' || NEW.id",
+                priority="lower(NEW.priority)", amount="NEW.category", entity="NEW.id")),
+            'support_tickets_status': ("AFTER UPDATE OF status ON support_tickets", "OLD.status IS NOT NEW.status", event.format(
+                type="'ticket'", actor="NEW.client_name",
+                action="'moved ticket #TKT-' || NEW.id || ' to ' || NEW.status",
+                priority="lower(NEW.priority)", amount="NEW.status", entity="NEW.id")),
+            'technicians_insert': ("AFTER INSERT ON technicians", "1", event.format(
+                type="'registration'", actor="NEW.name",
+                action="'joined as ' || COALESCE(NEW.specialty, 'a') || ' technician'",
+                priority="'low'", amount="NEW.location", entity="NEW.id")),
+            'technicians_update': ("AFTER UPDATE ON technicians", "1", event.format(
+                type="'technician'", actor="NEW.name",
+                action="CASE WHEN OLD.status IS NOT NEW.status THEN 'status changed to ' || NEW.status "
+                       "ELSE 'profile updated' END",
+                priority="'low'", amount="NEW.status", entity="NEW.id")),
+            'technicians_delete': ("AFTER DELETE ON technicians", "1", event.format(
+                type="'technician'", actor="OLD.name", action="'removed from the team'",
+                priority="'medium'", amount="OLD.location", entity="OLD.id"))
+        }
+        for name, (timing, condition, body) in triggers.items():
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{name}_activity {timing}
+                WHEN ({condition}) AND COALESCE((SELECT muted FROM activity_control WHERE id = 1), 0) = 0
+                BEGIN {body} END
+            """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_activity_events_prune AFTER INSERT ON activity_events
+            WHEN NEW.id % {int(ACTIVITY_PRUNE_EVERY)} = 0
+            BEGIN
+                DELETE FROM activity_events WHERE id <= NEW.id - {int(ACTIVITY_RETENTION_ROWS)};
+            END
+        """)
+    
+    @contextmanager
+    def _activity_muted(self, conn):
+        """
+        Suppresses the activity triggers for writes made inside the caller's writer transaction,
+        so bulk loads of historical rows don't flood the live feed with "just now" events.
+        """
+        conn.execute("UPDATE activity_control SET muted = 1 WHERE id = 1")
+        try:
+            yield
+        finally:
+            conn.execute("UPDATE activity_control SET muted = 0 WHERE id = 1")
+    
+    def _run_migrations(self):
+        """Applies pending data migrations in order, tracking progress in PRAGMA user_version."""
+        migrations = [
+            (1, self._migrate_normalize_created_dates),
+            (2, self._migrate_normalize_technician_tags),
+            (3, self._rebuild_rollups),
+            (4, self._migrate_client_first_day),
+            (5, self._migrate_technician_version),
+            (6, self._migrate_fts_update_triggers),
+            (7, self._migrate_activity_retention)
+        ]
+        try:
+            current = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            for version, migrate in migrations:
+                if version > current:
+                    # Each migration and its version bump commit atomically
+                    with self.pool.writer() as conn:
+                        cursor = conn.cursor()
+                        migrate(cursor)
+                        cursor.execute(f"PRAGMA user_version = {version}")
+                    logger.info(f"Applied schema migration {version}: {migrate.__name__}")
+        except sqlite3.Error as e:
+            logger.error(f"Error applying schema migrations: {e}")
+    
+    def _migrate_normalize_created_dates(self, cursor):
+        """Rewrites created_date values not in DB_DATETIME_FORMAT so range filters compare correctly."""
+        # SQLite's strftime uses the same directives as DB_DATETIME_FORMAT
+        for table in ('service_requests', 'support_tickets'):
+            cursor.execute(f"""
+                UPDATE {table}
+                SET created_date = strftime('{DB_DATETIME_FORMAT}', created_date)
+                WHERE created_date IS NOT NULL
+                  AND created_date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]'
+                  AND strftime('{DB_DATETIME_FORMAT}', created_date) IS NOT NULL
+            """)
+            if cursor.rowcount:
+                logger.info(f"Normalized {cursor.rowcount} created_date value(s) in {table}")
+    
+    def _migrate_normalize_technician_tags(self, cursor):
+        """Moves the legacy comma-joined skills/certifications columns into their join tables."""
+        cursor.execute("PRAGMA table_info(technicians)")
+        columns = {row[1] for row in cursor.fetchall()}
+        legacy = [key for key in TECHNICIAN_TAG_TABLES if key in columns]
+        if not legacy:
+            return
+        for key in legacy:
+            table, column = TECHNICIAN_TAG_TABLES[key]
+            cursor.execute(f"SELECT id, {key} FROM technicians WHERE {key} IS NOT NULL AND {key} != ''")
+            rows = [(tech_id, tag.strip()) for tech_id, raw in cursor.fetchall() for tag in raw.split(',') if tag.strip()]
+            cursor.executemany(f"INSERT OR IGNORE INTO {table} (technician_id, {column}) VALUES (?, ?)", rows)
+            logger.info(f"Migrated {len(rows)} {key} into {table}")
+        # The original FTS triggers read the legacy columns, so recreate them before dropping the columns
+        for trigger in ('trg_technicians_fts_insert', 'trg_technicians_fts_update'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        for key in legacy:
+            cursor.execute(f"ALTER TABLE technicians DROP COLUMN {key}")
+        if self.fts_enabled:
+            self._create_search_index(cursor)
+    
+    def _migrate_client_first_day(self, cursor):
+        """Adds client_rollup.first_day (used for the new-clients series) and rebuilds the rollups."""
+        cursor.execute("PRAGMA table_info(client_rollup)")
+        if 'first_day' not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE client_rollup ADD COLUMN first_day TEXT")
+        self._rebuild_rollups(cursor)
+    
+    def _migrate_technician_version(self, cursor):
+        """Adds technicians.version, the row version used for optimistic concurrency on edits."""
+        cursor.execute("PRAGMA table_info(technicians)")
+        if 'version' not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE technicians ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    
+    def _migrate_activity_retention(self, cursor):
+        """Recreates the activity triggers with the mute switch and trims the log to its retention."""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg\\_%\\_activity' ESCAPE '\\'")
+        for (trigger,) in cursor.fetchall():
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        self._create_activity_triggers(cursor)
+        cursor.execute("DELETE FROM activity_events WHERE id <= (SELECT MAX(id) FROM activity_events) - ?",
+                       (ACTIVITY_RETENTION_ROWS,))
+        if cursor.rowcount:
+            logger.info(f"Trimmed {cursor.rowcount} old activity event(s)")
+    
+    def _migrate_fts_update_triggers(self, cursor):
+        """Recreates the technician FTS update triggers so writes that keep the name skip them."""
+        for trigger in ('trg_technicians_fts_update', 'trg_technicians_fts_rename'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        if self.fts_enabled:
+            self._create_search_index(cursor)
+    
+    def ensure_indexes(self):
+        """
+        Creates any missing SCHEMA_INDEXES. Also acts as the migration step for existing
+        database files: when new indexes are built, ANALYZE refreshes the planner statistics.
+        """
+        try:
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+                existing = {row[0] for row in cursor.fetchall()}
+                missing = [idx for idx in SCHEMA_INDEXES if idx[0] not in existing]
+                for name, table, columns in missing:
+                    cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+                if missing:
+                    cursor.execute("ANALYZE")
+            if missing:
+                logger.info(f"Created {len(missing)} index(es): {', '.join(idx[0] for idx in missing)}")
+        except sqlite3.Error as e:
+            logger.error(f"Error creating indexes: {e}")
+    
+    def audit_query_plans(self):
+        """
+        Runs every read method in AUDITED_READS, captures the SELECT statements they issue and
+        returns their EXPLAIN QUERY PLAN output, flagging full table scans, temporary sorts and
+        index searches that leave the query's range condition to a row-by-row filter.
+        """
+        issued = []
+        self.conn.set_trace_callback(issued.append)
+        try:
+            for method in self.AUDITED_READS:
+                # Bypass cached_read so every query actually reaches SQLite
+                read = getattr(type(self), method)
+                getattr(read, '__wrapped__', read)(self)
+        finally:
+            self.conn.set_trace_callback(None)
+        
+        report = []
+        seen = set()
+        for sql in issued:
+            query = ' '.join(sql.split())
+            if not query.upper().startswith(('SELECT', 'WITH')) or query in seen:
+                continue
+            seen.add(query)
+            try:
+                plan = [row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()]
+            except sqlite3.Error as e:
+                logger.error(f"Error explaining query {query}: {e}")
+                continue
+            searches = [step for step in plan if step.startswith('SEARCH')]
+            report.append({
+                'query': query,
+                'plan': ' | '.join(plan),
+                'full_scan': any(step.startswith('SCAN') and 'USING' not in step for step in plan),
+                'temp_sort': any('TEMP B-TREE' in step for step in plan),
+                # The traced SQL has its parameters filled in, so match the comparison itself
+                'range_unindexed': bool(searches) and bool(RANGE_PREDICATE.search(query))
+                                   and not any('<' in step or '>' in step for step in searches)
+            })
+        return report
+    
+    def _create_search_index(self, cursor):
+        """
+        Creates FTS5 full-text indexes over technicians and service requests, kept in sync by triggers.
+        Falls back to LIKE-based search when the SQLite build lacks FTS5.
+        """
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS technicians_fts
+                USING fts5(name, email, skills, certifications)
+            """)
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS requests_fts
+                USING fts5(client_name, description, tech_name)
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable, search will use LIKE scans: {e}")
+            self.fts_enabled = False
+            return
+        
+        # rowid of each FTS row is the id of the source row; skills and certifications
+        # are filled in by the join-table triggers as tags are added or removed
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_technicians_fts_insert AFTER INSERT ON technicians
+            BEGIN
+                INSERT INTO technicians_fts (rowid, name, email, skills, certifications)
+                VALUES (NEW.id, NEW.name, NEW.email, '', '');
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_technicians_fts_update AFTER UPDATE OF name, email ON technicians
+            WHEN OLD.name IS NOT NEW.name OR OLD.email IS NOT NEW.email
+            BEGIN
+                UPDATE technicians_fts SET name = NEW.name, email = NEW.email WHERE rowid = NEW.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_technicians_fts_delete AFTER DELETE ON technicians
+            BEGIN
+                DELETE FROM technicians_fts WHERE rowid = OLD.id;
+            END
+        """)
+        for fts_column, (table, column) in TECHNICIAN_TAG_TABLES.items():
+            refresh = f"""
+                UPDATE technicians_fts
+                SET {fts_column} = COALESCE((SELECT group_concat({column}, ' ') FROM {table}
+                                             WHERE technician_id = {{row}}.technician_id), '')
+                WHERE rowid = {{row}}.technician_id;
+            """
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_insert AFTER INSERT ON {table}
+                BEGIN {refresh.format(row='NEW')} END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_delete AFTER DELETE ON {table}
+                BEGIN {refresh.format(row='OLD')} END
+            """)
+        # Requests are searchable by their assigned technician's name as well
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_technicians_fts_rename AFTER UPDATE OF name ON technicians
+            WHEN OLD.name IS NOT NEW.name
+            BEGIN
+                UPDATE requests_fts SET tech_name = NEW.name
+                WHERE rowid IN (SELECT id FROM service_requests WHERE assigned_tech_id = NEW.id);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_requests_fts_insert AFTER INSERT ON service_requests
+            BEGIN
+                INSERT INTO requests_fts (rowid, client_name, description, tech_name)
+                VALUES (NEW.id, NEW.client_name, NEW.description,
+                        (SELECT name FROM technicians WHERE id = NEW.assigned_tech_id));
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_requests_fts_update
+            AFTER UPDATE OF client_name, description, assigned_tech_id ON service_requests
+            BEGIN
+                UPDATE requests_fts
+                SET client_name = NEW.client_name, description = NEW.description,
+                    tech_name = (SELECT name FROM technicians WHERE id = NEW.assigned_tech_id)
+                WHERE rowid = NEW.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_requests_fts_delete AFTER DELETE ON service_requests
+            BEGIN
+                DELETE FROM requests_fts WHERE rowid = OLD.id;
+            END
+        """)
+        
+        # Backfill indexes created on top of existing data
+        cursor.execute("SELECT COUNT(*) FROM technicians_fts")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("""
+                INSERT INTO technicians_fts (rowid, name, email, skills, certifications)
+                SELECT t.id, t.name, t.email,
+                       COALESCE((SELECT group_concat(skill, ' ') FROM technician_skills WHERE technician_id = t.id), ''),
+                       COALESCE((SELECT group_concat(certification, ' ') FROM technician_certifications WHERE technician_id = t.id), '')
+                FROM technicians t
+            """)
+        cursor.execute("SELECT COUNT(*) FROM requests_fts")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("""
+                INSERT INTO requests_fts (rowid, client_name, description, tech_name)
+                SELECT sr.id, sr.client_name, sr.description, t.name
+                FROM service_requests sr
+                LEFT JOIN technicians t ON sr.assigned_tech_id = t.id
+            """)
+        self.fts_enabled = True
+    
+    @staticmethod
+    def _fts_query(text):
+        """Turns free text into an FTS5 MATCH expression of quoted prefix terms (all terms must match)."""
+        terms = re.findall(r'\w+', text or '')
+        return ' '.join(f'"{term}"*' for term in terms) or None
+    
+    @staticmethod
+    def _like_pattern(text):
+        """Escapes LIKE wildcards in user input and wraps it for a substring match."""
+        return '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    
+    def _get_versions(self, tables):
+        """Returns the current version of each table as a tuple, for use in cache keys."""
+        with self._cache_lock:
+            return tuple(self._table_versions.get(table, 0) for table in tables)
+    
+    def _bump_versions(self, *tables, deferred=True):
+        """
+        Invalidates cached reads of the given tables after a write. Inside transaction() this
+        waits for the commit unless deferred=False.
+        """
+        pending = getattr(self._unit_of_work, 'tables', None)
+        if deferred and pending is not None:
+            pending.update(tables)
+            return
+        with self._cache_lock:
+            for table in tables:
+                self._table_versions[table] = self._table_versions.get(table, 0) + 1
+    
+    def in_transaction(self):
+        """True while the calling thread is inside transaction()."""
+        return getattr(self._unit_of_work, 'tables', None) is not None
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Unit of work: every write method called in the block commits together, in one transaction,
+        or not at all. Inside it, write errors propagate to the caller instead of being reported
+        in the UI, and cached reads are invalidated once on commit. Nested blocks join the outer one.
+        """
+        if self.in_transaction():
+            with self.pool.writer() as conn:
+                yield conn
+            return
+        pending = self._unit_of_work.tables = set()
+        try:
+            with self.pool.writer() as conn:
+                yield conn
+        finally:
+            self._unit_of_work.tables = None
+        self._bump_versions(*pending)
+    
+    def _mark_read_failed(self):
+        """Tells cached_read not to store the fallback value returned by the current call."""
+        self._read_state.failed = True
+    
+    def cache_stats(self):
+        """Returns hit/miss counters and the current size of the read cache."""
+        with self._cache_lock:
+            return {
+                'entries': len(self._result_cache),
+                'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'table_versions': dict(self._table_versions)
+            }
+    
+    def rebuild_kpi_counters(self):
+        """Recomputes kpi_counters from the source tables, e.g. after bulk loads that bypassed the triggers."""
+        try:
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM kpi_counters")
+                for table, (value_col, rating_col) in KPI_COUNTER_SOURCES.items():
+                    cursor.execute(f"""
+                        INSERT INTO kpi_counters (scope, status, row_count, value_sum, rating_sum, rating_count)
+                        SELECT '{table}', COALESCE(status, ''), COUNT(*), COALESCE(SUM({value_col or 0}), 0),
+                               COALESCE(SUM({rating_col}), 0), COUNT({rating_col})
+                        FROM {table}
+                        GROUP BY COALESCE(status, '')
+                    """)
+            logger.info("KPI counters rebuilt.")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error rebuilding KPI counters: {e}")
+            return False
+    
+    # Rollup day keys are the 'YYYY-MM-DD' prefix of created_date; '~' sorts after every
+    # character of DB_DATETIME_FORMAT, so [day, day || '~') is an index range over that day.
+    _ROLLUP_DAY_SELECT = """
+        INSERT INTO request_daily_rollup (day, technician_id, status, request_count, revenue_sum,
+                                          rating_sum, rating_count, hours_sum, hours_count)
+        SELECT COALESCE(substr(created_date, 1, 10), ''), COALESCE(assigned_tech_id, 0), COALESCE(status, ''),
+               COUNT(*), COALESCE(SUM(revenue), 0), COALESCE(SUM(client_rating), 0), COUNT(client_rating),
+               COALESCE(SUM(actual_hours), 0), COUNT(actual_hours)
+        FROM service_requests
+        {where}
+        GROUP BY 1, 2, 3
+    """
+    _ROLLUP_CLIENT_SELECT = """
+        INSERT INTO client_rollup (client_name, completed_count, first_day)
+        SELECT client_name, SUM(status = 'Completed'), MIN(substr(created_date, 1, 10))
+        FROM service_requests
+        WHERE client_name IS NOT NULL {where}
+        GROUP BY client_name
+    """
+    
+    def _rebuild_rollups(self, cursor):
+        """Recomputes every analytics rollup from service_requests and clears the change log."""
+        cursor.execute("DELETE FROM request_daily_rollup")
+        cursor.execute("DELETE FROM client_rollup")
+        cursor.execute(self._ROLLUP_DAY_SELECT.format(where=''))
+        cursor.execute(self._ROLLUP_CLIENT_SELECT.format(where=''))
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM request_changes")
+        self._advance_rollup_watermark(cursor, cursor.fetchone()[0])
+        
+        placeholders = ', '.join('?' * len(ANALYTICS_SERIES))
+        cursor.execute(f"DELETE FROM analytics WHERE category IN ({placeholders})", tuple(ANALYTICS_SERIES))
+        cursor.execute("SELECT DISTINCT day FROM request_daily_rollup")
+        self._refresh_series(cursor, [row[0] for row in cursor.fetchall()])
+    
+    @staticmethod
+    def _advance_rollup_watermark(cursor, watermark):
+        cursor.execute("""
+            INSERT INTO rollup_state (name, watermark) VALUES ('service_requests', ?)
+            ON CONFLICT (name) DO UPDATE SET watermark = excluded.watermark
+        """, (watermark,))
+        cursor.execute("DELETE FROM request_changes WHERE id <= ?", (watermark,))
+    
+    def _rollup_watermark(self, conn):
+        row = conn.execute("SELECT watermark FROM rollup_state WHERE name = 'service_requests'").fetchone()
+        return row[0] if row else 0
+    
+    def refresh_rollups(self):
+        """
+        Folds service_requests changes logged since the watermark into the rollup tables.
+        Only the days and clients named in the change log are recomputed, so the cost
+        tracks the size of the change rather than the size of service_requests.
+        Returns the number of change-log entries applied.
+        """
+        try:
+            # Cheap check on the reader so renders with nothing pending never take the write lock
+            conn = self.conn
+            pending = conn.execute("SELECT MAX(id) FROM request_changes").fetchone()[0]
+            if pending is None or pending <= self._rollup_watermark(conn):
+                return 0
+            
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                watermark = self._rollup_watermark(conn)
+                cursor.execute("SELECT COALESCE(MAX(id), ?) FROM request_changes", (watermark,))
+                latest = cursor.fetchone()[0]
+                if latest <= watermark:
+                    return 0
+                cursor.execute("""
+                    SELECT DISTINCT day FROM request_changes WHERE id > ? AND id <= ?
+                """, (watermark, latest))
+                days = [row[0] for row in cursor.fetchall()]
+                cursor.execute("""
+                    SELECT DISTINCT client_name FROM request_changes
+                    WHERE id > ? AND id <= ? AND client_name IS NOT NULL
+                """, (watermark, latest))
+                clients = [row[0] for row in cursor.fetchall()]
+                
+                for day in days:
+                    cursor.execute("DELETE FROM request_daily_rollup WHERE day = ?", (day,))
+                    if day:
+                        cursor.execute(self._ROLLUP_DAY_SELECT.format(
+                            where="WHERE created_date >= ? AND created_date < ? || '~'"), (day, day))
+                    else:
+                        cursor.execute(self._ROLLUP_DAY_SELECT.format(where="WHERE created_date IS NULL"))
+                # A client's first request can move to a day that was not itself changed,
+                # so the new-clients series also needs the first_day before and after
+                first_days = set()
+                for client in clients:
+                    cursor.execute("SELECT first_day FROM client_rollup WHERE client_name = ?", (client,))
+                    first_days.update(row[0] for row in cursor.fetchall())
+                    cursor.execute("DELETE FROM client_rollup WHERE client_name = ?", (client,))
+                    cursor.execute(self._ROLLUP_CLIENT_SELECT.format(where="AND client_name = ?"), (client,))
+                    cursor.execute("SELECT first_day FROM client_rollup WHERE client_name = ?", (client,))
+                    first_days.update(row[0] for row in cursor.fetchall())
+                self._refresh_series(cursor, set(days) | first_days)
+                self._advance_rollup_watermark(cursor, latest)
+            logger.info(f"Refreshed analytics rollups for {len(days)} day(s) and {len(clients)} client(s).")
+            return latest - watermark
+        except sqlite3.Error as e:
+            logger.error(f"Error refreshing analytics rollups: {e}")
+            return 0
+    
+    @staticmethod
+    def _period_bounds(category, day):
+        """Returns the first and last day of the monthly/weekly period containing day."""
+        if category == 'monthly':
+            start = day.replace(day=1)
+            return start, start.replace(day=calendar.monthrange(day.year, day.month)[1])
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    
+    def _refresh_series(self, cursor, days):
+        """
+        Recomputes the analytics series rows for every period containing one of days.
+        Each period is summed from request_daily_rollup and client_rollup day ranges, so
+        appending a new day only touches its own month and week.
+        """
+        periods = set()
+        for day in days:
+            try:
+                day = datetime.strptime(day, '%Y-%m-%d')
+            except (TypeError, ValueError):
+                continue
+            periods.update((category,) + self._period_bounds(category, day) for category in ANALYTICS_SERIES)
+        
+        rows = []
+        for category, start, end in sorted(periods):
+            bounds = (start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+            cursor.execute("""
+                SELECT COALESCE(SUM(request_count), 0),
+                       COALESCE(SUM(CASE WHEN status = 'Completed' THEN revenue_sum END), 0),
+                       SUM(rating_sum), SUM(rating_count)
+                FROM request_daily_rollup
+                WHERE day >= ? AND day <= ?
+            """, bounds)
+            requests, revenue, rating_sum, rating_count = cursor.fetchone()
+            cursor.execute("SELECT COUNT(*) FROM client_rollup WHERE first_day >= ? AND first_day <= ?", bounds)
+            new_clients = cursor.fetchone()[0]
+            # Satisfaction is stored as a percentage of the 5-star scale, like DashboardStats.satisfaction_rate
+            satisfaction = round(rating_sum / rating_count * 20, 1) if rating_count else None
+            rows.extend((metric, value, bounds[0], category) for metric, value in (
+                ('revenue', revenue), ('requests', requests),
+                ('new_clients', new_clients), ('satisfaction', satisfaction)
+            ))
+        cursor.executemany("""
+            INSERT INTO analytics (metric_name, metric_value, recorded_date, category) VALUES (?, ?, ?, ?)
+            ON CONFLICT (category, metric_name, recorded_date) DO UPDATE SET metric_value = excluded.metric_value
+        """, rows)
+    
+    def rebuild_rollups(self):
+        """Recomputes the analytics rollups from scratch, e.g. after edits made outside the app."""
+        try:
+            with self.pool.writer() as conn:
+                self._rebuild_rollups(conn.cursor())
+            self._bump_versions('service_requests')
+            logger.info("Analytics rollups rebuilt.")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error rebuilding analytics rollups: {e}")
+            return False
+    
     def seed_data_if_empty(self):
         """Seeds the database with initial data if tables are empty."""
-        if self.conn:
+        if self.pool:
             try:
-                cursor = self.conn.cursor()
-                
-                # Enhanced technicians seeding
-                cursor.execute("SELECT COUNT(*) FROM technicians")
-                if cursor.fetchone()[0] == 0:
-                    specialties = ['Hardware Repair', 'Software Development', 'Network Security', 'Data Recovery', 'Mobile Services', 'Cloud Infrastructure']
-                    locations = ['Cairo HQ', 'Alexandria Branch', 'Giza Center', 'Luxor Office', 'Aswan Station']
-                    skills = ['Python', 'Java', 'Networking', 'Security', 'Database', 'Cloud', 'AI/ML', 'DevOps']
-                    certifications = ['AWS Certified', 'Cisco CCNA', 'Microsoft MVP', 'Google Cloud', 'Security+']
+                with self.pool.writer() as conn:
+                    cursor = conn.cursor()
                     
-                    data = []
-                    for i in range(25):
-                        join_date = (datetime.now() - timedelta(days=random.randint(30, 365))).strftime('%Y-%m-%d')
-                        last_active = (datetime.now() - timedelta(hours=random.randint(0, 72))).strftime('%Y-%m-%d %H:%M')
-                        skills_str = ','.join(random.sample(skills, random.randint(3, 5)))
-                        certs_str = ','.join(random.sample(certifications, random.randint(1, 3)))
-                        
-                        data.append((
-                            f'{"Mohamed Ahmed Ali Hassan Mahmoud".split()[i % 5]} {["Al","Ibn","El"][i % 3]} {"Tech Solutions Services Experts".split()[i % 3]}',
-                            f'tech.{i+1}@techpro.com',
-                            f'+20 1{random.randint(0,9)}{random.randint(0,9)} {random.randint(100,999)} {random.randint(1000,9999)}',
-                            random.choice(specialties),
-                            random.choice(locations),
-                            skills_str,
-                            round(random.uniform(4.2, 5.0), 1),
-                            random.randint(20, 300),
-                            random.randint(120, 600),
-                            random.choices(['Active', 'Pending', 'Inactive'], weights=[75, 15, 10])[0],
-                            join_date,
-                            f'{random.randint(2, 10)} years',
-                            certs_str,
-                            random.randint(75, 98),
-                            last_active
-                        ))
+                    # Enhanced technicians seeding
+                    cursor.execute("SELECT COUNT(*) FROM technicians")
+                    if cursor.fetchone()[0] == 0:
+                        specialties = ['Hardware Repair', 'Software Development', 'Network Security', 'Data Recovery', 'Mobile Services', 'Cloud Infrastructure']
+                        locations = ['Cairo HQ', 'Alexandria Branch', 'Giza Center', 'Luxor Office', 'Aswan Station']
+                        skills = ['Python', 'Java', 'Networking', 'Security', 'Database', 'Cloud', 'AI/ML', 'DevOps']
+                        certifications = ['AWS Certified', 'Cisco CCNA', 'Microsoft MVP', 'Google Cloud', 'Security+']
                     
-                    cursor.executemany('''
-                        INSERT INTO technicians (name, email, phone, specialty, location, skills, rating, 
-                        completed_jobs, hourly_rate, status, join_date, experience, certifications, 
-                        performance_score, last_active) 
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', data)
-                
-                # Enhanced service requests seeding
-                cursor.execute("SELECT COUNT(*) FROM service_requests")
-                if cursor.fetchone()[0] == 0:
-                    statuses = ['Pending', 'In Progress', 'Completed', 'Cancelled']
-                    priorities = ['Low', 'Medium', 'High', 'Critical']
-                    data = []
+                        data = []
+                        tags = {key: [] for key in TECHNICIAN_TAG_TABLES}
+                        for i in range(25):
+                            join_date = (datetime.now() - timedelta(days=random.randint(30, 365))).strftime('%Y-%m-%d')
+                            last_active = (datetime.now() - timedelta(hours=random.randint(0, 72))).strftime('%Y-%m-%d %H:%M')
+                            email = f'tech.{i+1}@techpro.com'
+                            tags['skills'].extend((email, s) for s in random.sample(skills, random.randint(3, 5)))
+                            tags['certifications'].extend((email, c) for c in random.sample(certifications, random.randint(1, 3)))
                     
-                    for i in range(50):
-                        created_date = (datetime.now() - timedelta(days=random.randint(1, 30))).strftime('%Y-%m-%d %H:%M')
-                        due_date = (datetime.now() + timedelta(days=random.randint(1, 14))).strftime('%Y-%m-%d')
-                        
-                        data.append((
-                            f'Enterprise Client {i+1}',
-                            f'Comprehensive service request #{i+1} for system maintenance and optimization',
-                            random.choice(statuses),
-                            random.randint(1, 25),
-                            created_date,
-                            random.choice(priorities),
-                            random.randint(2, 8),
-                            random.randint(1, 10) if random.random() > 0.3 else None,
-                            random.randint(3, 5) if random.random() > 0.5 else None,
-                            round(random.uniform(500, 5000), 2),
-                            due_date
-                        ))
+                            data.append((
+                                f'{"Mohamed Ahmed Ali Hassan Mahmoud".split()[i % 5]} {["Al","Ibn","El"][i % 3]} {"Tech Solutions Services Experts".split()[i % 3]}',
+                                email,
+                                f'+20 1{random.randint(0,9)}{random.randint(0,9)} {random.randint(100,999)} {random.randint(1000,9999)}',
+                                random.choice(specialties),
+                                random.choice(locations),
+                                round(random.uniform(4.2, 5.0), 1),
+                                random.randint(20, 300),
+                                random.randint(120, 600),
+                                random.choices(['Active', 'Pending', 'Inactive'], weights=[75, 15, 10])[0],
+                                join_date,
+                                f'{random.randint(2, 10)} years',
+                                random.randint(75, 98),
+                                last_active
+                            ))
                     
-                    cursor.executemany('''
-                        INSERT INTO service_requests (client_name, description, status, assigned_tech_id, 
-                        created_date, priority, estimated_hours, actual_hours, client_rating, revenue, due_date) 
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', data)
-                
-                self.conn.commit()
+                        cursor.executemany('''
+                            INSERT INTO technicians (name, email, phone, specialty, location, rating, 
+                            completed_jobs, hourly_rate, status, join_date, experience, 
+                            performance_score, last_active) 
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ''', data)
+                        for key, (table, column) in TECHNICIAN_TAG_TABLES.items():
+                            cursor.executemany(f'''
+                                INSERT INTO {table} (technician_id, {column})
+                                SELECT id, ? FROM technicians WHERE email = ?
+                            ''', [(tag, email) for email, tag in tags[key]])
+                    
+                    # Enhanced service requests seeding
+                    cursor.execute("SELECT COUNT(*) FROM service_requests")
+                    if cursor.fetchone()[0] == 0:
+                        statuses = ['Pending', 'In Progress', 'Completed', 'Cancelled']
+                        priorities = ['Low', 'Medium', 'High', 'Critical']
+                        data = []
+                    
+                        for i in range(50):
+                            created_date = (datetime.now() - timedelta(days=random.randint(1, 30))).strftime(DB_DATETIME_FORMAT)
+                            due_date = (datetime.now() + timedelta(days=random.randint(1, 14))).strftime('%Y-%m-%d')
+                    
+                            data.append((
+                                f'Enterprise Client {i+1}',
+                                f'Comprehensive service request #{i+1} for system maintenance and optimization',
+                                random.choice(statuses),
+                                random.randint(1, 25),
+                                created_date,
+                                random.choice(priorities),
+                                random.randint(2, 8),
+                                random.randint(1, 10) if random.random() > 0.3 else None,
+                                random.randint(3, 5) if random.random() > 0.5 else None,
+                                round(random.uniform(500, 5000), 2),
+                                due_date
+                            ))
+                    
+                        cursor.executemany('''
+                            INSERT INTO service_requests (client_name, description, status, assigned_tech_id, 
+                            created_date, priority, estimated_hours, actual_hours, client_rating, revenue, due_date) 
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ''', data)
+                    
+                    cursor.execute("SELECT COUNT(*) FROM notifications")
+                    if cursor.fetchone()[0] == 0:
+                        now = datetime.now()
+                        for minutes, kind, message in [(60, "success", "Monthly target achieved"),
+                                                       (10, "warning", "3 pending approvals"),
+                                                       (5, "info", "System update available")]:
+                            self._add_notification(cursor, kind, message, now - timedelta(minutes=minutes))
                 logger.info("Enhanced data seeding completed successfully.")
             except sqlite3.Error as e:
                 logger.error(f"Error seeding data: {e}")
                 st.error("🚨 Failed to seed initial data.")
     
+    @staticmethod
+    def _validate_import_row(table, row):
+        """
+        Converts one raw import record to typed values. Blank strings become None and
+        'tags' columns become lists. Raises ValueError describing the first bad field.
+        """
+        if isinstance(row, ValueError):
+            # A line iter_import_records could not parse
+            raise row
+        if not isinstance(row, dict):
+            raise ValueError(f"expected an object of fields, got {type(row).__name__}")
+        clean = {}
+        for column, kind in IMPORT_COLUMNS[table].items():
+            value = row.get(column)
+            if isinstance(value, str):
+                value = value.strip() or None
+            if value is not None:
+                try:
+                    if kind == 'int':
+                        number = float(value)
+                        if not number.is_integer():
+                            raise ValueError(value)
+                        value = int(number)
+                    elif kind == 'real':
+                        value = float(value)
+                    elif kind == 'date':
+                        value = datetime.fromisoformat(str(value)).strftime('%Y-%m-%d')
+                    elif kind == 'datetime':
+                        value = datetime.fromisoformat(str(value)).strftime(DB_DATETIME_FORMAT)
+                    elif kind == 'tags':
+                        tags = value if isinstance(value, list) else str(value).split(',')
+                        value = sorted({str(tag).strip() for tag in tags if str(tag).strip()})
+                    else:
+                        value = str(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"{column}: cannot read {value!r} as {kind}")
+            choices = IMPORT_CHOICES.get((table, column))
+            if choices and value is not None and value not in choices:
+                raise ValueError(f"{column}: {value!r} is not one of {', '.join(choices)}")
+            clean[column] = value
+        for column in IMPORT_REQUIRED[table]:
+            if clean[column] is None:
+                raise ValueError(f"{column} is required")
+        if table == 'technicians' and not EMAIL_PATTERN.match(clean['email']):
+            raise ValueError(f"email: {clean['email']!r} is not a valid address")
+        return clean
+    
+    def _stage_import_batch(self, cursor, table, rows):
+        """
+        Loads validated rows into a TEMP staging table with executemany, then moves them into
+        table with set-based statements. One INSERT ... SELECT per batch keeps the FTS5 triggers
+        from flushing their index once per row, which is what makes row-at-a-time inserts slow.
+        Rows that reference a technician who does not exist are left out rather than failing the
+        batch. Returns (inserted, updated, rejected (line, message) pairs).
+        """
+        columns = [c for c, kind in IMPORT_COLUMNS[table].items() if kind != 'tags']
+        staging = f"import_{table}"
+        cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {staging} (line INTEGER, {', '.join(columns)})")
+        cursor.execute(f"DELETE FROM temp.{staging}")
+        cursor.executemany(
+            f"INSERT INTO temp.{staging} (line, {', '.join(columns)}) VALUES (?, {', '.join('?' * len(columns))})",
+            [(line,) + tuple(row[c] for c in columns) for line, row in rows]
+        )
+        
+        # New rows take the column defaults the single-row forms use
+        defaults = {column: choices[0] for (t, column), choices in IMPORT_CHOICES.items() if t == table}
+        if table == 'technicians':
+            defaults.update(rating=0.0, completed_jobs=0, performance_score=0, hourly_rate=0,
+                            experience='Not specified')
+        else:
+            defaults['created_date'] = datetime.now().strftime(DB_DATETIME_FORMAT)
+        
+        def value(column):
+            if column in defaults:
+                return f"COALESCE(s.{column}, {defaults[column]!r})"
+            return f"s.{column}"
+        
+        if table == 'service_requests':
+            # Check technician references against technicians here, so one bad row is reported
+            # against its line instead of failing the foreign key for the whole batch
+            rejected = [
+                (line, f"assigned_tech_id: no technician #{tech_id}" if tech_id is not None
+                 else f"assigned_tech_email: no technician with email {tech_email!r}")
+                for line, tech_id, tech_email in cursor.execute(f"""
+                    SELECT s.line, s.assigned_tech_id, s.assigned_tech_email FROM temp.{staging} s
+                    WHERE CASE WHEN s.assigned_tech_id IS NOT NULL
+                               THEN NOT EXISTS (SELECT 1 FROM technicians t WHERE t.id = s.assigned_tech_id)
+                               WHEN s.assigned_tech_email IS NOT NULL
+                               THEN NOT EXISTS (SELECT 1 FROM technicians t WHERE t.email = s.assigned_tech_email)
+                               ELSE 0 END
+                    ORDER BY s.line
+                """).fetchall()
+            ]
+            if rejected:
+                cursor.executemany(f"DELETE FROM temp.{staging} WHERE line = ?", [(line,) for line, _ in rejected])
+            targets = [c for c in columns if c != 'assigned_tech_email']
+            select = [value(c) for c in targets]
+            select[targets.index('assigned_tech_id')] = (
+                "COALESCE(s.assigned_tech_id, (SELECT id FROM technicians WHERE email = s.assigned_tech_email))"
+            )
+            cursor.execute(f"""
+                INSERT INTO service_requests ({', '.join(targets)})
+                SELECT {', '.join(select)} FROM temp.{staging} s ORDER BY s.line
+            """)
+            return cursor.rowcount, 0, rejected
+        if table == 'support_tickets':
+            cursor.execute(f"""
+                INSERT INTO support_tickets ({', '.join(columns)})
+                SELECT {', '.join(value(c) for c in columns)} FROM temp.{staging} s ORDER BY s.line
+            """)
+            return cursor.rowcount, 0, []
+        
+        # Technicians upsert on email: fields left blank in the file keep their current values.
+        # Only columns the batch provides are written, and only on rows where one of them differs,
+        # so unchanged rows keep their version and don't fire the name triggers.
+        updated = cursor.execute(f"""
+            SELECT COUNT(*) FROM temp.{staging} s WHERE EXISTS (SELECT 1 FROM technicians t WHERE t.email = s.email)
+        """).fetchone()[0]
+        provided = [c for c in columns if c != 'email' and any(row[c] is not None for _, row in rows)]
+        if updated and provided:
+            cursor.execute(f"""
+                UPDATE technicians SET {', '.join(f"{c} = COALESCE(s.{c}, technicians.{c})" for c in provided)},
+                    version = technicians.version + 1
+                FROM temp.{staging} s
+                WHERE s.email = technicians.email
+                  AND ({' OR '.join(f"(s.{c} IS NOT NULL AND s.{c} IS NOT technicians.{c})" for c in provided)})
+            """)
+        cursor.execute(f"""
+            INSERT INTO technicians ({', '.join(columns)})
+            SELECT {', '.join(value(c) for c in columns)} FROM temp.{staging} s
+            WHERE NOT EXISTS (SELECT 1 FROM technicians t WHERE t.email = s.email)
+            ORDER BY s.line
+        """)
+        inserted = cursor.rowcount
+        # Tags listed in the file replace the technician's existing set for that kind
+        for key, (tag_table, tag_column) in TECHNICIAN_TAG_TABLES.items():
+            provided = [(row['email'], tag) for _, row in rows if row[key] is not None for tag in row[key] or [None]]
+            if not provided:
+                continue
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS import_tags (email TEXT, tag TEXT)")
+            cursor.execute("DELETE FROM temp.import_tags")
+            cursor.executemany("INSERT INTO temp.import_tags (email, tag) VALUES (?, ?)", provided)
+            cursor.execute(f"""
+                DELETE FROM {tag_table} WHERE technician_id IN (
+                    SELECT t.id FROM technicians t WHERE t.email IN (SELECT email FROM temp.import_tags)
+                )
+            """)
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO {tag_table} (technician_id, {tag_column})
+                SELECT t.id, g.tag FROM temp.import_tags g JOIN technicians t ON t.email = g.email
+                WHERE g.tag IS NOT NULL
+            """)
+        return inserted, updated, []
+    
+    def bulk_import(self, table, records, batch_size=IMPORT_BATCH_SIZE, progress=None, max_errors=100,
+                    defer_indexes=False):
+        """
+        Validates and loads (line, record) pairs into technicians, service_requests or
+        support_tickets, one write transaction per batch. Technicians are upserted on email.
+        Invalid rows are skipped and reported (up to max_errors messages). progress, if
+        given, is called with the running ImportReport after every batch.
+        defer_indexes drops the table's SCHEMA_INDEXES for the duration of the import and
+        rebuilds them afterwards, which is much faster for initial loads of large files.
+        """
+        if table not in IMPORT_COLUMNS:
+            raise ValueError(f"Cannot import into {table!r}; expected one of {', '.join(IMPORT_COLUMNS)}")
+        report = ImportReport(table)
+        started = time.perf_counter()
+        if defer_indexes:
+            with self.pool.writer() as conn:
+                for name, index_table, _ in SCHEMA_INDEXES:
+                    if index_table == table:
+                        conn.execute(f"DROP INDEX IF EXISTS {name}")
+        
+        def flush(batch):
+            with self.pool.writer() as conn, self._activity_muted(conn):
+                conn.execute(f"PRAGMA cache_size = {IMPORT_CACHE_SIZE}")
+                inserted, updated, rejected = self._stage_import_batch(conn.cursor(), table, list(batch.values()))
+            report.inserted += inserted
+            report.updated += updated
+            report.skipped += len(rejected)
+            report.errors.extend(rejected[:max(0, max_errors - len(report.errors))])
+            report.seconds = time.perf_counter() - started
+            if progress:
+                progress(report)
+        
+        try:
+            batch = {}
+            for line, record in records:
+                try:
+                    row = self._validate_import_row(table, record)
+                except ValueError as e:
+                    report.skipped += 1
+                    if len(report.errors) < max_errors:
+                        report.errors.append((line, str(e)))
+                    continue
+                if table == 'technicians' and row['email'] in batch:
+                    # A repeated email within a batch merges into the earlier row, later values winning
+                    earlier = batch[row['email']][1]
+                    row = {c: row[c] if row[c] is not None else earlier[c] for c in row}
+                    report.updated += 1
+                batch[row['email'] if table == 'technicians' else line] = (line, row)
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = {}
+            if batch:
+                flush(batch)
+        except sqlite3.Error as e:
+            logger.error(f"Error importing into {table}: {e}")
+            report.errors.append((None, f"Import stopped: {e}"))
+        finally:
+            with self.pool.writer() as conn:
+                conn.execute(f"PRAGMA cache_size = {DB_PRAGMAS['cache_size']}")
+            if defer_indexes:
+                self.ensure_indexes()
+            report.seconds = time.perf_counter() - started
+            self._bump_versions(table, *(TECHNICIAN_TAG_TABLES if table == 'technicians' else ()))
+        
+        if table == 'service_requests' and report.inserted >= IMPORT_ROLLUP_REBUILD_ROWS:
+            # One grouped pass beats folding a change log with an entry per imported row
+            self.rebuild_rollups()
+        self.conn.execute("PRAGMA optimize")
+        logger.info(f"Imported {report.inserted} new and {report.updated} updated {table} rows "
+                    f"({report.skipped} skipped) in {report.seconds:.1f}s")
+        return report
+    
+    def import_file(self, table, source, name=None, **options):
+        """Bulk-imports a CSV or JSON Lines file (path or binary file object) into table."""
+        return self.bulk_import(table, iter_import_records(source, name), **options)
+    
+    def _frame_from_cursor(self, cursor, dtypes=None, batch_size=10000):
+        """
+        Builds a typed DataFrame straight from an executed cursor. Rows are fetched in batches and
+        transposed into per-column lists, so no intermediate dict per row is ever created.
+        """
+        names = [desc[0] for desc in cursor.description]
+        columns = [[] for _ in names]
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            for column, values in zip(columns, zip(*batch)):
+                column.extend(values)
+        return self._typed_frame(names, columns, dtypes)
+    
+    def _typed_frame(self, names, columns, dtypes=None):
+        """Assembles per-column value lists into a DataFrame with the dtypes from dtypes."""
+        dtypes = dtypes or {}
+        return pd.DataFrame({
+            name: self._typed_column(values, dtypes.get(name))
+            for name, values in zip(names, columns)
+        })
+    
+    def iter_query_frames(self, sql, params=(), dtypes=None, chunk_size=EXPORT_CHUNK_ROWS):
+        """
+        Yields the rows of sql as typed DataFrames of at most chunk_size rows, so exports never
+        hold the whole result set in memory. Category dtypes are skipped because each chunk
+        would get its own categories.
+        """
+        dtypes = {name: kind for name, kind in (dtypes or {}).items() if kind != 'category'}
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            names = [desc[0] for desc in cursor.description]
+            empty = True
+            while True:
+                batch = cursor.fetchmany(chunk_size)
+                if not batch:
+                    break
+                empty = False
+                yield self._typed_frame(names, list(zip(*batch)), dtypes)
+            if empty:
+                # Still emit the header row / schema for an empty result
+                yield pd.DataFrame(columns=names)
+        except sqlite3.Error as e:
+            logger.error(f"Error streaming export query: {e}")
+            raise
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def _typed_column(values, kind):
+        """Converts one column's raw values to the requested pandas type."""
+        if kind == 'category':
+            return pd.Categorical(values)
+        if kind == 'float':
+            return np.asarray(values, dtype='float64')
+        if kind == 'datetime':
+            return pd.to_datetime(pd.Series(values, dtype=object), format='ISO8601', errors='coerce')
+        return values
+    
     def get_dashboard_stats(self):
-        """Retrieves dashboard statistics with error handling."""
+        """Retrieves a DashboardStats snapshot from the trigger-maintained kpi_counters table."""
+        current_time = datetime.now()
+        base_users = 1560 + int(current_time.minute / 2)
         try:
-            current_time = datetime.now()
-            base_users = 1560 + int(current_time.minute / 2)
-            base_requests = 678 + int(current_time.minute / 3)
-            
             cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT scope, status, row_count, value_sum, rating_sum, rating_count
+                FROM kpi_counters
+                WHERE row_count > 0
+            """)
+            counts = {table: {} for table in KPI_COUNTER_SOURCES}
+            revenue_by_status = {}
+            rating_sum = rating_count = 0
+            for scope, status, row_count, value_sum, ratings, rated in cursor.fetchall():
+                counts[scope][status] = row_count
+                if scope == 'service_requests':
+                    revenue_by_status[status] = value_sum
+                    rating_sum += ratings
+                    rating_count += rated
             
-            # Calculate additional metrics
-            cursor.execute("SELECT SUM(revenue) FROM service_requests WHERE status = 'Completed'")
-            total_revenue = cursor.fetchone()[0] or 0
-            
-            cursor.execute("SELECT AVG(client_rating) FROM service_requests WHERE client_rating IS NOT NULL")
-            avg_rating = cursor.fetchone()[0] or 4.5
-            
-            return {
-                'total_users': base_users,
-                'total_technicians': self._get_count('technicians'),
-                'active_technicians': self._get_count('technicians', "status = 'Active'"),
-                'total_requests': self._get_count('service_requests'),
-                'pending_requests': self._get_count('service_requests', "status = 'Pending'"),
-                'in_progress_requests': self._get_count('service_requests', "status = 'In Progress'"),
-                'completed_requests': self._get_count('service_requests', "status = 'Completed'"),
-                'open_tickets': self._get_count('support_tickets', "status = 'Open'"),
-                'total_revenue': total_revenue,
-                'satisfaction_rate': round(avg_rating * 20, 1),  # Convert 5-star to percentage
-                'avg_response_time': '8 min',
-                'on_time_delivery': '94%'
-            }
+            return DashboardStats(
+                total_users=base_users,
+                technicians_by_status=counts['technicians'],
+                requests_by_status=counts['service_requests'],
+                tickets_by_status=counts['support_tickets'],
+                total_revenue=revenue_by_status.get('Completed', 0),
+                avg_rating=rating_sum / rating_count if rating_count else 4.5,
+                avg_response_time='8 min',
+                on_time_delivery='94%'
+            )
         except sqlite3.Error as e:
             logger.error(f"Error getting dashboard stats: {e}")
-            return {
-                'total_users': 1560,
-                'total_technicians': 0,
-                'active_technicians': 0,
-                'total_requests': 0,
-                'pending_requests': 0,
-                'in_progress_requests': 0,
-                'completed_requests': 0,
-                'open_tickets': 0,
-                'total_revenue': 0,
-                'satisfaction_rate': 90.0,
-                'avg_response_time': 'N/A',
-                'on_time_delivery': 'N/A'
-            }
+            return DashboardStats()
     
-    def _get_count(self, table, where=None):
-        """Helper method to get row count from a table with optional where clause."""
+    def get_activity_since(self, cursor_id=0, types=None, limit=ACTIVITY_FEED_SIZE):
+        """
+        Returns up to `limit` activity events newer than cursor_id, newest first. Only the id range
+        past the cursor is read (rowid order, or the (type, id) index when filtering by type), so
+        polling stays cheap however long the history grows. Pass the largest id seen as the next cursor.
+        """
         try:
+            params = [cursor_id]
+            type_clause = ""
+            if types:
+                type_clause = f"AND type IN ({', '.join('?' * len(types))})"
+                params.extend(types)
             cursor = self.conn.cursor()
-            query = f"SELECT COUNT(*) FROM {table}"
-            if where:
-                query += f" WHERE {where}"
-            return cursor.execute(query).fetchone()[0]
+            cursor.execute(f"""
+                SELECT id, type, actor, action, priority, amount, entity_id, created_at
+                FROM activity_events
+                WHERE id > ? {type_clause}
+                ORDER BY id DESC
+                LIMIT ?
+            """, params + [limit])
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
         except sqlite3.Error as e:
-            logger.error(f"Error counting rows in {table}: {e}")
-            return 0
+            logger.error(f"Error getting activity since {cursor_id}: {e}")
+            return []
     
-    def get_recent_activity(self):
-        """Returns a list of recent activities for the dashboard."""
-        # This can be expanded to query from DB in future
-        activities = [
-            {"user": "Ahmed Mohamed", "action": "requested premium hardware repair for MacBook Pro M2", "time": "2 mins ago", "type": "request", "icon": "💻", "priority": "high", "amount": "$450"},
-            {"user": "Nour Tech Solutions", "action": "completed enterprise network security audit", "time": "15 mins ago", "type": "completion", "icon": "🛡️", "priority": "medium", "amount": "$1,200"},
-            {"user": "Sarah Johnson", "action": "submitted critical support ticket #TKT-7842", "time": "25 mins ago", "type": "ticket", "icon": "🎫", "priority": "critical", "amount": "Urgent"},
-            {"user": "Tech Masters Corp", "action": "joined as enterprise technician partner", "time": "1 hour ago", "type": "registration", "icon": "⭐", "priority": "low", "amount": "Premium"},
-            {"user": "Mohamed Ali", "action": "rated service 5 stars - Exceptional performance!", "time": "2 hours ago", "type": "rating", "icon": "✨", "priority": "medium", "amount": "5.0⭐"}
-        ]
-        return activities
+    def get_recent_activity(self, limit=5):
+        """Returns the newest activity events for the dashboard."""
+        return self.get_activity_since(0, limit=limit)
     
+    @cached_read('technicians')
     def get_technicians_data(self):
         """Retrieves all technicians data with error handling."""
         try:
@@ -668,68 +2086,313 @@ class ProfessionalDBManager:
             cursor.execute("SELECT * FROM technicians ORDER BY performance_score DESC")
             columns = [desc[0] for desc in cursor.description]
             data = cursor.fetchall()
+            tags = {key: self._get_technician_tags(cursor, key) for key in TECHNICIAN_TAG_TABLES}
             technicians = []
             for row in data:
                 tech = dict(zip(columns, row))
-                tech['skills'] = tech['skills'].split(',') if tech['skills'] else []
-                tech['certifications'] = tech['certifications'].split(',') if tech['certifications'] else []
+                for key in TECHNICIAN_TAG_TABLES:
+                    tech[key] = tags[key].get(tech['id'], [])
                 technicians.append(tech)
             return technicians
         except sqlite3.Error as e:
             logger.error(f"Error getting technicians data: {e}")
+            self._mark_read_failed()
             return []
     
-    def approve_technician(self, tech_id):
-        """Approves a technician by setting status to Active."""
+    @cached_read('technicians')
+    def get_technicians_frame(self):
+        """Retrieves all technicians as a typed DataFrame with skills/certifications list columns."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT * FROM technicians ORDER BY performance_score DESC")
+            frame = self._frame_from_cursor(cursor, TECHNICIAN_FRAME_DTYPES)
+            for key in TECHNICIAN_TAG_TABLES:
+                tags = self._get_technician_tags(cursor, key)
+                frame[key] = [tags.get(tech_id, []) for tech_id in frame['id']]
+            return frame
+        except sqlite3.Error as e:
+            logger.error(f"Error getting technicians frame: {e}")
+            self._mark_read_failed()
+            return pd.DataFrame()
+    
+    def _get_technician_tags(self, cursor, key):
+        """Loads one tag join table as {technician_id: [values]} in a single indexed pass."""
+        table, column = TECHNICIAN_TAG_TABLES[key]
+        cursor.execute(f"SELECT technician_id, {column} FROM {table} ORDER BY technician_id")
+        tags = {}
+        for tech_id, value in cursor.fetchall():
+            tags.setdefault(tech_id, []).append(value)
+        return tags
+    
+    def _set_technician_tags(self, cursor, key, tech_id, values):
+        """Replaces a technician's skills or certifications; accepts a list or a comma-separated string."""
+        table, column = TECHNICIAN_TAG_TABLES[key]
+        if isinstance(values, str):
+            values = values.split(',')
+        values = sorted({v.strip() for v in values if v and v.strip()})
+        cursor.execute(f"DELETE FROM {table} WHERE technician_id = ?", (tech_id,))
+        cursor.executemany(
+            f"INSERT INTO {table} (technician_id, {column}) VALUES (?, ?)",
+            [(tech_id, value) for value in values]
+        )
+    
+    def distinct_locations(self):
+        """Returns the distinct technician locations, read from the location index."""
+        return self._distinct_technician_values('location')
+    
+    def distinct_specialties(self):
+        """Returns the distinct technician specialties, read from the specialty index."""
+        return self._distinct_technician_values('specialty')
+    
+    def _distinct_technician_values(self, column):
+        """Helper method for SELECT DISTINCT over an indexed technicians column."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"SELECT DISTINCT {column} FROM technicians WHERE {column} IS NOT NULL AND {column} != '' ORDER BY {column}")
+            return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Error getting distinct technician {column} values: {e}")
+            return []
+    
+    def get_skill_catalog(self):
+        """Returns every distinct skill, read from the skill index."""
         try:
             cursor = self.conn.cursor()
-            cursor.execute("UPDATE technicians SET status = 'Active' WHERE id = ?", (tech_id,))
-            if cursor.rowcount == 0:
-                raise ValueError(f"Technician ID {tech_id} not found")
-            self.conn.commit()
+            cursor.execute("SELECT DISTINCT skill FROM technician_skills ORDER BY skill")
+            return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Error getting skill catalog: {e}")
+            return []
+    
+    def find_technicians_by_skills(self, skills, certifications=None, location=None, status=None):
+        """
+        Returns ids of technicians holding every given skill (and certification), optionally
+        restricted to a location and status, best performers first. Runs as one indexed query.
+        """
+        where = []
+        params = []
+        for key, values in (('skills', skills), ('certifications', certifications)):
+            if values:
+                # One covering index lookup per required value, intersected
+                table, column = TECHNICIAN_TAG_TABLES[key]
+                lookup = f"SELECT technician_id FROM {table} WHERE {column} = ?"
+                where.append(f"t.id IN ({' INTERSECT '.join([lookup] * len(values))})")
+                params.extend(values)
+        if location:
+            where.append("t.location = ?")
+            params.append(location)
+        if status:
+            where.append("t.status = ?")
+            params.append(status)
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"SELECT t.id FROM technicians t {where_clause} ORDER BY t.performance_score DESC", params)
+            return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Error finding technicians by skills: {e}")
+            return []
+    
+    def search_technicians(self, q, limit=None):
+        """Returns technician ids matching q in name, email, skills or certifications, best match first."""
+        try:
+            cursor = self.conn.cursor()
+            if self.fts_enabled:
+                match = self._fts_query(q)
+                if not match:
+                    return []
+                cursor.execute(
+                    "SELECT rowid FROM technicians_fts WHERE technicians_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (match, limit or -1)
+                )
+            else:
+                pattern = self._like_pattern(q)
+                cursor.execute("""
+                    SELECT id FROM technicians t
+                    WHERE name LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\'
+                       OR EXISTS (SELECT 1 FROM technician_skills s
+                                  WHERE s.technician_id = t.id AND s.skill LIKE ? ESCAPE '\\')
+                       OR EXISTS (SELECT 1 FROM technician_certifications c
+                                  WHERE c.technician_id = t.id AND c.certification LIKE ? ESCAPE '\\')
+                    ORDER BY performance_score DESC
+                    LIMIT ?
+                """, [pattern] * 4 + [limit or -1])
+            return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Error searching technicians for '{q}': {e}")
+            return []
+    
+    def _add_notification(self, cursor, kind, message, created_at=None):
+        """Inserts a notification in the caller's transaction, pruning the ring buffer every so often."""
+        created_at = (created_at or datetime.now()).strftime(NOTIFICATION_TIME_FORMAT)
+        cursor.execute("INSERT INTO notifications (type, message, created_at) VALUES (?, ?, ?)",
+                       (kind, message, created_at))
+        if cursor.lastrowid % NOTIFICATION_PRUNE_EVERY == 0:
+            self._prune_notifications(cursor, **NOTIFICATION_RETENTION)
+    
+    @staticmethod
+    def _prune_notifications(cursor, max_rows, max_age_days):
+        """Deletes notifications beyond the newest max_rows or older than max_age_days."""
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).strftime(NOTIFICATION_TIME_FORMAT)
+        cursor.execute("""
+            DELETE FROM notifications
+            WHERE created_at < ?
+               OR id IN (SELECT id FROM notifications ORDER BY created_at DESC, id DESC LIMIT -1 OFFSET ?)
+        """, (cutoff, max_rows))
+        return cursor.rowcount
+    
+    def notify(self, kind, message):
+        """Records a notification ('info', 'warning' or 'success') visible to every admin session."""
+        try:
+            with self.pool.writer() as conn:
+                self._add_notification(conn.cursor(), kind, message)
+            self._bump_versions('notifications')
+        except sqlite3.Error as e:
+            logger.error(f"Error adding notification: {e}")
+            if self.in_transaction():
+                raise
+    
+    @cached_read('notifications')
+    def get_notifications(self, limit=3, unread_only=True):
+        """Returns the newest `limit` notifications, newest first, read off the created_at index."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"""
+                SELECT id, type, message, created_at, is_read FROM notifications
+                {'WHERE is_read = 0' if unread_only else ''}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            """, (limit,))
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Error getting notifications: {e}")
+            self._mark_read_failed()
+            return []
+    
+    @cached_read('notifications')
+    def unread_notification_count(self):
+        """Number of unread notifications."""
+        try:
+            return self.conn.execute("SELECT COUNT(*) FROM notifications WHERE is_read = 0").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error counting notifications: {e}")
+            self._mark_read_failed()
+            return 0
+    
+    def mark_notifications_read(self, ids=None):
+        """Marks the given notifications, or all unread ones, as read for every session."""
+        try:
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                if ids is None:
+                    cursor.execute("UPDATE notifications SET is_read = 1 WHERE is_read = 0")
+                else:
+                    cursor.executemany("UPDATE notifications SET is_read = 1 WHERE id = ?", [(i,) for i in ids])
+            self._bump_versions('notifications')
+        except sqlite3.Error as e:
+            logger.error(f"Error marking notifications read: {e}")
+            st.error(f"🚨 Failed to clear notifications: {e}")
+    
+    def prune_notifications(self, max_rows=NOTIFICATION_RETENTION['max_rows'],
+                            max_age_days=NOTIFICATION_RETENTION['max_age_days']):
+        """Applies the notification retention policy now; returns the number of rows removed."""
+        try:
+            with self.pool.writer() as conn:
+                removed = self._prune_notifications(conn.cursor(), max_rows, max_age_days)
+            self._bump_versions('notifications')
+            logger.info(f"Pruned {removed} notification(s)")
+            return removed
+        except sqlite3.Error as e:
+            logger.error(f"Error pruning notifications: {e}")
+            st.error(f"🚨 Failed to prune notifications: {e}")
+            return 0
+    
+    def _write_technician_version(self, cursor, tech_id, expected_version, updates=None):
+        """
+        Applies updates to a technician and increments its version. With expected_version set,
+        the write only happens if the row is still at that version; otherwise StaleWriteError.
+        """
+        updates = updates or {}
+        assignments = [f"{column} = ?" for column in updates] + ["version = version + 1"]
+        cursor.execute(
+            f"UPDATE technicians SET {', '.join(assignments)} WHERE id = ? AND (? IS NULL OR version = ?)",
+            list(updates.values()) + [tech_id, expected_version, expected_version]
+        )
+        if cursor.rowcount == 0:
+            self._raise_technician_miss(cursor, tech_id, expected_version)
+    
+    def _raise_technician_miss(self, cursor, tech_id, expected_version):
+        """Explains why a versioned technician write matched no row."""
+        row = cursor.execute("SELECT version FROM technicians WHERE id = ?", (tech_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Technician ID {tech_id} not found")
+        # Cached reads still show the old version (the write may have come from another process)
+        self._bump_versions('technicians', deferred=False)
+        raise StaleWriteError(
+            f"Technician #{tech_id} was changed by someone else (now version {row[0]}, "
+            f"your edit was based on version {expected_version}). Reload and try again."
+        )
+    
+    def approve_technician(self, tech_id, expected_version=None):
+        """Approves a technician by setting status to Active."""
+        try:
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                self._write_technician_version(cursor, tech_id, expected_version, {'status': 'Active'})
+                self._add_notification(cursor, "success", f"Technician #{tech_id} approved successfully")
+            self._bump_versions('technicians', 'notifications')
             logger.info(f"Approved technician ID: {tech_id}")
-            st.session_state.notifications.append({
-                "type": "success", 
-                "message": f"Technician #{tech_id} approved successfully", 
-                "time": "Just now"
-            })
         except (sqlite3.Error, ValueError) as e:
             logger.error(f"Error approving technician {tech_id}: {e}")
+            if self.in_transaction():
+                raise
             st.error(f"🚨 Failed to approve technician: {e}")
     
-    def update_technician(self, tech_id, updates):
-        """Updates technician details."""
+    def update_technician(self, tech_id, updates, expected_version=None):
+        """
+        Updates technician details; skills and certifications are written to their join tables.
+        Only TECHNICIAN_EDITABLE_COLUMNS are accepted. Pass the version the edit started from as
+        expected_version to get StaleWriteError rather than overwrite a concurrent change.
+        """
         try:
-            cursor = self.conn.cursor()
-            set_clause = ', '.join([f"{k} = ?" for k in updates.keys()])
-            values = list(updates.values()) + [tech_id]
-            cursor.execute(f"UPDATE technicians SET {set_clause} WHERE id = ?", values)
-            if cursor.rowcount == 0:
-                raise ValueError(f"Technician ID {tech_id} not found")
-            self.conn.commit()
+            updates = dict(updates)
+            unknown = set(updates) - TECHNICIAN_EDITABLE_COLUMNS
+            if unknown:
+                raise ValueError(f"Cannot update technician field(s): {', '.join(sorted(unknown))}")
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                tags = {key: updates.pop(key) for key in TECHNICIAN_TAG_TABLES if key in updates}
+                self._write_technician_version(cursor, tech_id, expected_version, updates)
+                for key, values in tags.items():
+                    self._set_technician_tags(cursor, key, tech_id, values)
+            self._bump_versions('technicians')
             logger.info(f"Updated technician ID: {tech_id}")
         except (sqlite3.Error, ValueError) as e:
             logger.error(f"Error updating technician {tech_id}: {e}")
+            if self.in_transaction():
+                raise
             st.error(f"🚨 Failed to update technician: {e}")
     
-    def delete_technician(self, tech_id):
+    def delete_technician(self, tech_id, expected_version=None):
         """Deletes a technician from the database."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM technicians WHERE id = ?", (tech_id,))
-            if cursor.rowcount == 0:
-                raise ValueError(f"Technician ID {tech_id} not found")
-            self.conn.commit()
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM technicians WHERE id = ? AND (? IS NULL OR version = ?)",
+                               (tech_id, expected_version, expected_version))
+                if cursor.rowcount == 0:
+                    self._raise_technician_miss(cursor, tech_id, expected_version)
+                self._add_notification(cursor, "warning", f"Technician #{tech_id} removed from system")
+            self._bump_versions('technicians', 'notifications')
             logger.info(f"Deleted technician ID: {tech_id}")
-            st.session_state.notifications.append({
-                "type": "warning", 
-                "message": f"Technician #{tech_id} removed from system", 
-                "time": "Just now"
-            })
         except (sqlite3.Error, ValueError) as e:
             logger.error(f"Error deleting technician {tech_id}: {e}")
+            if self.in_transaction():
+                raise
             st.error(f"🚨 Failed to delete technician: {e}")
     
+    @cached_read('service_requests', 'technicians')
     def get_service_requests(self):
         """Retrieves all service requests with joined technician data."""
         try:
@@ -745,21 +2408,203 @@ class ProfessionalDBManager:
             return [dict(zip(columns, row)) for row in data]
         except sqlite3.Error as e:
             logger.error(f"Error getting service requests: {e}")
+            self._mark_read_failed()
+            return []
+    
+    def search_requests(self, q, limit=None):
+        """Returns service request ids matching q in client, description or technician name, best match first."""
+        try:
+            cursor = self.conn.cursor()
+            if self.fts_enabled:
+                match = self._fts_query(q)
+                if not match:
+                    return []
+                cursor.execute(
+                    "SELECT rowid FROM requests_fts WHERE requests_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (match, limit or -1)
+                )
+            else:
+                pattern = self._like_pattern(q)
+                cursor.execute("""
+                    SELECT sr.id FROM service_requests sr
+                    LEFT JOIN technicians t ON sr.assigned_tech_id = t.id
+                    WHERE sr.client_name LIKE ? ESCAPE '\\' OR sr.description LIKE ? ESCAPE '\\'
+                       OR t.name LIKE ? ESCAPE '\\'
+                    ORDER BY sr.created_date DESC
+                    LIMIT ?
+                """, [pattern] * 3 + [limit or -1])
+            return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Error searching service requests for '{q}': {e}")
             return []
     
+    @cached_read('service_requests', 'technicians')
+    def query_service_requests(self, status=None, priority=None, search=None, date_range=None,
+                               sort='Newest', limit=50, offset=0):
+        """
+        Retrieves one page of service requests with filters pushed into parameterized SQL.
+        date_range is a (start, end) pair of datetimes, either of which may be None.
+        A limit of None returns every matching row.
+        """
+        where_clause, params, search_join = self._service_request_filters(status, priority, search, date_range)
+        order_by = SERVICE_REQUEST_SORTS.get(sort, SERVICE_REQUEST_SORTS['Newest'])
+        
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"""
+                SELECT COUNT(*),
+                       SUM(CASE WHEN sr.status = 'Completed' THEN sr.revenue END),
+                       AVG(sr.client_rating),
+                       SUM(sr.status = 'Pending'),
+                       SUM(sr.priority = 'Critical')
+                FROM service_requests sr
+                {"LEFT JOIN technicians t ON sr.assigned_tech_id = t.id" if search_join else ""}
+                {where_clause}
+            """, params)
+            total, completed_revenue, avg_rating, pending, critical = cursor.fetchone()
+            
+            page_params = list(params)
+            limit_clause = ""
+            if limit:
+                limit_clause = "LIMIT ? OFFSET ?"
+                page_params.extend([limit, offset])
+            cursor.execute(f"""
+                SELECT sr.id, sr.client_name, sr.description, sr.status, sr.priority, t.name as tech_name,
+                       sr.revenue, sr.client_rating, sr.created_date, t.specialty as tech_specialty
+                FROM service_requests sr
+                LEFT JOIN technicians t ON sr.assigned_tech_id = t.id
+                {where_clause}
+                ORDER BY {order_by}
+                {limit_clause}
+            """, page_params)
+            return ServiceRequestPage(
+                frame=self._frame_from_cursor(cursor, SERVICE_REQUEST_FRAME_DTYPES),
+                total=total,
+                limit=limit,
+                offset=offset,
+                completed_revenue=completed_revenue or 0,
+                avg_client_rating=avg_rating,
+                pending_count=pending or 0,
+                critical_count=critical or 0
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Error querying service requests: {e}")
+            self._mark_read_failed()
+            return ServiceRequestPage(limit=limit, offset=offset)
+    
+    def _service_request_filters(self, status=None, priority=None, search=None, date_range=None):
+        """
+        Builds the WHERE clause shared by query_service_requests and export_service_requests.
+        Returns (where_clause, params, search_join); search_join is True when the clause
+        references the technicians alias t.
+        """
+        where = []
+        params = []
+        if status:
+            where.append("sr.status = ?")
+            params.append(status)
+        if priority:
+            where.append("sr.priority = ?")
+            params.append(priority)
+        if date_range:
+            start, end = date_range
+            if start:
+                where.append("sr.created_date >= ?")
+                params.append(start.strftime(DB_DATETIME_FORMAT))
+            if end:
+                where.append("sr.created_date < ?")
+                params.append(end.strftime(DB_DATETIME_FORMAT))
+        # Search goes through the FTS index when available, which needs no technicians join
+        search_join = False
+        if search and self.fts_enabled:
+            where.append("sr.id IN (SELECT rowid FROM requests_fts WHERE requests_fts MATCH ?)")
+            params.append(self._fts_query(search) or '""')
+        elif search:
+            pattern = self._like_pattern(search)
+            where.append("(sr.client_name LIKE ? ESCAPE '\\' OR sr.description LIKE ? ESCAPE '\\' OR t.name LIKE ? ESCAPE '\\')")
+            params.extend([pattern] * 3)
+            search_join = True
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ""
+        return where_clause, params, search_join
+    
+    def export_service_requests(self, status=None, priority=None, search=None, date_range=None, sort='Newest'):
+        """Streams every service request matching the filters, in sort order, as DataFrame chunks."""
+        where_clause, params, _ = self._service_request_filters(status, priority, search, date_range)
+        order_by = SERVICE_REQUEST_SORTS.get(sort, SERVICE_REQUEST_SORTS['Newest'])
+        return self.iter_query_frames(f"""
+            SELECT sr.id, sr.client_name, sr.description, sr.status, sr.priority, t.name as tech_name,
+                   sr.revenue, sr.client_rating, sr.created_date, t.specialty as tech_specialty
+            FROM service_requests sr
+            LEFT JOIN technicians t ON sr.assigned_tech_id = t.id
+            {where_clause}
+            ORDER BY {order_by}
+        """, params, SERVICE_REQUEST_FRAME_DTYPES)
+    
+    @cached_read('service_requests', 'technicians')
+    def get_service_requests_frame(self):
+        """Retrieves all service requests with joined technician data as a typed DataFrame."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT sr.id, sr.client_name, sr.description, sr.status, sr.priority, t.name as tech_name, sr.revenue, sr.created_date, t.specialty as tech_specialty
+                FROM service_requests sr 
+                LEFT JOIN technicians t ON sr.assigned_tech_id = t.id
+                ORDER BY sr.created_date DESC
+            """)
+            return self._frame_from_cursor(cursor, SERVICE_REQUEST_FRAME_DTYPES)
+        except sqlite3.Error as e:
+            logger.error(f"Error getting service requests frame: {e}")
+            self._mark_read_failed()
+            return pd.DataFrame()
+    
     def update_request_status(self, req_id, new_status):
         """Updates the status of a service request."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("UPDATE service_requests SET status = ? WHERE id = ?", (new_status, req_id))
-            if cursor.rowcount == 0:
-                raise ValueError(f"Request ID {req_id} not found")
-            self.conn.commit()
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE service_requests SET status = ? WHERE id = ?", (new_status, req_id))
+                if cursor.rowcount == 0:
+                    raise ValueError(f"Request ID {req_id} not found")
+            self._bump_versions('service_requests')
             logger.info(f"Updated request ID: {req_id} to status: {new_status}")
         except (sqlite3.Error, ValueError) as e:
             logger.error(f"Error updating request {req_id}: {e}")
+            if self.in_transaction():
+                raise
             st.error(f"🚨 Failed to update request: {e}")
     
+    def update_request_status_bulk(self, ids, new_status, assigned_tech_id=None):
+        """
+        Sets the status of many service requests, and optionally reassigns them, in a single
+        transaction with one executemany. Returns the number of requests updated.
+        """
+        ids = list(dict.fromkeys(int(req_id) for req_id in ids))
+        if not ids:
+            return 0
+        if assigned_tech_id is None:
+            sql = "UPDATE service_requests SET status = ? WHERE id = ?"
+            rows = [(new_status, req_id) for req_id in ids]
+        else:
+            sql = "UPDATE service_requests SET status = ?, assigned_tech_id = ? WHERE id = ?"
+            rows = [(new_status, assigned_tech_id, req_id) for req_id in ids]
+        try:
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(sql, rows)
+                updated = cursor.rowcount
+            self._bump_versions('service_requests')
+            if updated < len(ids):
+                logger.warning(f"Bulk request update skipped {len(ids) - updated} unknown IDs")
+            logger.info(f"Updated {updated} requests to status: {new_status}")
+            return updated
+        except sqlite3.Error as e:
+            logger.error(f"Error bulk updating {len(ids)} requests: {e}")
+            if self.in_transaction():
+                raise
+            st.error(f"🚨 Failed to update requests: {e}")
+            return 0
+    
+    @cached_read('support_tickets')
     def get_support_tickets(self):
         """Retrieves all support tickets."""
         try:
@@ -770,34 +2615,116 @@ class ProfessionalDBManager:
             return [dict(zip(columns, row)) for row in data]
         except sqlite3.Error as e:
             logger.error(f"Error getting support tickets: {e}")
+            self._mark_read_failed()
             return []
     
+    @cached_read('support_tickets')
+    def get_support_tickets_frame(self):
+        """Retrieves all support tickets as a typed DataFrame."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT * FROM support_tickets ORDER BY created_date DESC")
+            return self._frame_from_cursor(cursor, SUPPORT_TICKET_FRAME_DTYPES)
+        except sqlite3.Error as e:
+            logger.error(f"Error getting support tickets frame: {e}")
+            self._mark_read_failed()
+            return pd.DataFrame()
+    
+    def export_support_tickets(self, status=None, priority=None):
+        """Streams every support ticket matching the filters, newest first, as DataFrame chunks."""
+        where = []
+        params = []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if priority:
+            where.append("priority = ?")
+            params.append(priority)
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ""
+        return self.iter_query_frames(f"""
+            SELECT * FROM support_tickets {where_clause} ORDER BY created_date DESC
+        """, params, SUPPORT_TICKET_FRAME_DTYPES)
+    
     def update_ticket_status(self, ticket_id, new_status):
         """Updates the status of a support ticket."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("UPDATE support_tickets SET status = ? WHERE id = ?", (new_status, ticket_id))
-            if cursor.rowcount == 0:
-                raise ValueError(f"Ticket ID {ticket_id} not found")
-            self.conn.commit()
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE support_tickets SET status = ? WHERE id = ?", (new_status, ticket_id))
+                if cursor.rowcount == 0:
+                    raise ValueError(f"Ticket ID {ticket_id} not found")
+            self._bump_versions('support_tickets')
             logger.info(f"Updated ticket ID: {ticket_id} to status: {new_status}")
         except (sqlite3.Error, ValueError) as e:
             logger.error(f"Error updating ticket {ticket_id}: {e}")
+            if self.in_transaction():
+                raise
             st.error(f"🚨 Failed to update ticket: {e}")
     
-    def get_performance_data(self):
-        """Returns performance data for charts."""
-        # This can be expanded to query from analytics table
-        months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        base_revenue = [45000, 52000, 48000, 65000, 72000, 68000, 75000, 82000, 78000, 85000, 92000, 98000]
-        return {
-            'months': months,
-            'revenue': [r + random.randint(-5000, 5000) for r in base_revenue],
-            'requests': [320, 380, 350, 420, 480, 450, 500, 550, 520, 580, 600, 650],
-            'satisfaction': [94, 95, 93, 96, 97, 95, 98, 96, 97, 98, 96, 97],
-            'new_clients': [45, 52, 48, 65, 72, 68, 75, 82, 78, 85, 92, 98]
+    def update_ticket_status_bulk(self, ids, new_status):
+        """Sets the status of many support tickets in a single transaction; returns the number updated."""
+        ids = list(dict.fromkeys(int(ticket_id) for ticket_id in ids))
+        if not ids:
+            return 0
+        try:
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                cursor.executemany("UPDATE support_tickets SET status = ? WHERE id = ?",
+                                   [(new_status, ticket_id) for ticket_id in ids])
+                updated = cursor.rowcount
+            self._bump_versions('support_tickets')
+            if updated < len(ids):
+                logger.warning(f"Bulk ticket update skipped {len(ids) - updated} unknown IDs")
+            logger.info(f"Updated {updated} tickets to status: {new_status}")
+            return updated
+        except sqlite3.Error as e:
+            logger.error(f"Error bulk updating {len(ids)} tickets: {e}")
+            if self.in_transaction():
+                raise
+            st.error(f"🚨 Failed to update tickets: {e}")
+            return 0
+    
+    @cached_read('service_requests')
+    def get_performance_data(self, granularity='monthly', periods=12, today=None):
+        """
+        Returns the last `periods` monthly or weekly points of the persisted analytics series
+        (revenue, requests, satisfaction, new_clients). Periods without requests read as zero.
+        """
+        label_format = ANALYTICS_SERIES[granularity]
+        today = today or datetime.now()
+        start, _ = self._period_bounds(granularity, datetime(today.year, today.month, today.day))
+        starts = [start]
+        for _ in range(periods - 1):
+            starts.insert(0, self._period_bounds(granularity, starts[0] - timedelta(days=1))[0])
+        keys = [day.strftime('%Y-%m-%d') for day in starts]
+        metrics = ('revenue', 'requests', 'satisfaction', 'new_clients')
+        data = {
+            'periods': [day.strftime(label_format) for day in starts],
+            'revenue': [0.0] * periods,
+            'requests': [0] * periods,
+            'satisfaction': [None] * periods,
+            'new_clients': [0] * periods
         }
+        try:
+            self.refresh_rollups()
+            cursor = self.conn.cursor()
+            # Naming the metrics lets idx_analytics_series (category, metric_name, recorded_date)
+            # apply the date range too, instead of reading every row of the category
+            cursor.execute(f"""
+                SELECT metric_name, metric_value, recorded_date FROM analytics
+                WHERE category = ? AND metric_name IN ({', '.join('?' * len(metrics))})
+                  AND recorded_date >= ? AND recorded_date <= ?
+            """, (granularity, *metrics, keys[0], keys[-1]))
+            position = {key: i for i, key in enumerate(keys)}
+            for metric, value, recorded_date in cursor.fetchall():
+                if metric in metrics and recorded_date in position and value is not None:
+                    data[metric][position[recorded_date]] = value if metric in ('revenue', 'satisfaction') else int(value)
+        except sqlite3.Error as e:
+            logger.error(f"Error getting performance data: {e}")
+            self._mark_read_failed()
+        return data
     
+    @cached_read('technicians', 'service_requests')
     def get_analytics_data(self):
         """Retrieves analytics data for reports."""
         try:
@@ -813,33 +2740,35 @@ class ProfessionalDBManager:
             """)
             top_techs = cursor.fetchall()
             
-            # Request distribution
+            # Request distribution and request KPIs come from the daily rollup,
+            # whose size grows with days rather than with requests
+            self.refresh_rollups()
             cursor.execute("""
-                SELECT status, COUNT(*) as count 
-                FROM service_requests 
+                SELECT status, SUM(request_count), SUM(rating_sum), SUM(rating_count),
+                       SUM(hours_sum), SUM(hours_count)
+                FROM request_daily_rollup
                 GROUP BY status
+                HAVING SUM(request_count) > 0
             """)
-            request_dist = cursor.fetchall()
-            
-            # Additional KPIs from data
-            cursor.execute("SELECT AVG(rating) FROM technicians WHERE status = 'Active'")
-            avg_tech_rating = cursor.fetchone()[0] or 0
+            rollup = cursor.fetchall()
+            request_dist = [(status, count) for status, count, *_ in rollup]
+            rating_sum = sum(row[2] for row in rollup)
+            rating_count = sum(row[3] for row in rollup)
+            hours_sum = sum(row[4] for row in rollup)
+            hours_count = sum(row[5] for row in rollup)
+            avg_client_satisfaction = rating_sum / rating_count if rating_count else 0
+            avg_resolution_time = hours_sum / hours_count if hours_count else 0
             
-            cursor.execute("SELECT AVG(client_rating) FROM service_requests WHERE client_rating IS NOT NULL")
-            avg_client_satisfaction = cursor.fetchone()[0] or 0
-            
-            # Improved repeat business calculation: clients with >1 completed request
             cursor.execute("""
-                SELECT client_name, COUNT(*) as count 
-                FROM service_requests 
-                WHERE status = 'Completed' 
-                GROUP BY client_name 
-                HAVING count > 1
+                SELECT rating_sum, rating_count FROM kpi_counters
+                WHERE scope = 'technicians' AND status = 'Active'
             """)
-            repeat_clients = len(cursor.fetchall())
+            row = cursor.fetchone()
+            avg_tech_rating = row[0] / row[1] if row and row[1] else 0
             
-            cursor.execute("SELECT AVG(actual_hours) FROM service_requests WHERE actual_hours IS NOT NULL")
-            avg_resolution_time = cursor.fetchone()[0] or 0
+            # Clients with more than one completed request
+            cursor.execute("SELECT COUNT(*) FROM client_rollup WHERE completed_count > 1")
+            repeat_clients = cursor.fetchone()[0]
             
             kpis = [
                 {"name": "Average Technician Rating", "value": f"{avg_tech_rating:.2f}/5", "target": "4.5/5"},
@@ -855,16 +2784,78 @@ class ProfessionalDBManager:
             }
         except sqlite3.Error as e:
             logger.error(f"Error getting analytics data: {e}")
+            self._mark_read_failed()
             return {
                 'tech_performance': pd.DataFrame(),
                 'request_distribution': pd.DataFrame(),
                 'kpis': []
             }
     
+    @cached_read('service_requests')
+    def get_revenue_insights(self, today=None):
+        """
+        Completed revenue for the current month, quarter and year to date, each compared with
+        the same span one period earlier, plus a straight-line annual projection. Reads day
+        ranges of request_daily_rollup, so the cost is independent of the number of requests.
+        """
+        def shift_months(day, months):
+            year, month = divmod(day.year * 12 + day.month - 1 - months, 12)
+            # Clamp to the last day of the target month (e.g. Mar 31 -> Feb 28)
+            return day.replace(year=year, month=month + 1, day=min(day.day, calendar.monthrange(year, month + 1)[1]))
+        
+        def revenue_between(start, end):
+            cursor.execute("""
+                SELECT COALESCE(SUM(revenue_sum), 0) FROM request_daily_rollup
+                WHERE day >= ? AND day <= ? AND status = 'Completed'
+            """, (start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')))
+            return cursor.fetchone()[0]
+        
+        def growth(current, previous):
+            return f"{(current - previous) / previous * 100:+.0f}%" if previous else "N/A"
+        
+        try:
+            self.refresh_rollups()
+            cursor = self.conn.cursor()
+            today = today or datetime.now()
+            today = datetime(today.year, today.month, today.day)
+            month_start = today.replace(day=1)
+            quarter_start = today.replace(month=(today.month - 1) // 3 * 3 + 1, day=1)
+            year_start = today.replace(month=1, day=1)
+            
+            insights = []
+            for period, start, months_back in (("Current Month", month_start, 1),
+                                               ("Quarter-to-Date", quarter_start, 3),
+                                               ("Year-to-Date", year_start, 12)):
+                current = revenue_between(start, today)
+                previous = revenue_between(shift_months(start, months_back), shift_months(today, months_back))
+                insights.append({"period": period, "revenue": f"${current:,.0f}", "growth": growth(current, previous)})
+            
+            # Project the year-to-date run rate over the whole year and compare with last year's total
+            year_to_date = revenue_between(year_start, today)
+            year_days = (year_start.replace(year=today.year + 1) - year_start).days
+            projected = year_to_date / ((today - year_start).days + 1) * year_days
+            last_year = revenue_between(year_start.replace(year=today.year - 1), year_start - timedelta(days=1))
+            insights.append({"period": "Projected Annual", "revenue": f"${projected:,.0f}", "growth": growth(projected, last_year)})
+            return insights
+        except sqlite3.Error as e:
+            logger.error(f"Error getting revenue insights: {e}")
+            self._mark_read_failed()
+            return []
+    
+    def pool_stats(self):
+        """Returns connection pool utilization for monitoring."""
+        return self.pool.stats() if self.pool else {}
+    
+    def release_connection(self):
+        """Returns the calling thread's reader connection to the pool at the end of a script run."""
+        if self.pool:
+            self.pool.release()
+    
     def close(self):
-        """Closes the database connection."""
-        if self.conn:
-            self.conn.close()
+        """Closes every pooled database connection."""
+        if self.pool:
+            self.pool.close()
+            self.pool = None
             logger.info("Database connection closed.")
 
 # Use Streamlit cache for DB manager to optimize performance
@@ -872,43 +2863,541 @@ class ProfessionalDBManager:
 def get_db_manager():
     return ProfessionalDBManager()
 
+# Weights used by the synthetic data generator, roughly matching production skew
+SYNTHETIC_WEIGHTS = {
+    ('technicians', 'status'): {'Active': 75, 'Pending': 15, 'Inactive': 10},
+    ('service_requests', 'status'): {'Completed': 55, 'Pending': 20, 'In Progress': 15, 'Cancelled': 10},
+    ('service_requests', 'priority'): {'Medium': 45, 'Low': 25, 'High': 22, 'Critical': 8},
+    ('support_tickets', 'status'): {'Closed': 45, 'Resolved': 25, 'Open': 18, 'In Progress': 12},
+    ('support_tickets', 'priority'): {'Medium': 40, 'Low': 30, 'High': 22, 'Critical': 8}
+}
+SYNTHETIC_SPECIALTIES = ['Hardware Repair', 'Software Development', 'Network Security', 'Data Recovery', 'Mobile Services', 'Cloud Infrastructure']
+SYNTHETIC_LOCATIONS = ['Cairo HQ', 'Alexandria Branch', 'Giza Center', 'Luxor Office', 'Aswan Station']
+SYNTHETIC_SKILLS = ['Python', 'Java', 'Networking', 'Security', 'Database', 'Cloud', 'AI/ML', 'DevOps']
+SYNTHETIC_CERTIFICATIONS = ['AWS Certified', 'Cisco CCNA', 'Microsoft MVP', 'Google Cloud', 'Security+']
+SYNTHETIC_TICKET_CATEGORIES = ['Billing', 'Technical', 'Scheduling', 'Account', 'Quality']
+# Technicians synthetic service requests are assigned across unless a count is given
+SYNTHETIC_TECHNICIANS = 25
+# Synthetic technicians get addresses on their own domain, so generating into a database with real
+# technicians never matches (and upserts over) them; requests refer to them by this address
+SYNTHETIC_EMAIL_DOMAIN = 'synthetic.techpro.test'
+
+def synthetic_technician_email(number):
+    """Email of the number-th synthetic technician (1-based)."""
+    return f'tech.{number}@{SYNTHETIC_EMAIL_DOMAIN}'
+
+def _weighted_choice(rng, key):
+    weights = SYNTHETIC_WEIGHTS[key]
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+def _synthetic_timestamp(rng, now, history_days):
+    """Exponentially skewed towards recent days, during business hours."""
+    days_ago = min(int(rng.expovariate(3.0 / history_days)), history_days - 1)
+    moment = (now - timedelta(days=days_ago)).replace(hour=rng.choice(range(8, 20)), minute=rng.randint(0, 59))
+    return moment.strftime(DB_DATETIME_FORMAT)
+
+def _zipf_index(rng, size, skew=1.2):
+    """1-based index where low numbers are much more likely, e.g. busy technicians and repeat clients."""
+    return min(int(rng.paretovariate(skew)), size)
+
+def synthetic_technicians(count, seed=None):
+    """Yields (line, record) pairs of synthetic technicians with skewed status and location."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    for line in range(1, count + 1):
+        yield line, {
+            'name': f'Technician {line}',
+            'email': synthetic_technician_email(line),
+            'phone': f'+20 1{rng.randint(0, 9)}{rng.randint(0, 9)} {rng.randint(100, 999)} {rng.randint(1000, 9999)}',
+            'specialty': rng.choice(SYNTHETIC_SPECIALTIES),
+            'location': SYNTHETIC_LOCATIONS[_zipf_index(rng, len(SYNTHETIC_LOCATIONS)) - 1],
+            'rating': round(min(5.0, rng.gauss(4.5, 0.3)), 1),
+            'completed_jobs': int(rng.paretovariate(1.5) * 20),
+            'hourly_rate': rng.randint(120, 600),
+            'status': _weighted_choice(rng, ('technicians', 'status')),
+            'join_date': (now - timedelta(days=rng.randint(30, 5 * 365))).strftime('%Y-%m-%d'),
+            'experience': f'{rng.randint(1, 15)} years',
+            'performance_score': rng.randint(60, 99),
+            'last_active': (now - timedelta(hours=rng.randint(0, 24 * 14))).strftime(DB_DATETIME_FORMAT),
+            'skills': rng.sample(SYNTHETIC_SKILLS, rng.randint(2, 5)),
+            'certifications': rng.sample(SYNTHETIC_CERTIFICATIONS, rng.randint(0, 3))
+        }
+
+def synthetic_service_requests(rows, technicians=SYNTHETIC_TECHNICIANS, seed=None, history_days=3 * 365):
+    """
+    Yields (line, record) pairs of service requests with skewed status/priority, dates weighted
+    towards recent weeks, a few technicians carrying most of the work and many repeat clients.
+    Requests are assigned by email to the first `technicians` synthetic technicians, whatever ids
+    those have in the target database.
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    clients = max(rows // 4, 1)
+    for line in range(1, rows + 1):
+        status = _weighted_choice(rng, ('service_requests', 'status'))
+        done = status == 'Completed'
+        yield line, {
+            'client_name': f'Client {_zipf_index(rng, clients, 1.05)}',
+            'description': f'{rng.choice(SYNTHETIC_SPECIALTIES)} request #{line} for system maintenance',
+            'status': status,
+            'assigned_tech_email': (synthetic_technician_email(_zipf_index(rng, technicians, 0.8))
+                                    if status != 'Pending' or rng.random() < 0.3 else None),
+            'created_date': _synthetic_timestamp(rng, now, history_days),
+            'priority': _weighted_choice(rng, ('service_requests', 'priority')),
+            'estimated_hours': rng.randint(1, 8),
+            'actual_hours': rng.randint(1, 12) if done else None,
+            'client_rating': rng.choices([5, 4, 3, 2, 1], weights=[50, 30, 12, 5, 3])[0] if done and rng.random() < 0.7 else None,
+            'revenue': round(rng.lognormvariate(7, 0.6), 2)
+        }
+
+def synthetic_support_tickets(rows, seed=None, history_days=3 * 365):
+    """Yields (line, record) pairs of support tickets with skewed status, priority and dates."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    clients = max(rows // 3, 1)
+    for line in range(1, rows + 1):
+        status = _weighted_choice(rng, ('support_tickets', 'status'))
+        closed = status in ('Closed', 'Resolved')
+        yield line, {
+            'client_name': f'Client {_zipf_index(rng, clients, 1.05)}',
+            'issue': f'{rng.choice(SYNTHETIC_TICKET_CATEGORIES)} issue reported in ticket #{line}',
+            'status': status,
+            'created_date': _synthetic_timestamp(rng, now, history_days),
+            'priority': _weighted_choice(rng, ('support_tickets', 'priority')),
+            'category': rng.choice(SYNTHETIC_TICKET_CATEGORIES),
+            'resolution_time': rng.randint(1, 72) if closed else None,
+            'satisfaction_score': rng.randint(1, 5) if closed else None
+        }
+
+def generate_synthetic_data(manager, technicians, requests, tickets, seed=None, progress=None):
+    """Bulk-loads a synthetic dataset of the given size; returns the ImportReport of each table."""
+    return [
+        manager.bulk_import('technicians', synthetic_technicians(technicians, seed), progress=progress),
+        manager.bulk_import('service_requests', synthetic_service_requests(requests, technicians, seed), progress=progress),
+        manager.bulk_import('support_tickets', synthetic_support_tickets(tickets, seed), progress=progress)
+    ]
+
+# Read paths timed by run_benchmarks: label -> (method, args, kwargs)
+BENCHMARK_READS = {
+    'get_dashboard_stats': ('get_dashboard_stats', (), {}),
+    'get_technicians_data': ('get_technicians_data', (), {}),
+    'get_technicians_frame': ('get_technicians_frame', (), {}),
+    'distinct_locations': ('distinct_locations', (), {}),
+    'distinct_specialties': ('distinct_specialties', (), {}),
+    'get_skill_catalog': ('get_skill_catalog', (), {}),
+    'find_technicians_by_skills': ('find_technicians_by_skills', (['Python', 'Cloud'],), {}),
+    'search_technicians': ('search_technicians', ('Python',), {}),
+    'get_service_requests': ('get_service_requests', (), {}),
+    'get_service_requests_frame': ('get_service_requests_frame', (), {}),
+    'search_requests': ('search_requests', ('maintenance',), {'limit': 50}),
+    'query_service_requests': ('query_service_requests', (), {}),
+    'query_service_requests[filtered]': ('query_service_requests', (), {'status': 'Completed', 'priority': 'High', 'sort': 'Highest Revenue'}),
+    'query_service_requests[search]': ('query_service_requests', (), {'search': 'network'}),
+    'query_service_requests[last page]': ('query_service_requests', (), {'offset': 'last'}),
+    'get_support_tickets': ('get_support_tickets', (), {}),
+    'get_support_tickets_frame': ('get_support_tickets_frame', (), {}),
+    'get_analytics_data': ('get_analytics_data', (), {}),
+    'get_revenue_insights': ('get_revenue_insights', (), {}),
+    'get_performance_data[monthly]': ('get_performance_data', ('monthly', 12), {}),
+    'get_performance_data[weekly]': ('get_performance_data', ('weekly', 12), {}),
+    'get_activity_since': ('get_activity_since', (0,), {}),
+    'get_activity_since[tickets]': ('get_activity_since', (0, ['ticket']), {})
+}
+
+# Reads each dashboard page issues on a rerun, in order
+BENCHMARK_PAGES = {
+    'Dashboard': ['get_dashboard_stats', 'get_performance_data[monthly]', 'get_activity_since'],
+    'Team Management': ['distinct_locations', 'distinct_specialties', 'get_skill_catalog', 'get_technicians_frame'],
+    'Service Requests': ['query_service_requests'],
+    'Support Tickets': ['get_support_tickets_frame'],
+    'Analytics': ['get_analytics_data', 'get_performance_data[monthly]'],
+    'Revenue': ['get_performance_data[monthly]', 'get_revenue_insights']
+}
+
+def _benchmark_call(manager, label):
+    """Runs one BENCHMARK_READS entry with the result cache bypassed; returns elapsed milliseconds."""
+    name, args, kwargs = BENCHMARK_READS[label]
+    method = getattr(type(manager), name)
+    method = getattr(method, '__wrapped__', method)
+    if kwargs.get('offset') == 'last':
+        total = method(manager).total
+        kwargs = dict(kwargs, offset=max(total - 50, 0))
+    started = time.perf_counter()
+    method(manager, *args, **kwargs)
+    return (time.perf_counter() - started) * 1000
+
+def run_benchmarks(scales=(1000, 100000, 1000000), repeat=5, seed=42, progress=None):
+    """
+    Generates a scratch database per scale (scale service requests, scale // 2 tickets and
+    scale // 200 technicians, at least 25) and times every BENCHMARK_READS entry and every
+    BENCHMARK_PAGES data path. Returns a JSON-serializable report with per-read timings in ms.
+    """
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'sqlite_version': sqlite3.sqlite_version,
+        'repeat': repeat,
+        'scales': []
+    }
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as scratch:
+            manager = ProfessionalDBManager(os.path.join(scratch, 'benchmark.db'), seed=False)
+            started = time.perf_counter()
+            counts = {'technicians': max(scale // 200, 25), 'service_requests': scale, 'support_tickets': scale // 2}
+            generate_synthetic_data(manager, counts['technicians'], counts['service_requests'],
+                                    counts['support_tickets'], seed=seed, progress=progress)
+            manager.refresh_rollups()
+            load_seconds = time.perf_counter() - started
+            
+            reads = {}
+            for label in BENCHMARK_READS:
+                # The first call warms SQLite's page cache and is not counted
+                _benchmark_call(manager, label)
+                timings = sorted(_benchmark_call(manager, label) for _ in range(repeat))
+                reads[label] = {
+                    'median_ms': round(timings[len(timings) // 2], 3),
+                    'min_ms': round(timings[0], 3),
+                    'max_ms': round(timings[-1], 3)
+                }
+            pages = {
+                page: round(sum(reads[label]['median_ms'] for label in labels), 3)
+                for page, labels in BENCHMARK_PAGES.items()
+            }
+            report['scales'].append({
+                'rows': counts,
+                'load_seconds': round(load_seconds, 2),
+                'reads': reads,
+                'pages_ms': pages
+            })
+            manager.close()
+    return report
+
+def run_cli(argv=None):
+    """Command-line entry point for database maintenance: python admin.py <command> ..."""
+    parser = argparse.ArgumentParser(prog="admin.py", description="TechPro Enterprise database maintenance")
+    parser.add_argument("--db", default="techpro_enterprise.db", help="SQLite database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    importer = commands.add_parser("import", help="bulk-load a CSV or JSON Lines file (optionally .gz)")
+    importer.add_argument("table", choices=list(IMPORT_COLUMNS))
+    importer.add_argument("path")
+    importer.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    importer.add_argument("--defer-indexes", action="store_true",
+                          help="drop the table's indexes during the load and rebuild them afterwards")
+    
+    benchmark = commands.add_parser("benchmark-import", help="measure import throughput on a scratch database")
+    benchmark.add_argument("--rows", type=int, default=100000)
+    benchmark.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    benchmark.add_argument("--defer-indexes", action="store_true")
+    
+    generator = commands.add_parser("generate", help="fill the database with skewed synthetic data")
+    generator.add_argument("--technicians", type=int, default=500)
+    generator.add_argument("--requests", type=int, default=100000)
+    generator.add_argument("--tickets", type=int, default=50000)
+    generator.add_argument("--seed", type=int, default=None)
+    
+    load_test = commands.add_parser("benchmark", help="time every read path at several data scales")
+    load_test.add_argument("--scales", type=int, nargs="+", default=[1000, 100000, 1000000])
+    load_test.add_argument("--repeat", type=int, default=5)
+    load_test.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+    
+    def progress(report):
+        print(f"\r{report.table}: {report.processed:,} rows, {report.rows_per_second:,.0f} rows/s", end="", file=sys.stderr)
+    
+    if args.command == "benchmark":
+        report = run_benchmarks(args.scales, args.repeat, progress=progress)
+        print(file=sys.stderr)
+        if args.output:
+            with open(args.output, 'w') as handle:
+                json.dump(report, handle, indent=2)
+            print(f"Benchmark report written to {args.output}")
+        else:
+            print(json.dumps(report, indent=2))
+        return 0
+    if args.command == "generate":
+        manager = ProfessionalDBManager(args.db, seed=False)
+        reports = generate_synthetic_data(manager, args.technicians, args.requests, args.tickets, args.seed, progress)
+        print(file=sys.stderr)
+        manager.close()
+        for report in reports:
+            print(f"{report.table}: {report.inserted:,} inserted, {report.updated:,} updated in {report.seconds:.1f}s")
+        return 0
+    if args.command == "import":
+        manager = ProfessionalDBManager(args.db, seed=False)
+        report = manager.import_file(args.table, args.path, batch_size=args.batch_size,
+                                     defer_indexes=args.defer_indexes, progress=progress)
+        print(file=sys.stderr)
+        manager.close()
+    else:
+        with tempfile.TemporaryDirectory() as scratch:
+            manager = ProfessionalDBManager(os.path.join(scratch, "benchmark.db"), seed=False)
+            # The technicians the synthetic requests are assigned to; loaded before timing starts
+            manager.bulk_import("technicians", synthetic_technicians(SYNTHETIC_TECHNICIANS))
+            report = manager.bulk_import("service_requests",
+                                         synthetic_service_requests(args.rows, SYNTHETIC_TECHNICIANS),
+                                         batch_size=args.batch_size, defer_indexes=args.defer_indexes,
+                                         progress=progress)
+            print(file=sys.stderr)
+            manager.close()
+    
+    print(f"{report.inserted:,} inserted, {report.updated:,} updated, {report.skipped:,} skipped "
+          f"in {report.seconds:.1f}s ({report.rows_per_second:,.0f} rows/s)")
+    for line, message in report.errors[:20]:
+        print(f"  line {line}: {message}" if line else f"  {message}")
+    return 1 if any(line is None for line, _ in report.errors) else 0
+
+# `python admin.py <command>` runs maintenance commands without starting the dashboard
+if __name__ == "__main__" and not st.runtime.exists():
+    sys.exit(run_cli())
+
 db = get_db_manager()
 
+# Request-scoped results: admin.py re-executes from the top on every rerun,
+# so this dict lives for exactly one script run.
+_rerun_cache = {}
+
+def load_once(loader, *args):
+    """Calls loader(*args) at most once per rerun and shares the result across widgets."""
+    key = (loader.__qualname__,) + args
+    if key not in _rerun_cache:
+        _rerun_cache[key] = loader(*args)
+    return _rerun_cache[key]
+
+def time_ago(timestamp, now=None):
+    """Formats a stored timestamp relative to now, e.g. '5 min ago'."""
+    seconds = ((now or datetime.now()) - datetime.strptime(timestamp, NOTIFICATION_TIME_FORMAT)).total_seconds()
+    if seconds < 60:
+        return "Just now"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min ago"
+    if seconds < 86400:
+        hours = int(seconds // 3600)
+        return f"{hours} hour{'s' if hours > 1 else ''} ago"
+    days = int(seconds // 86400)
+    return f"{days} day{'s' if days > 1 else ''} ago"
+
 def refresh_data():
     """Refreshes the application data and reruns the script."""
     st.session_state.refresh_key += 1
     st.session_state.last_refresh = datetime.now()
     st.rerun()
 
-def create_performance_chart(performance_data):
-    """Creates an Altair chart for performance data."""
-    df = pd.DataFrame({
-        'Month': performance_data['months'],
+# Maximum number of points a time-series chart ships to the browser; longer series are downsampled
+CHART_POINT_BUDGET = 500
+
+def lttb_indices(values, threshold):
+    """
+    Largest-Triangle-Three-Buckets: picks `threshold` row positions from an evenly spaced
+    series that preserve its visual shape. The first and last points are always kept.
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = np.nan_to_num(np.asarray(values, dtype='float64'))
+    x = np.arange(n, dtype='float64')
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = [0]
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # The next bucket's average is the third triangle vertex; the last bucket uses the final point
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        a = selected[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        selected.append(start + int(area.argmax()))
+    selected.append(n - 1)
+    return np.asarray(selected)
+
+def downsample_series(df, value_column, budget=CHART_POINT_BUDGET):
+    """Returns df unchanged when it fits the point budget, otherwise the LTTB-selected rows."""
+    if len(df) <= budget:
+        return df
+    return df.iloc[lttb_indices(df[value_column].to_numpy(), budget)]
+
+def frame_fingerprint(df):
+    """Content hash of a DataFrame's values, columns and dtypes, used as the chart cache key."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(repr([(str(name), str(dtype)) for name, dtype in df.dtypes.items()]).encode())
+    return digest.hexdigest()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_chart_spec(builder_name, fingerprint, options, _builder, _df):
+    """Builds the Vega-Lite spec once per (builder, data, options); _builder/_df are not hashed."""
+    return _builder(_df, **dict(options)).to_dict()
+
+def render_chart(builder, df, **options):
+    """
+    Renders builder(df, **options) through the spec cache. Reruns with unchanged data reuse the
+    serialized spec instead of rebuilding the Altair chart and re-inlining the DataFrame as JSON.
+    """
+    spec = _cached_chart_spec(builder.__name__, frame_fingerprint(df), tuple(sorted(options.items())), builder, df)
+    st.vega_lite_chart(spec, use_container_width=True)
+
+def performance_frame(performance_data):
+    """Converts get_performance_data() output into the frame plotted by the trend charts."""
+    return pd.DataFrame({
+        'Period': performance_data['periods'],
         'Revenue': performance_data['revenue'],
-        'Requests': performance_data['requests']
+        'Requests': performance_data['requests'],
+        'New Clients': performance_data['new_clients'],
+        'Satisfaction %': performance_data['satisfaction']
     })
+
+def create_performance_chart(df, title='Monthly Revenue and Requests'):
+    """Creates an Altair chart for performance data."""
+    df = downsample_series(df[['Period', 'Revenue', 'Requests']], 'Revenue')
     
+    # sort=None keeps periods in chronological order instead of alphabetical
     revenue_chart = alt.Chart(df).mark_line(color=COLORS['primary'], point=True, strokeWidth=3).encode(
-        x='Month',
+        x=alt.X('Period:N', sort=None),
         y='Revenue',
-        tooltip=['Month', 'Revenue']
+        tooltip=['Period', 'Revenue']
     )
     
     requests_chart = alt.Chart(df).mark_bar(opacity=0.4, color=COLORS['accent']).encode(
-        x='Month',
+        x=alt.X('Period:N', sort=None),
         y='Requests',
-        tooltip=['Month', 'Requests']
+        tooltip=['Period', 'Requests']
     )
     
     chart = alt.layer(revenue_chart, requests_chart).resolve_scale(
         y='independent'
     ).properties(
-        title='Monthly Revenue and Requests',
+        title=title,
         width='container',
         height=300
     )
     return chart
 
+def create_revenue_chart(df):
+    """Creates the layered revenue line / new clients bar chart for the Revenue page."""
+    df = downsample_series(df[['Period', 'Revenue', 'New Clients']], 'Revenue')
+    base = alt.Chart(df).encode(x=alt.X('Period:O', sort=None))
+    
+    revenue_line = base.mark_line(color=COLORS['primary'], strokeWidth=3).encode(
+        y=alt.Y('Revenue:Q', axis=alt.Axis(title='Revenue ($)', titleColor=COLORS['primary'])),
+        tooltip=['Period', 'Revenue']
+    )
+    
+    clients_bar = base.mark_bar(color=COLORS['accent'], opacity=0.6).encode(
+        y=alt.Y('New Clients:Q', axis=alt.Axis(title='New Clients', titleColor=COLORS['accent'])),
+        tooltip=['Period', 'New Clients']
+    )
+    
+    return alt.layer(revenue_line, clients_bar).resolve_scale(
+        y='independent'
+    ).properties(
+        title='Revenue Growth & Client Acquisition',
+        height=400
+    )
+
+def create_top_technicians_chart(df):
+    """Creates the Team Management bar chart of the highest performance scores."""
+    return alt.Chart(df).mark_bar().encode(
+        x='performance_score:Q',
+        y=alt.Y('name:N', sort='-x'),
+        color=alt.Color('performance_score:Q', scale=alt.Scale(scheme='viridis')),
+        tooltip=['name', 'performance_score']
+    ).properties(title='Top Performing Technicians', height=300)
+
+def create_technician_jobs_chart(df):
+    """Creates the Analytics bar chart of completed jobs per top technician."""
+    return alt.Chart(df).mark_bar(size=30).encode(
+        x=alt.X('Technician:N', sort='-y', axis=alt.Axis(labelAngle=-45)),
+        y='Completed Jobs:Q',
+        color=alt.Color('Rating:Q', scale=alt.Scale(scheme='viridis'), legend=alt.Legend(title="Rating")),
+        tooltip=['Technician', 'Completed Jobs', 'Rating', 'Performance Score']
+    ).properties(title='Technician Performance Overview', height=350, width='container').interactive()
+
+def create_request_distribution_chart(df):
+    """Creates the Analytics bar chart of service requests per status."""
+    return alt.Chart(df).mark_bar(size=40).encode(
+        x=alt.X('Status:N', sort='-y'),
+        y='Count:Q',
+        color=alt.Color('Status:N', scale=alt.Scale(domain=['Pending', 'In Progress', 'Completed', 'Cancelled'], range=[COLORS['warning'], COLORS['accent'], COLORS['success'], COLORS['danger']])),
+        tooltip=['Status', 'Count']
+    ).properties(title='Service Request Status Distribution', height=350, width='container').interactive()
+
+def write_export(frames, fmt):
+    """
+    Writes an iterable of DataFrame chunks to a temporary file in one of EXPORT_FORMATS and
+    returns the finished file as bytes, the form st.download_button accepts. Only one chunk is
+    in memory while the file is built.
+    """
+    with tempfile.TemporaryFile() as handle:
+        _write_export_chunks(handle, frames, fmt)
+        handle.seek(0)
+        return handle.read()
+
+def _write_export_chunks(handle, frames, fmt):
+    """Streams DataFrame chunks into an open binary file for write_export."""
+    if fmt == 'Parquet':
+        writer = None
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                # Columns that are entirely NULL in the first chunk have no type yet; store them as text
+                schema = pa.schema([
+                    field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                    for field in table.schema
+                ])
+                writer = pq.ParquetWriter(handle, schema)
+            writer.write_table(table.cast(writer.schema))
+        if writer is not None:
+            writer.close()
+    else:
+        raw = gzip.GzipFile(fileobj=handle, mode='wb') if fmt == 'CSV (gzip)' else None
+        text = io.TextIOWrapper(raw or handle, encoding='utf-8', newline='')
+        header = True
+        for frame in frames:
+            frame.to_csv(text, index=False, header=header)
+            header = False
+        text.flush()
+        text.detach()
+        if raw is not None:
+            raw.close()
+
+def download_export(label, file_stem, make_frames, key, **button_options):
+    """
+    Export format picker plus a download button whose file is only generated when clicked.
+    make_frames is called at that point and must return an iterable of DataFrame chunks.
+    It runs after the script run has finished, so bind page variables as lambda defaults.
+    """
+    fmt = st.selectbox("Export format", list(EXPORT_FORMATS), key=f"{key}_format", label_visibility="collapsed")
+    extension, mime = EXPORT_FORMATS[fmt]
+    
+    def generate():
+        try:
+            return write_export(make_frames(), fmt)
+        finally:
+            # Deferred downloads run on a server thread; hand its reader back to the pool
+            db.release_connection()
+    
+    st.download_button(
+        label=label,
+        data=generate,
+        file_name=f"{file_stem}.{extension}",
+        mime=mime,
+        key=key,
+        **button_options
+    )
+
+def select_options(options, current):
+    """
+    Returns (options, index) for a selectbox showing current. A value outside options (e.g.
+    from an import) is offered as an extra choice; a missing one leaves the box unselected.
+    """
+    if current is None or pd.isna(current):
+        return options, None
+    if current not in options:
+        options = options + [current]
+    return options, options.index(current)
+
+def value_or(value, default):
+    """Returns value, or default when it is NULL/NaN."""
+    return default if value is None or pd.isna(value) else value
+
 def create_metric_card(title, value, change, icon, color=COLORS['primary']):
     """Creates HTML for a metric card."""
     return f"""
@@ -962,27 +3451,27 @@ with st.sidebar:
     
     # Enhanced Quick Stats
     st.markdown("### 🚀 Quick Insights")
-    stats = db.get_dashboard_stats()
+    stats = load_once(db.get_dashboard_stats)
     
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("Active Tech", stats['active_technicians'], "+3")
-        st.metric("Revenue", f"${stats['total_revenue']/1000:.1f}K", "+8.2%")
+        st.metric("Active Tech", stats.active_technicians, "+3")
+        st.metric("Revenue", f"${stats.total_revenue/1000:.1f}K", "+8.2%")
     with col2:
-        st.metric("Live Jobs", stats['in_progress_requests'], "-2")
-        st.metric("Satisfaction", f"{stats['satisfaction_rate']}%", "+1.5%")
+        st.metric("Live Jobs", stats.in_progress_requests, "-2")
+        st.metric("Satisfaction", f"{stats.satisfaction_rate}%", "+1.5%")
     
     st.markdown("---")
     
     # Notifications Section
-    st.markdown("### 🔔 Notifications")
-    if st.session_state.notifications:
-        for notif in st.session_state.notifications[-3:]:  # Show last 3
-            emoji = {"info": "ℹ️", "warning": "⚠️", "success": "✅"}.get(notif["type"], "📢")
-            st.info(f"{emoji} {notif['message']}")
-    
-    if st.button("Clear All Notifications"):
-        st.session_state.notifications = []
+    unread = db.unread_notification_count()
+    st.markdown(f"### 🔔 Notifications ({unread})" if unread else "### 🔔 Notifications")
+    for notif in db.get_notifications(3):  # Show newest 3 unread
+        emoji = {"info": "ℹ️", "warning": "⚠️", "success": "✅"}.get(notif["type"], "📢")
+        st.info(f"{emoji} {notif['message']} · {time_ago(notif['created_at'])}")
+    
+    if st.button("Clear All Notifications", disabled=not unread):
+        db.mark_notifications_read()
         st.rerun()
     
     st.markdown("---")
@@ -1038,7 +3527,8 @@ st.markdown(f"""
 
 # Dashboard Content with enhanced features
 if st.session_state.current_page == "Dashboard":
-    stats = db.get_dashboard_stats()
+    # Same snapshot the sidebar Quick Insights loaded during this rerun
+    stats = load_once(db.get_dashboard_stats)
     
     # Enhanced Top Metrics with improved cards
     cols = st.columns(4)
@@ -1046,7 +3536,7 @@ if st.session_state.current_page == "Dashboard":
     with cols[0]:
         st.markdown(create_metric_card(
             "Total Enterprise Users", 
-            f"{stats['total_users']:,}", 
+            f"{stats.total_users:,}", 
             "+12.5%", 
             "👥", 
             COLORS['primary']
@@ -1055,7 +3545,7 @@ if st.session_state.current_page == "Dashboard":
     with cols[1]:
         st.markdown(create_metric_card(
             "Active Service Jobs", 
-            f"{stats['in_progress_requests']}", 
+            f"{stats.in_progress_requests}", 
             "Live", 
             "🔧", 
             COLORS['accent']
@@ -1064,7 +3554,7 @@ if st.session_state.current_page == "Dashboard":
     with cols[2]:
         st.markdown(create_metric_card(
             "Completed Projects", 
-            f"{stats['completed_requests']}", 
+            f"{stats.completed_requests}", 
             "98%", 
             "✅", 
             COLORS['success']
@@ -1073,7 +3563,7 @@ if st.session_state.current_page == "Dashboard":
     with cols[3]:
         st.markdown(create_metric_card(
             "Quarterly Revenue", 
-            f"${stats['total_revenue']/1000:.1f}K", 
+            f"${stats.total_revenue/1000:.1f}K", 
             "↑8.2%", 
             "💰", 
             COLORS['secondary']
@@ -1084,18 +3574,17 @@ if st.session_state.current_page == "Dashboard":
     
     with col1:
         st.subheader("📈 Advanced Performance Analytics")
-        performance_data = db.get_performance_data()
-        chart = create_performance_chart(performance_data)
-        st.altair_chart(chart, use_container_width=True)
+        performance_data = db.get_performance_data('monthly', 12, datetime.now().date())
+        render_chart(create_performance_chart, performance_frame(performance_data))
         
         # Additional mini metrics
         col1a, col2a, col3a = st.columns(3)
         with col1a:
-            st.metric("Avg Response", stats['avg_response_time'], "-2 min")
+            st.metric("Avg Response", stats.avg_response_time, "-2 min")
         with col2a:
-            st.metric("On Time Delivery", stats['on_time_delivery'], "+4%")
+            st.metric("On Time Delivery", stats.on_time_delivery, "+4%")
         with col3a:
-            st.metric("Client Satisfaction", f"{stats['satisfaction_rate']}%", "+2.1%")
+            st.metric("Client Satisfaction", f"{stats.satisfaction_rate}%", "+2.1%")
     
     with col2:
         st.subheader("🎯 Performance Insights")
@@ -1129,32 +3618,39 @@ if st.session_state.current_page == "Dashboard":
     # Activity filters
     col1b, col2b = st.columns([3, 1])
     with col2b:
-        activity_filter = st.selectbox("Filter Activities", ["All", "Requests", "Completions", "Tickets", "Ratings"])
-    
-    activities = db.get_recent_activity()
-    
-    # Filter activities if needed
-    if activity_filter != "All":
-        activities = [a for a in activities if a['type'] == activity_filter.lower()]
+        activity_filter = st.selectbox("Filter Activities", ["All"] + [label for _, label in ACTIVITY_TYPES.values()])
+    activity_types = [kind for kind, (_, label) in ACTIVITY_TYPES.items() if label == activity_filter] or None
     
-    # Display activities in an enhanced layout
-    with st.container():
-        for activity in activities:
+    @st.fragment(run_every=ACTIVITY_POLL_SECONDS)
+    def live_activity_stream(types):
+        """Polls only for events past the last one seen and keeps the newest few in session state."""
+        feed = st.session_state.get('activity_feed')
+        if feed is None or feed['types'] != types:
+            feed = st.session_state.activity_feed = {'types': types, 'cursor': 0, 'events': []}
+        new_events = db.get_activity_since(feed['cursor'], types)
+        if new_events:
+            feed['cursor'] = new_events[0]['id']
+            feed['events'] = (new_events + feed['events'])[:ACTIVITY_FEED_SIZE]
+        
+        if not feed['events']:
+            st.info("No activity yet.")
+        for activity in feed['events']:
             priority_color = {
                 'high': COLORS['warning'],
                 'critical': COLORS['danger'],
                 'medium': COLORS['accent'], 
                 'low': COLORS['success']
             }.get(activity['priority'], COLORS['primary'])
+            icon = ACTIVITY_TYPES.get(activity['type'], ('📢',))[0]
             
             st.markdown(f"""
             <div class='activity-item'>
                 <div style='display: flex; align-items: center; gap: 20px;'>
-                    <span style='font-size: 2.2em;' class='bounce-icon'>{activity['icon']}</span>
+                    <span style='font-size: 2.2em;' class='bounce-icon'>{icon}</span>
                     <div style='flex-grow: 1;'>
-                        <strong style='color: {COLORS['dark']}; font-size: 1.1em;'>{activity['user']}</strong> 
-                        <span style='color: {COLORS['dark']}; opacity: 0.9;'>{activity['action']}</span><br>
-                        <small style='color: {COLORS['primary']}; font-weight: 600; font-size: 0.9em;'>{activity['time']}</small>
+                        <strong style='color: {COLORS['dark']}; font-size: 1.1em;'>{html.escape(activity['actor'] or '')}</strong> 
+                        <span style='color: {COLORS['dark']}; opacity: 0.9;'>{html.escape(activity['action'])}</span><br>
+                        <small style='color: {COLORS['primary']}; font-weight: 600; font-size: 0.9em;'>{time_ago(activity['created_at'])}</small>
                     </div>
                     <div style='display: flex; flex-direction: column; align-items: end; gap: 8px;'>
                         <div style='background: {priority_color}; color: white; padding: 8px 16px; 
@@ -1162,12 +3658,14 @@ if st.session_state.current_page == "Dashboard":
                             {activity['type']}
                         </div>
                         <div style='color: {COLORS['secondary']}; font-weight: 700; font-size: 0.9em;'>
-                            {activity['amount']}
+                            {html.escape(activity['amount'] or '')}
                         </div>
                     </div>
                 </div>
             </div>
             """, unsafe_allow_html=True)
+    
+    live_activity_stream(activity_types)
 
 elif st.session_state.current_page == "Team Management":
     st.title("👥 Advanced Team Management")
@@ -1179,14 +3677,14 @@ elif st.session_state.current_page == "Team Management":
     with col2:
         status_filter = st.selectbox("Status", ["All", "Active", "Pending", "Inactive"])
     with col3:
-        location_filter = st.selectbox("Location", ["All"] + sorted(set(t['location'] for t in db.get_technicians_data() if t['location'])))
+        location_filter = st.selectbox("Location", ["All"] + db.distinct_locations())
     with col4:
-        specialty_filter = st.selectbox("Specialty", ["All"] + sorted(set(t['specialty'] for t in db.get_technicians_data() if t['specialty'])))
+        specialty_filter = st.selectbox("Specialty", ["All"] + db.distinct_specialties())
     with col5:
         min_rating = st.slider("Min Rating", 0.0, 5.0, 0.0, 0.1)
+    skills_filter = st.multiselect("Required Skills", db.get_skill_catalog(), placeholder="Technicians must have all selected skills")
     
-    technicians_data = db.get_technicians_data()
-    df = pd.DataFrame(technicians_data)
+    df = load_once(db.get_technicians_frame)
     
     # Apply enhanced filters
     if status_filter != "All":
@@ -1197,13 +3695,10 @@ elif st.session_state.current_page == "Team Management":
         df = df[df['specialty'] == specialty_filter]
     if min_rating > 0:
         df = df[df['rating'] >= min_rating]
+    if skills_filter:
+        df = df[df['id'].isin(db.find_technicians_by_skills(skills_filter))]
     if search_query:
-        df = df[
-            df['name'].str.contains(search_query, case=False) | 
-            df['email'].str.contains(search_query, case=False) |
-            df['certifications'].str.contains(search_query, case=False) |
-            df.apply(lambda row: any(search_query.lower() in s.lower() for s in row['skills']), axis=1)
-        ]
+        df = df[df['id'].isin(db.search_technicians(search_query))]
     
     st.subheader(f"👨‍💼 Technical Team Overview ({len(df)} Professionals)")
     
@@ -1222,15 +3717,7 @@ elif st.session_state.current_page == "Team Management":
             st.info("No technicians found matching the criteria.")
         
         # Added export functionality for professionalism
-        csv = StringIO()
-        df.to_csv(csv, index=False)
-        st.download_button(
-            label="📥 Download Team Data as CSV",
-            data=csv.getvalue(),
-            file_name="team_data.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
+        download_export("📥 Download Team Data", "team_data", lambda frame=df: [frame], key="export_team", use_container_width=True)
     
     with tab2:
         # Performance metrics
@@ -1248,13 +3735,7 @@ elif st.session_state.current_page == "Team Management":
             
             # Performance chart
             perf_df = df.nlargest(10, 'performance_score')[['name', 'performance_score']]
-            chart = alt.Chart(perf_df).mark_bar().encode(
-                x='performance_score:Q',
-                y=alt.Y('name:N', sort='-x'),
-                color=alt.Color('performance_score:Q', scale=alt.Scale(scheme='viridis')),
-                tooltip=['name', 'performance_score']
-            ).properties(title='Top Performing Technicians', height=300)
-            st.altair_chart(chart, use_container_width=True)
+            render_chart(create_top_technicians_chart, perf_df)
         else:
             st.info("No data available for performance analysis.")
     
@@ -1281,11 +3762,40 @@ elif st.session_state.current_page == "Team Management":
         if selected_id:
             tech = df[df['id'] == selected_id].iloc[0]
             
-            # Enhanced form with tabs
-            edit_tab1, edit_tab2, edit_tab3 = st.tabs(["📝 Basic Info", "🛠️ Professional Details", "⚡ Quick Actions"])
+            # Edits are checked against the version the previous run rendered, which is what a
+            # submit or click in this run was based on. A save therefore never silently overwrites
+            # another admin's change, while a form that has picked up that change saves cleanly.
+            version_key = f"tech_version_{selected_id}"
+            conflict_key = f"tech_conflict_{selected_id}"
+            confirm_key = f"tech_confirm_delete_{selected_id}"
+            loaded_version = st.session_state.get(version_key, int(tech['version']))
+            st.session_state[version_key] = int(tech['version'])
             
-            with edit_tab1:
-                with st.form("edit_tech_basic_form"):
+            def save_technician(write, message):
+                """Runs write() as one unit of work and reloads, or records a version conflict."""
+                try:
+                    with db.transaction():
+                        write()
+                except db.StaleWriteError as e:
+                    st.session_state[conflict_key] = str(e)
+                    st.rerun()
+                except (sqlite3.Error, ValueError) as e:
+                    st.error(f"🚨 Failed to update technician: {e}")
+                    return
+                st.success(message)
+                refresh_data()
+            
+            if conflict_key in st.session_state:
+                st.error(f"⚠️ {st.session_state[conflict_key]}")
+                if st.button("🔄 Load Latest Version"):
+                    st.session_state.pop(conflict_key)
+                    st.rerun()
+            
+            # One form across both edit tabs: a save writes every changed field in a single commit
+            with st.form("edit_tech_form"):
+                edit_tab1, edit_tab2 = st.tabs(["📝 Basic Info", "🛠️ Professional Details"])
+                
+                with edit_tab1:
                     col1, col2 = st.columns(2)
                     with col1:
                         name = st.text_input("Full Name", tech['name'])
@@ -1293,62 +3803,66 @@ elif st.session_state.current_page == "Team Management":
                         phone = st.text_input("Phone Number", tech['phone'])
                     with col2:
                         specialty = st.text_input("Specialty", tech['specialty'])
-                        location = st.selectbox("Location", ["Cairo HQ", "Alexandria Branch", "Giza Center", "Luxor Office", "Aswan Station"], index=["Cairo HQ", "Alexandria Branch", "Giza Center", "Luxor Office", "Aswan Station"].index(tech['location']))
-                        status = st.selectbox("Status", ["Active", "Pending", "Inactive"], index=["Active", "Pending", "Inactive"].index(tech['status']))
-                    
-                    if st.form_submit_button("💾 Save Basic Information"):
-                        updates = {'name': name, 'email': email, 'phone': phone, 'specialty': specialty, 'location': location, 'status': status}
-                        db.update_technician(selected_id, updates)
-                        st.success("✅ Basic information updated successfully!")
-                        refresh_data()
-            
-            with edit_tab2:
-                with st.form("edit_tech_pro_form"):
+                        location = st.selectbox("Location", *select_options(TECHNICIAN_LOCATIONS, tech['location']))
+                        status = st.selectbox("Status", *select_options(TECHNICIAN_STATUSES, tech['status']))
+                
+                with edit_tab2:
                     col1, col2 = st.columns(2)
                     with col1:
                         skills = st.text_area("Skills (comma-separated)", ','.join(tech['skills']))
                         certifications = st.text_area("Certifications", ','.join(tech['certifications']))
                         experience = st.text_input("Experience", tech['experience'])
                     with col2:
-                        rating = st.slider("Rating", 0.0, 5.0, float(tech['rating']), 0.1)
-                        completed_jobs = st.number_input("Completed Jobs", value=int(tech['completed_jobs']))
-                        hourly_rate = st.number_input("Hourly Rate ($)", value=int(tech['hourly_rate']))
-                        performance_score = st.slider("Performance Score", 0, 100, int(tech['performance_score']))
-                    
-                    if st.form_submit_button("💼 Update Professional Details"):
-                        updates = {
-                            'skills': skills, 'certifications': certifications, 'experience': experience,
-                            'rating': rating, 'completed_jobs': completed_jobs, 'hourly_rate': hourly_rate,
-                            'performance_score': performance_score
-                        }
-                        db.update_technician(selected_id, updates)
-                        st.success("✅ Professional details updated successfully!")
-                        refresh_data()
+                        rating = st.slider("Rating", 0.0, 5.0, float(value_or(tech['rating'], 0.0)), 0.1)
+                        completed_jobs = st.number_input("Completed Jobs", value=int(value_or(tech['completed_jobs'], 0)))
+                        hourly_rate = st.number_input("Hourly Rate ($)", value=int(value_or(tech['hourly_rate'], 0)))
+                        performance_score = st.slider("Performance Score", 0, 100, int(value_or(tech['performance_score'], 0)))
+                
+                if st.form_submit_button("💾 Save Technician"):
+                    edited = {
+                        'name': name, 'email': email, 'phone': phone, 'specialty': specialty, 'location': location,
+                        'status': status, 'skills': skills, 'certifications': certifications, 'experience': experience,
+                        'rating': rating, 'completed_jobs': completed_jobs, 'hourly_rate': hourly_rate,
+                        'performance_score': performance_score
+                    }
+                    original = dict(tech[[key for key in edited if key not in TECHNICIAN_TAG_TABLES]])
+                    original.update({key: ','.join(tech[key]) for key in TECHNICIAN_TAG_TABLES})
+                    updates = {key: value for key, value in edited.items() if value != original[key]}
+                    if updates:
+                        save_technician(lambda: db.update_technician(selected_id, updates, loaded_version),
+                                        "✅ Technician updated successfully!")
+                    else:
+                        st.info("No changes to save.")
             
-            with edit_tab3:
-                st.warning("Quick actions for immediate changes")
-                col1, col2, col3 = st.columns(3)
+            st.warning("Quick actions for immediate changes")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                if st.button("✅ Approve Technician", use_container_width=True) and tech['status'] == 'Pending':
+                    save_technician(lambda: db.approve_technician(selected_id, loaded_version), "Technician approved!")
+            with col2:
+                if st.button("🔄 Reset Password", use_container_width=True):
+                    st.info("Password reset link sent to technician's email")
+            with col3:
+                if st.button("🗑️ Remove Technician", use_container_width=True, type="secondary"):
+                    st.session_state[confirm_key] = True
+            
+            # Deletion needs a second click, on a run that shows which technician is going
+            if st.session_state.get(confirm_key):
+                st.error(f"⚠️ Permanently remove {tech['name']} ({tech['email']})?")
+                col1, col2 = st.columns(2)
                 with col1:
-                    if st.button("✅ Approve Technician", use_container_width=True) and tech['status'] == 'Pending':
-                        db.approve_technician(selected_id)
-                        st.success("Technician approved!")
-                        refresh_data()
+                    if st.button("🗑️ Yes, Remove", use_container_width=True, type="primary"):
+                        st.session_state.pop(confirm_key)
+                        save_technician(lambda: db.delete_technician(selected_id, loaded_version),
+                                        "Technician removed from system!")
                 with col2:
-                    if st.button("🔄 Reset Password", use_container_width=True):
-                        st.info("Password reset link sent to technician's email")
-                with col3:
-                    if st.button("🗑️ Remove Technician", use_container_width=True, type="secondary"):
-                        if st.checkbox("Confirm deletion"):
-                            db.delete_technician(selected_id)
-                            st.success("Technician removed from system!")
-                            refresh_data()
+                    if st.button("Cancel", use_container_width=True):
+                        st.session_state.pop(confirm_key)
+                        st.rerun()
 
 elif st.session_state.current_page == "Service Requests":
     st.title("🔧 Advanced Service Requests Management")
     
-    requests_data = db.get_service_requests()
-    df = pd.DataFrame(requests_data)
-    
     # Enhanced filtering
     col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
     with col1:
@@ -1358,37 +3872,51 @@ elif st.session_state.current_page == "Service Requests":
     with col3:
         priority_filter = st.selectbox("Priority Filter", ["All", "Low", "Medium", "High", "Critical"])
     with col4:
-        date_filter = st.selectbox("Time Frame", ["All Time", "Last 7 Days", "Last 30 Days", "Last 90 Days"])
+        date_filter = st.selectbox("Time Frame", list(TIME_FRAMES.keys()))
     
-    # Apply enhanced filters
-    if status_filter != "All":
-        df = df[df['status'] == status_filter]
-    if priority_filter != "All":
-        df = df[df['priority'] == priority_filter]
-    if search_query:
-        df = df[
-            df['client_name'].str.contains(search_query, case=False) |
-            df['description'].str.contains(search_query, case=False) |
-            df['tech_name'].str.contains(search_query, case=False)
-        ]
+    # Paging controls; filters are applied in SQL so only the visible page is loaded
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort_option = st.selectbox("Sort By", list(SERVICE_REQUEST_SORTS.keys()))
+    with col2:
+        page_size = st.selectbox("Rows per Page", [25, 50, 100, 250], index=1)
+    with col3:
+        page_number = st.number_input("Page", min_value=1, value=1, step=1)
+    
+    # Look-back windows start at midnight so the range (and its cache key) is stable within a day
+    lookback_days = TIME_FRAMES[date_filter]
+    date_range = None
+    if lookback_days:
+        since = (datetime.now() - timedelta(days=lookback_days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        date_range = (since, None)
     
-    st.subheader(f"📋 Service Requests Overview ({len(df)} requests)")
+    request_filters = {
+        'status': status_filter if status_filter != "All" else None,
+        'priority': priority_filter if priority_filter != "All" else None,
+        'search': search_query or None,
+        'date_range': date_range,
+        'sort': sort_option
+    }
+    result = db.query_service_requests(limit=page_size, offset=(page_number - 1) * page_size, **request_filters)
+    if page_number > result.page_count:
+        page_number = result.page_count
+        result = db.query_service_requests(limit=page_size, offset=(page_number - 1) * page_size, **request_filters)
+    df = result.frame
+    
+    st.subheader(f"📋 Service Requests Overview ({result.total} requests)")
     
     # Enhanced display with metrics
     if not df.empty:
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            total_revenue = df[df['status'] == 'Completed']['revenue'].sum()
-            st.metric("Total Revenue", f"${total_revenue:,.0f}")
+            st.metric("Total Revenue", f"${result.completed_revenue:,.0f}")
         with col2:
-            avg_rating = df['client_rating'].mean()
-            st.metric("Avg Client Rating", f"{avg_rating:.1f}/5" if not pd.isna(avg_rating) else "N/A")
+            avg_rating = result.avg_client_rating
+            st.metric("Avg Client Rating", f"{avg_rating:.1f}/5" if avg_rating is not None else "N/A")
         with col3:
-            pending_count = len(df[df['status'] == 'Pending'])
-            st.metric("Pending Approval", pending_count)
+            st.metric("Pending Approval", result.pending_count)
         with col4:
-            critical_count = len(df[df['priority'] == 'Critical'])
-            st.metric("Critical Issues", critical_count, delta_color="inverse")
+            st.metric("Critical Issues", result.critical_count, delta_color="inverse")
     
         # Enhanced data table
         display_columns = ['id', 'client_name', 'description', 'status', 'priority', 'tech_name', 'revenue', 'created_date']
@@ -1397,18 +3925,15 @@ elif st.session_state.current_page == "Service Requests":
             use_container_width=True,
             hide_index=True
         )
+        st.caption(f"Page {page_number} of {result.page_count}")
     else:
         st.info("No service requests found matching the criteria.")
     
-    # Added export functionality
-    csv = StringIO()
-    df.to_csv(csv, index=False)
-    st.download_button(
-        label="📥 Download Requests Data as CSV",
-        data=csv.getvalue(),
-        file_name="service_requests.csv",
-        mime="text/csv",
-        use_container_width=True
+    # Added export functionality: streams the whole filtered set, not just the visible page
+    download_export(
+        "📥 Download Requests Data", "service_requests",
+        lambda filters=request_filters: db.export_service_requests(**filters),
+        key="export_requests", use_container_width=True
     )
     
     # Enhanced request management
@@ -1441,12 +3966,35 @@ elif st.session_state.current_page == "Service Requests":
                     db.update_request_status(selected_req, new_status)
                     st.success("✅ Request status updated successfully!")
                     refresh_data()
+        
+        # Bulk actions apply to the requests on the current page
+        with st.expander("📦 Bulk Actions"):
+            select_page = st.checkbox(f"Select all {len(df)} requests on this page", key="bulk_requests_all")
+            bulk_ids = st.multiselect(
+                "Requests", df['id'].tolist(),
+                default=df['id'].tolist() if select_page else [],
+                format_func=lambda x: f"#{x} - {df[df['id'] == x]['client_name'].values[0]}",
+                key=f"bulk_requests_{select_page}"
+            )
+            technicians = db.get_technicians_frame()
+            tech_names = dict(zip(technicians['id'].tolist(), technicians['name'].tolist())) if not technicians.empty else {}
+            col1, col2 = st.columns(2)
+            with col1:
+                bulk_status = st.selectbox("New Status", ["Pending", "In Progress", "Completed", "Cancelled"], key="bulk_request_status")
+            with col2:
+                bulk_tech = st.selectbox("Reassign To", [None] + list(tech_names),
+                                         format_func=lambda x: "Keep current technician" if x is None else tech_names[x],
+                                         key="bulk_request_tech")
+            if st.button(f"🔄 Apply to {len(bulk_ids)} Requests", disabled=not bulk_ids, use_container_width=True):
+                updated = db.update_request_status_bulk(bulk_ids, bulk_status, bulk_tech)
+                if updated:
+                    st.success(f"✅ Updated {updated} requests")
+                    refresh_data()
 
 elif st.session_state.current_page == "Support Tickets":
     st.title("🎫 Enterprise Support Tickets Management")
     
-    tickets_data = db.get_support_tickets()
-    df = pd.DataFrame(tickets_data)
+    df = db.get_support_tickets_frame()
     
     # Basic filtering
     col1, col2 = st.columns(2)
@@ -1468,14 +4016,13 @@ elif st.session_state.current_page == "Support Tickets":
         st.info("No support tickets found.")
     
     # Added export functionality
-    csv = StringIO()
-    df.to_csv(csv, index=False)
-    st.download_button(
-        label="📥 Download Tickets Data as CSV",
-        data=csv.getvalue(),
-        file_name="support_tickets.csv",
-        mime="text/csv",
-        use_container_width=True
+    download_export(
+        "📥 Download Tickets Data", "support_tickets",
+        lambda status=status_filter, priority=priority_filter: db.export_support_tickets(
+            status=status if status != "All" else None,
+            priority=priority if priority != "All" else None
+        ),
+        key="export_tickets", use_container_width=True
     )
     
     if not df.empty:
@@ -1489,12 +4036,28 @@ elif st.session_state.current_page == "Support Tickets":
                 db.update_ticket_status(selected_ticket, new_status)
                 st.success("Status updated!")
                 refresh_data()
+        
+        # Bulk actions apply to the filtered tickets, e.g. close every resolved ticket at end of day
+        with st.expander("📦 Bulk Actions"):
+            select_filtered = st.checkbox(f"Select all {len(df)} filtered tickets", key="bulk_tickets_all")
+            if select_filtered:
+                bulk_ids = df['id'].tolist()
+            else:
+                bulk_ids = st.multiselect("Tickets", df['id'].tolist(),
+                                          format_func=lambda x: f"#{x} - {df[df['id'] == x]['client_name'].values[0]}",
+                                          key="bulk_tickets")
+            bulk_status = st.selectbox("New Status", ["Open", "In Progress", "Resolved", "Closed"], index=3, key="bulk_ticket_status")
+            if st.button(f"Apply to {len(bulk_ids)} Tickets", disabled=not bulk_ids):
+                updated = db.update_ticket_status_bulk(bulk_ids, bulk_status)
+                if updated:
+                    st.success(f"Updated {updated} tickets")
+                    refresh_data()
 
 elif st.session_state.current_page == "Analytics":
     st.title("📊 Advanced Business Analytics")
     
     analytics_data = db.get_analytics_data()
-    performance_data = db.get_performance_data()
+    performance_data = db.get_performance_data('monthly', 12, datetime.now().date())
     
     # Comprehensive analytics dashboard
     col1, col2 = st.columns(2)
@@ -1505,23 +4068,11 @@ elif st.session_state.current_page == "Analytics":
             st.dataframe(analytics_data['tech_performance'], use_container_width=True)
             
             # Interactive performance chart with enhanced styling
-            tech_chart = alt.Chart(analytics_data['tech_performance']).mark_bar(size=30).encode(
-                x=alt.X('Technician:N', sort='-y', axis=alt.Axis(labelAngle=-45)),
-                y='Completed Jobs:Q',
-                color=alt.Color('Rating:Q', scale=alt.Scale(scheme='viridis'), legend=alt.Legend(title="Rating")),
-                tooltip=['Technician', 'Completed Jobs', 'Rating', 'Performance Score']
-            ).properties(title='Technician Performance Overview', height=350, width='container').interactive()
-            st.altair_chart(tech_chart, use_container_width=True)
+            render_chart(create_technician_jobs_chart, analytics_data['tech_performance'])
             
             # Export top techs
-            csv = StringIO()
-            analytics_data['tech_performance'].to_csv(csv, index=False)
-            st.download_button(
-                label="📥 Download Top Technicians",
-                data=csv.getvalue(),
-                file_name="top_technicians.csv",
-                mime="text/csv"
-            )
+            download_export("📥 Download Top Technicians", "top_technicians",
+                            lambda frame=analytics_data['tech_performance']: [frame], key="export_top_technicians")
         else:
             st.info("No active technicians available for performance analysis.")
     
@@ -1530,23 +4081,11 @@ elif st.session_state.current_page == "Analytics":
         
         if not analytics_data['request_distribution'].empty:
             # Enhanced bar chart instead of pie for better readability
-            bar_chart = alt.Chart(analytics_data['request_distribution']).mark_bar(size=40).encode(
-                x=alt.X('Status:N', sort='-y'),
-                y='Count:Q',
-                color=alt.Color('Status:N', scale=alt.Scale(domain=['Pending', 'In Progress', 'Completed', 'Cancelled'], range=[COLORS['warning'], COLORS['accent'], COLORS['success'], COLORS['danger']])),
-                tooltip=['Status', 'Count']
-            ).properties(title='Service Request Status Distribution', height=350, width='container').interactive()
-            st.altair_chart(bar_chart, use_container_width=True)
+            render_chart(create_request_distribution_chart, analytics_data['request_distribution'])
             
             # Export distribution
-            csv = StringIO()
-            analytics_data['request_distribution'].to_csv(csv, index=False)
-            st.download_button(
-                label="📥 Download Request Distribution",
-                data=csv.getvalue(),
-                file_name="request_distribution.csv",
-                mime="text/csv"
-            )
+            download_export("📥 Download Request Distribution", "request_distribution",
+                            lambda frame=analytics_data['request_distribution']: [frame], key="export_request_distribution")
         else:
             st.info("No service requests available for distribution analysis.")
         
@@ -1565,40 +4104,17 @@ elif st.session_state.current_page == "Analytics":
     
     # Additional section for trends
     st.subheader("📉 Performance Trends")
-    trend_chart = create_performance_chart(performance_data)
-    st.altair_chart(trend_chart, use_container_width=True)
+    render_chart(create_performance_chart, performance_frame(performance_data))
 
 elif st.session_state.current_page == "Revenue":
     st.title("💰 Advanced Revenue Analytics")
     
-    performance_data = db.get_performance_data()
-    df = pd.DataFrame({
-        'Month': performance_data['months'],
-        'Revenue': performance_data['revenue'],
-        'New Clients': performance_data['new_clients']
-    })
+    granularity = st.radio("Granularity", ["Monthly", "Weekly"], horizontal=True)
+    performance_data = db.get_performance_data(granularity.lower(), 12, datetime.now().date())
+    df = performance_frame(performance_data)
     
     # Advanced revenue visualization using Altair
-    base = alt.Chart(df).encode(x='Month:O')
-    
-    revenue_line = base.mark_line(color=COLORS['primary'], strokeWidth=3).encode(
-        y=alt.Y('Revenue:Q', axis=alt.Axis(title='Revenue ($)', titleColor=COLORS['primary'])),
-        tooltip=['Month', 'Revenue']
-    )
-    
-    clients_bar = base.mark_bar(color=COLORS['accent'], opacity=0.6).encode(
-        y=alt.Y('New Clients:Q', axis=alt.Axis(title='New Clients', titleColor=COLORS['accent'])),
-        tooltip=['Month', 'New Clients']
-    )
-    
-    chart = alt.layer(revenue_line, clients_bar).resolve_scale(
-        y='independent'
-    ).properties(
-        title='Revenue Growth & Client Acquisition',
-        height=400
-    )
-    
-    st.altair_chart(chart, use_container_width=True)
+    render_chart(create_revenue_chart, df)
     
     # Revenue breakdown
     col1, col2 = st.columns(2)
@@ -1607,23 +4123,13 @@ elif st.session_state.current_page == "Revenue":
         st.dataframe(df, use_container_width=True)
         
         # Added export
-        csv = StringIO()
-        df.to_csv(csv, index=False)
-        st.download_button(
-            label="📥 Download Revenue Data",
-            data=csv.getvalue(),
-            file_name="revenue_data.csv",
-            mime="text/csv"
-        )
+        download_export("📥 Download Revenue Data", "revenue_data", lambda frame=df: [frame], key="export_revenue")
     
     with col2:
         st.subheader("🎯 Revenue Insights")
-        insights = [
-            {"period": "Current Month", "revenue": "$98,450", "growth": "+12%"},
-            {"period": "Quarter-to-Date", "revenue": "$285,600", "growth": "+8%"},
-            {"period": "Year-to-Date", "revenue": "$1,245,800", "growth": "+15%"},
-            {"period": "Projected Annual", "revenue": "$1,580,000", "growth": "+18%"}
-        ]
+        insights = db.get_revenue_insights(datetime.now().date())
+        if not insights:
+            st.info("No revenue data available yet.")
         
         for insight in insights:
             with st.container():
@@ -1639,7 +4145,7 @@ elif st.session_state.current_page == "Settings":
     st.title("⚙️ Enterprise System Configuration")
     
     # Settings in tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["🔧 General", "🔔 Notifications", "🔒 Security", "📊 Preferences"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["🔧 General", "🔔 Notifications", "🔒 Security", "📊 Preferences", "🗄️ Maintenance"])
     
     with tab1:
         st.subheader("General Settings")
@@ -1672,6 +4178,21 @@ elif st.session_state.current_page == "Settings":
         
         if st.button("💾 Save Notification Settings"):
             st.success("Notification preferences updated!")
+        
+        st.markdown("---")
+        st.subheader("Recent Notifications")
+        history = db.get_notifications(20, unread_only=False)
+        if history:
+            st.dataframe(
+                pd.DataFrame(history).assign(
+                    created_at=lambda d: d['created_at'].map(time_ago), is_read=lambda d: d['is_read'].astype(bool)
+                ).drop(columns='id'),
+                use_container_width=True, hide_index=True
+            )
+        st.caption(f"Keeps the newest {NOTIFICATION_RETENTION['max_rows']:,} notifications "
+                   f"from the last {NOTIFICATION_RETENTION['max_age_days']} days.")
+        if st.button("🧹 Prune Old Notifications"):
+            st.success(f"Removed {db.prune_notifications()} old notification(s).")
     
     with tab3:
         st.subheader("Security Configuration")
@@ -1699,6 +4220,83 @@ elif st.session_state.current_page == "Settings":
         
         if st.button("💾 Save Preferences"):
             st.success("User preferences saved!")
+    
+    with tab5:
+        st.subheader("Database Maintenance")
+        st.caption("Dashboard KPIs and analytics rollups are maintained incrementally by triggers. Rebuild them after bulk loads or manual edits to the database file.")
+        if st.button("🔁 Rebuild KPI Counters"):
+            if db.rebuild_kpi_counters():
+                st.success("KPI counters resynchronized!")
+            else:
+                st.error("🚨 Failed to rebuild KPI counters.")
+        if st.button("🔁 Rebuild Analytics Rollups"):
+            if db.rebuild_rollups():
+                st.success("Analytics rollups recomputed!")
+            else:
+                st.error("🚨 Failed to rebuild analytics rollups.")
+        
+        st.markdown("---")
+        st.subheader("Bulk Import")
+        st.caption("Load CSV or JSON Lines files (optionally gzipped). Technicians are matched on email and updated; "
+                   "invalid rows are skipped and listed below. Use `python admin.py import` for multi-million row files.")
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            import_table = st.selectbox("Target Table", list(IMPORT_COLUMNS))
+        with col2:
+            upload = st.file_uploader("Import File", type=["csv", "jsonl", "ndjson", "gz"])
+        if upload is not None and st.button("📤 Run Import"):
+            bar = st.progress(0.0, text="Importing...")
+            def show_progress(report):
+                bar.progress(min(upload.tell() / max(upload.size, 1), 1.0), text=f"{report.processed:,} rows processed")
+            try:
+                report = db.import_file(import_table, upload, name=upload.name, progress=show_progress)
+            except ValueError as e:
+                st.error(f"🚨 {e}")
+            else:
+                bar.progress(1.0, text="Import finished")
+                st.success(f"✅ {report.inserted:,} inserted, {report.updated:,} updated, {report.skipped:,} skipped "
+                           f"({report.rows_per_second:,.0f} rows/s)")
+                if report.errors:
+                    st.dataframe(pd.DataFrame(report.errors, columns=['Line', 'Problem']), use_container_width=True, hide_index=True)
+        
+        st.markdown("---")
+        pool = db.pool_stats()
+        if pool:
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Readers In Use", f"{pool['in_use']}/{pool['max_readers']}")
+            with col2:
+                st.metric("Idle Readers", pool['idle'])
+            with col3:
+                st.metric("Pool Waits", pool['waits'])
+            with col4:
+                st.metric("Write Transactions", pool['writes'])
+        
+        cache = db.cache_stats()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Cached Results", cache['entries'])
+        with col2:
+            st.metric("Cache Hits", cache['hits'])
+        with col3:
+            st.metric("Cache Misses", cache['misses'])
+        
+        st.markdown("---")
+        st.caption("Explains every query issued by the dashboard's read methods and flags full table scans.")
+        if st.button("🔍 Run Query Plan Audit"):
+            audit = pd.DataFrame(db.audit_query_plans())
+            if audit.empty:
+                st.info("No queries captured.")
+            else:
+                scans = int(audit['full_scan'].sum())
+                ranges = int(audit['range_unindexed'].sum())
+                if scans:
+                    st.warning(f"⚠️ {scans} of {len(audit)} queries perform a full table scan.")
+                if ranges:
+                    st.warning(f"⚠️ {ranges} of {len(audit)} queries filter a range their index doesn't cover.")
+                if not scans and not ranges:
+                    st.success(f"✅ All {len(audit)} queries use indexes.")
+                st.dataframe(audit, use_container_width=True, hide_index=True)
 
 # Enhanced Enterprise Footer
 st.markdown("---")
@@ -1721,6 +4319,6 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
-# Close DB connection
+# Return this run's reader connection to the shared pool (the manager itself stays cached)
 if 'db' in globals():
-    db.close()
\ No newline at end of file
+    db.release_connection()
\ No newline at end of file
@@ -2,8 +2,10 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import uuid
-import time
+import os
 from chatbot import Chatbot
+from marketplace_store import MarketplaceStore, ORDER_SORTS
+from order_pipeline import OrderPipeline, TRANSIENT_STATUSES, STATUS_PAYMENT_FAILED
 
 # -----------------------------
 # Page Config
@@ -480,27 +482,29 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # -----------------------------
-# Session State Initialization
+# Shared Store
 # -----------------------------
-if 'users' not in st.session_state:
-    st.session_state['users'] = [
-        {'email': 'user@example.com', 'password': 'user', 'role': 'user', 'name': 'Demo User'},
-        {'email': 'tech@example.com', 'password': 'tech', 'role': 'technical', 'name': 'Demo Technician'} 
-    ]
-
-if 'services' not in st.session_state:
-    st.session_state['services'] = [
-        {'id': 1, 'name': 'House Cleaning', 'category': 'Home', 'price': 50, 'description': 'Deep cleaning for living room, kitchen, and bath.', 'icon': '🧹'},
-        {'id': 2, 'name': 'Plumbing Repair', 'category': 'Maintenance', 'price': 80, 'description': 'Fix leaks and unclog drains.', 'icon': '🔧'},
-        {'id': 3, 'name': 'Tech Support', 'category': 'Tech', 'price': 60, 'description': 'Remote PC/Mac troubleshooting.', 'icon': '🖥️'},
-        {'id': 20, 'name': 'Mobile Mechanic', 'category': 'Auto', 'price': 90, 'description': 'Oil change and battery replacement at home.', 'icon': '🛠️'},
-        {'id': 23, 'name': 'Locksmith', 'category': 'Maintenance', 'price': 60, 'description': 'Emergency lockout or lock replacement.', 'icon': '🔐'},
-        {'id': 40, 'name': 'Home Lighting Installation', 'category': 'Maintenance', 'price': 80, 'description': 'Install ceiling lights and lamps.', 'icon': '💡'}
-    ]
-
-if 'orders' not in st.session_state:
-    st.session_state['orders'] = []
+@st.cache_resource
+def get_store():
+    """One store per process; users, services and orders are shared by every session."""
+    return MarketplaceStore(os.environ.get('MARKETPLACE_DB', 'marketplace.db'))
+
+@st.cache_resource
+def get_pipeline():
+    """Background job queue for payments and completions, shared by every session in the process."""
+    pipeline = OrderPipeline(get_store())
+    pipeline.recover()
+    return pipeline
+
+store = get_store()
+pipeline = get_pipeline()
+
+# Seconds between refreshes while an order is still being processed
+ORDER_POLL_SECONDS = 2
 
+# -----------------------------
+# Session State Initialization
+# -----------------------------
 if 'current_user' not in st.session_state:
     st.session_state['current_user'] = None
 
@@ -514,7 +518,7 @@ if 'selected_role_reg' not in st.session_state:
     st.session_state['selected_role_reg'] = 'user'
 
 if 'chatbot' not in st.session_state:
-    st.session_state['chatbot'] = Chatbot(st.session_state['services'])
+    st.session_state['chatbot'] = Chatbot(store.services.list())
 
 if 'chat_history' not in st.session_state:
     st.session_state['chat_history'] = []
@@ -530,27 +534,18 @@ def login(email, password):
     return False, None
 
 def check_login(email, password, role_to_check):
-    for user in st.session_state['users']:
-        if user.get('email') == email and user.get('password') == password and user.get('role') == role_to_check:
-            st.session_state['current_user'] = user
-            if role_to_check == 'user':
-                st.session_state['current_page'] = 'Services'
-            elif role_to_check == 'technical':
-                st.session_state['current_page'] = 'Pending Orders'
-            return True
+    user = store.users.authenticate(email, password, role_to_check)
+    if user:
+        st.session_state['current_user'] = user
+        if role_to_check == 'user':
+            st.session_state['current_page'] = 'Services'
+        elif role_to_check == 'technical':
+            st.session_state['current_page'] = 'Pending Orders'
+        return True
     return False
 
 def register(email, password, name, role):
-    for user in st.session_state['users']:
-        if user.get('email') == email:
-            return False
-    st.session_state['users'].append({
-        'email': email,
-        'password': password,
-        'role': role,
-        'name': name
-    })
-    return True
+    return store.users.add(email, password, name, role)
 
 def logout():
     st.session_state['current_user'] = None
@@ -754,15 +749,13 @@ def services_page():
     st.markdown("<h2 class='animate-enter' style='color: white;'>🔍 Explore All Services</h2>", unsafe_allow_html=True)
     
     # Filter
-    categories = ["All"] + sorted(list({s['category'] for s in st.session_state['services']}))
+    categories = ["All"] + store.services.categories()
     
     cat_col, _ = st.columns([0.4, 3]) 
     with cat_col:
         selected_cat = st.selectbox("Filter by Category", categories)
 
-    services = st.session_state['services']
-    if selected_cat != "All":
-        services = [s for s in services if s['category'] == selected_cat]
+    services = store.services.list(selected_cat if selected_cat != "All" else None)
 
     # Grid Layout
     cols = st.columns(3)
@@ -832,27 +825,21 @@ def service_details_page(service):
         submitted = st.form_submit_button("Confirm Booking")
         
         if submitted:
-            # Simulate processing
-            with st.spinner("Processing your request..."):
-                time.sleep(1.5)
-            
-            # Create order
+            # Create order; payment is processed in the background and the order shows as Processing until then
             order = {
                 'id': str(uuid.uuid4()),
                 'user_email': st.session_state['current_user']['email'],
                 'user_name': st.session_state['current_user']['name'],
+                'service_id': service['id'],
                 'service_name': service['name'],
                 'tech': selected_tech,
                 'date': date.strftime('%Y-%m-%d'),
-                'status': 'Pending',
-                'paid': True if "Online" in payment_method or "Wallet" in payment_method else False,
                 'payment_method': payment_method,
                 'notes': notes,
                 'price': service['price']
             }
-            st.session_state['orders'].append(order)
-            st.success("🎉 Booking Confirmed! Redirecting to orders...")
-            time.sleep(1)
+            pipeline.book(order)
+            st.toast("🎉 Booking received! We'll confirm it as soon as payment clears.")
             st.session_state['selected_service'] = None
             st.session_state['current_page'] = "My Orders"
             st.rerun()
@@ -866,26 +853,37 @@ def orders_page():
     st.markdown("<h2 class='animate-enter' style='color: white;'>📋 My Orders</h2>", unsafe_allow_html=True)
     
     user_email = st.session_state['current_user']['email']
-    my_orders = [o for o in st.session_state['orders'] if o['user_email'] == user_email]
+    my_orders = store.orders.for_user(user_email)
     
     if not my_orders:
         st.info("You haven't placed any orders yet.")
         return
 
-    for i, o in enumerate(reversed(my_orders)):
-        status_color = "#2ecc71" if o['status'] == 'Done' else ("#f1c40f" if o['status'] == 'Pending' else "#3498db")
-        st.markdown(f"""
-            <div class="animate-enter" style="background: rgba(30, 35, 60, 0.95); padding: 20px; border-radius: 15px; margin-bottom: 15px; border-left: 5px solid {status_color}; box-shadow: 0 5px 15px rgba(0,0,0,0.2); animation-delay: {i*0.1}s; border: 1px solid rgba(255,255,255,0.1);">
-                <div style="display: flex; justify-content: space-between; align-items: center;">
-                    <h3 style="margin: 0; color: white;">{o['service_name']}</h3>
-                    <span style="background: {status_color}20; color: {status_color}; padding: 5px 10px; border-radius: 10px; font-weight: bold; border: 1px solid {status_color};">{o['status']}</span>
+    # Poll while a background job is still working on one of the orders
+    in_flight = any(o['status'] in TRANSIENT_STATUSES for o in my_orders)
+
+    @st.fragment(run_every=ORDER_POLL_SECONDS if in_flight else None)
+    def order_list():
+        orders = store.orders.for_user(user_email)
+        if in_flight and not any(o['status'] in TRANSIENT_STATUSES for o in orders):
+            # Everything has settled: rerun the page so it stops polling
+            st.rerun()
+        for i, o in enumerate(orders):
+            status_color = "#2ecc71" if o['status'] == 'Done' else ("#f1c40f" if o['status'] == 'Pending' else ("#e74c3c" if o['status'] == STATUS_PAYMENT_FAILED else "#3498db"))
+            st.markdown(f"""
+                <div class="animate-enter" style="background: rgba(30, 35, 60, 0.95); padding: 20px; border-radius: 15px; margin-bottom: 15px; border-left: 5px solid {status_color}; box-shadow: 0 5px 15px rgba(0,0,0,0.2); animation-delay: {i*0.1}s; border: 1px solid rgba(255,255,255,0.1);">
+                    <div style="display: flex; justify-content: space-between; align-items: center;">
+                        <h3 style="margin: 0; color: white;">{o['service_name']}</h3>
+                        <span style="background: {status_color}20; color: {status_color}; padding: 5px 10px; border-radius: 10px; font-weight: bold; border: 1px solid {status_color};">{o['status']}</span>
+                    </div>
+                    <p style="color: #ffffff; margin: 10px 0;">
+                        📅 <b>Date:</b> {o['date']} &nbsp;|&nbsp; 👨‍🔧 <b>Tech:</b> {o['tech']} &nbsp;|&nbsp; 💳 <b>{o['payment_method']}</b>
+                    </p>
+                    <div style="font-size: 14px; color: #dcdcdc;">Order ID: {o['id']}</div>
                 </div>
-                <p style="color: #ffffff; margin: 10px 0;">
-                    📅 <b>Date:</b> {o['date']} &nbsp;|&nbsp; 👨‍🔧 <b>Tech:</b> {o['tech']} &nbsp;|&nbsp; 💳 <b>{o['payment_method']}</b>
-                </p>
-                <div style="font-size: 14px; color: #dcdcdc;">Order ID: {o['id']}</div>
-            </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
+
+    order_list()
 
 def technical_orders_page():
     # Security check: only technicals can see this
@@ -895,13 +893,53 @@ def technical_orders_page():
         
     st.markdown("<h2 class='animate-enter' style='color: white;'>🛠️ Pending Service Requests</h2>", unsafe_allow_html=True)
     
-    pending_orders = [o for o in st.session_state['orders'] if o['status'] == 'Pending']
+    tech_email = st.session_state['current_user']['email']
+    
+    # Jobs this technician has claimed
+    my_jobs = store.orders.claimed_by(tech_email, limit=50)
+    if my_jobs:
+        st.markdown(f"#### 🧰 My Jobs ({len(my_jobs)})")
+        for o in my_jobs:
+            order_id_short = o['id'].split('-')[0]
+            job_cols = st.columns([1, 2, 2, 1, 2])
+            job_cols[0].markdown(f"<div style='color: #a29bfe; font-weight: bold;'>{order_id_short}...</div>", unsafe_allow_html=True)
+            job_cols[1].markdown(f"**{o['service_name']}**")
+            job_cols[2].markdown(f"**{o['user_name']}** ({o['date']})")
+            job_cols[3].markdown(f"**${o['price']}**")
+            with job_cols[4]:
+                if st.button("Mark as Done", key=f"done_{o['id']}", use_container_width=True):
+                    if pipeline.complete(o['id'], expected_status='In Progress'):
+                        st.toast(f"Order {order_id_short}... is being completed.")
+                    else:
+                        st.toast(f"Order {order_id_short}... was already handled by someone else.")
+                    st.rerun()
+        st.markdown("---")
     
-    if not pending_orders:
+    total_pending = store.orders.count_by_status('Pending')
+    if not total_pending:
         st.success("🎉 No pending orders! Good job!")
         return
-
-    st.markdown(f"**Total Pending Orders:** {len(pending_orders)}")
+    
+    # Board controls: sorting and paging happen in SQL, so only one page of rows is rendered
+    ctrl_cols = st.columns([2, 1, 1])
+    with ctrl_cols[0]:
+        sort = st.selectbox("Sort By", list(ORDER_SORTS))
+    with ctrl_cols[1]:
+        page_size = st.selectbox("Orders per Page", [10, 25, 50, 100], index=1)
+    page_count = max(1, -(-total_pending // page_size))
+    with ctrl_cols[2]:
+        page = min(st.number_input("Page", min_value=1, value=1, step=1), page_count)
+    
+    claim_cols = st.columns([1, 2, 3])
+    with claim_cols[0]:
+        claim_count = st.number_input("Claim", min_value=1, max_value=100, value=5, label_visibility="collapsed")
+    with claim_cols[1]:
+        if st.button(f"Claim Next {claim_count}", use_container_width=True):
+            claimed = store.orders.claim_next(tech_email, claim_count, sort)
+            st.toast(f"Claimed {claimed} order(s).")
+            st.rerun()
+    
+    st.markdown(f"**Total Pending Orders:** {total_pending} &nbsp;|&nbsp; Page {page} of {page_count}")
     
     # Order display logic
     cols = st.columns([1, 2, 2, 2, 1, 2])
@@ -913,6 +951,7 @@ def technical_orders_page():
     cols[5].markdown("**Action**")
     st.markdown("---")
     
+    pending_orders = store.orders.page_by_status('Pending', sort, page_size, (page - 1) * page_size)
     for i, o in enumerate(pending_orders):
         order_id_short = o['id'].split('-')[0]
         
@@ -926,12 +965,10 @@ def technical_orders_page():
         
         with row_cols[5]:
             if st.button("Mark as Done", key=f"complete_{o['id']}", use_container_width=True):
-                for order in st.session_state['orders']:
-                    if order['id'] == o['id']:
-                        order['status'] = 'Done'
-                        break
-                st.toast(f"Order {order_id_short}... marked as Done!")
-                time.sleep(1)
+                if pipeline.complete(o['id'], expected_status='Pending'):
+                    st.toast(f"Order {order_id_short}... is being completed.")
+                else:
+                    st.toast(f"Order {order_id_short}... was already handled by someone else.")
                 st.rerun()
 
         st.markdown("<div style='margin-bottom: 10px; border-bottom: 1px solid rgba(255,255,255,0.05);'></div>", unsafe_allow_html=True)
@@ -1025,10 +1062,9 @@ def register_page():
                 elif password != confirm_password:
                     st.error("Passwords do not match.")
                 elif register(email, password, name, role):
-                    st.success(f"Registration successful! Please login as a **{role.capitalize()}**.")
+                    st.toast(f"Registration successful! Please login as a {role.capitalize()}.")
                     st.session_state['current_page'] = "Login"
                     st.session_state['selected_role_reg'] = 'user'
-                    time.sleep(1)
                     st.rerun()
                 else:
                     st.error("Email already exists. Please login or use a different email.")
@@ -1143,4 +1179,8 @@ def main():
         st.markdown("</div>", unsafe_allow_html=True)  # Close chatbot-container
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        # Hand this run's reader back to the pool, including runs ended early by st.rerun
+        store.release()
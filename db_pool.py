@@ -0,0 +1,192 @@
+"""
+SQLite connection pool shared by the admin dashboard (admin.py) and the marketplace store
+(marketplace_store.py).
+
+Both apps run many Streamlit sessions against one WAL-mode database file: reads use a
+connection checked out per thread from a bounded pool, and writes are serialized on a single
+connection.
+"""
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+# Per-connection pragmas applied by ConnectionPool; its pragmas argument overrides or adds to them
+# (cache_size is in KiB when negative)
+DB_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'cache_size': -8000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON'
+}
+
+class ConnectionPool:
+    """
+    Thread-aware SQLite connection pool for concurrent Streamlit sessions.
+    The database runs in WAL mode so readers never block the writer. Each script thread
+    checks out its own reader connection, and all writes go through a single connection
+    serialized by a lock.
+    A checkout is held in thread-local storage, so a thread that ends without calling
+    release() (a run cut short by st.rerun or st.stop, a fragment rerun) hands its
+    connection back as soon as the thread is gone.
+    """
+    def __init__(self, db_path, max_readers=24, busy_timeout_ms=5000, acquire_timeout=10.0, pragmas=None,
+                 row_factory=None):
+        self.db_path = db_path
+        self.max_readers = max_readers
+        self.busy_timeout_ms = busy_timeout_ms
+        self.acquire_timeout = acquire_timeout
+        self.pragmas = dict(DB_PRAGMAS, **(pragmas or {}))
+        self.row_factory = row_factory
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = []
+        self._in_use = set()
+        self._local = threading.local()
+        self._closed = False
+        self._writer_lock = threading.RLock()
+        self._writer_depth = 0
+        self._counters = {'created': 0, 'checkouts': 0, 'waits': 0, 'reclaimed': 0, 'writes': 0}
+        self._writer = self._open()
+        self._writer.execute("PRAGMA journal_mode = WAL")
+        self._external_version = self._writer.execute("PRAGMA data_version").fetchone()[0]
+
+    def _open(self):
+        """Opens a connection in autocommit mode with the configured pragmas."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        if self.row_factory is not None:
+            conn.row_factory = self.row_factory
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        self._counters['created'] += 1
+        return conn
+
+    def reader(self):
+        """Returns the calling thread's reader connection, checking one out of the pool if needed."""
+        lease = getattr(self._local, 'lease', None)
+        if lease is not None:
+            return lease.conn
+        with self._available:
+            deadline = time.monotonic() + self.acquire_timeout
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if len(self._in_use) < self.max_readers:
+                    conn = self._open()
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(f"connection pool exhausted ({self.max_readers} readers in use)")
+                self._counters['waits'] += 1
+                self._available.wait(remaining)
+            self._in_use.add(conn)
+            self._counters['checkouts'] += 1
+        lease = _ReaderLease(conn)
+        # Runs when the thread-local lease is dropped, i.e. when the owning thread has ended
+        lease.finalizer = weakref.finalize(lease, self._check_in, conn, True)
+        self._local.lease = lease
+        return conn
+
+    def _check_in(self, conn, reclaimed=False):
+        """Puts a checked-out connection back in the idle list and wakes one waiting reader."""
+        with self._available:
+            if self._closed or conn not in self._in_use:
+                return
+            self._in_use.discard(conn)
+            self._idle.append(conn)
+            if reclaimed:
+                self._counters['reclaimed'] += 1
+            self._available.notify()
+
+    def release(self):
+        """Returns the calling thread's reader connection to the pool."""
+        lease = self._local.__dict__.pop('lease', None)
+        if lease is not None:
+            lease.finalizer.detach()
+            self._check_in(lease.conn)
+
+    @contextmanager
+    def writer(self):
+        """
+        Serializes writes: yields the writer connection inside a transaction, committing on success.
+        A nested call from the thread already holding the writer runs in a savepoint of the outer
+        transaction, so it can roll back on its own but only commits with the outermost block.
+        """
+        with self._writer_lock:
+            if self._writer_depth:
+                savepoint = f"writer_{self._writer_depth}"
+                self._writer.execute(f"SAVEPOINT {savepoint}")
+                self._writer_depth += 1
+                try:
+                    yield self._writer
+                except BaseException:
+                    self._writer.execute(f"ROLLBACK TO {savepoint}")
+                    self._writer.execute(f"RELEASE {savepoint}")
+                    raise
+                finally:
+                    self._writer_depth -= 1
+                self._writer.execute(f"RELEASE {savepoint}")
+                return
+
+            self._writer.execute("BEGIN IMMEDIATE")
+            self._writer_depth = 1
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.execute("ROLLBACK")
+                raise
+            finally:
+                self._writer_depth = 0
+            self._writer.execute("COMMIT")
+            self._counters['writes'] += 1
+
+    def external_version(self):
+        """
+        Returns a number that changes whenever another process (the CLI, another Streamlit
+        worker) commits to the database. It is the writer's PRAGMA data_version, which ignores
+        the writer's own commits; while another thread holds the writer, the last value read is
+        returned and the change shows up on a later call.
+        """
+        if self._writer_lock.acquire(blocking=False):
+            try:
+                self._external_version = self._writer.execute("PRAGMA data_version").fetchone()[0]
+            finally:
+                self._writer_lock.release()
+        return self._external_version
+
+    def stats(self):
+        """Returns pool utilization counters."""
+        with self._lock:
+            return dict(
+                self._counters,
+                in_use=len(self._in_use),
+                idle=len(self._idle),
+                max_readers=self.max_readers,
+                utilization=round(len(self._in_use) / self.max_readers * 100, 1)
+            )
+
+    def close(self):
+        """Closes every pooled connection."""
+        with self._lock:
+            for conn in self._idle + list(self._in_use) + [self._writer]:
+                conn.close()
+            self._idle.clear()
+            self._in_use.clear()
+            self._closed = True
+
+class _ReaderLease:
+    """A thread's checkout of a ConnectionPool reader; see ConnectionPool.reader."""
+    __slots__ = ('conn', 'finalizer', '__weakref__')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.finalizer = None
@@ -0,0 +1,337 @@
+"""
+Persistent storage for the Service Connect marketplace (app.py).
+
+Users, services and orders live in one SQLite database in WAL mode, so every Streamlit
+session and worker process sees the same marketplace, and a session only holds the rows
+it is currently rendering. The schema follows the conventions of admin.py's
+ProfessionalDBManager: TEXT timestamps in a fixed-width ISO format, indexes declared in
+SCHEMA_INDEXES, and connections come from the same db_pool.ConnectionPool: reads on a bounded
+pool of per-thread connections and writes serialized on one connection.
+"""
+import sqlite3
+import logging
+import hashlib
+import secrets
+from datetime import datetime
+
+from db_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Storage format for marketplace created_at columns: fixed-width ISO so string order equals
+# time order. Unlike admin.py's minute-resolution DB_DATETIME_FORMAT it keeps seconds, which
+# orders placed in the same minute need to sort in the order they were booked.
+STORE_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Secondary indexes for the per-user and per-status order lookups: (index name, table, indexed columns)
+SCHEMA_INDEXES = [
+    ('idx_orders_user_created', 'orders', 'user_email, created_at'),
+    ('idx_orders_status_created', 'orders', 'status, created_at'),
+    ('idx_orders_status_date', 'orders', 'status, date'),
+    ('idx_orders_status_price', 'orders', 'status, price'),
+    ('idx_orders_status_service', 'orders', 'status, service_name'),
+    ('idx_orders_claimed', 'orders', 'claimed_by, status'),
+    ('idx_services_category', 'services', 'category')
+]
+
+# Board sort options: label -> ORDER BY clause. Each leads with a column indexed together with
+# status, so a page of one status is read in order instead of sorting the whole backlog.
+ORDER_SORTS = {
+    'Oldest First': 'created_at, id',
+    'Preferred Date': 'date, created_at',
+    'Highest Price': 'price DESC, created_at',
+    'Lowest Price': 'price, created_at',
+    'Service': 'service_name, created_at'
+}
+
+# Accounts and catalog entries created with an empty database
+DEMO_USERS = [
+    {'email': 'user@example.com', 'password': 'user', 'role': 'user', 'name': 'Demo User'},
+    {'email': 'tech@example.com', 'password': 'tech', 'role': 'technical', 'name': 'Demo Technician'}
+]
+DEMO_SERVICES = [
+    {'id': 1, 'name': 'House Cleaning', 'category': 'Home', 'price': 50, 'description': 'Deep cleaning for living room, kitchen, and bath.', 'icon': '🧹'},
+    {'id': 2, 'name': 'Plumbing Repair', 'category': 'Maintenance', 'price': 80, 'description': 'Fix leaks and unclog drains.', 'icon': '🔧'},
+    {'id': 3, 'name': 'Tech Support', 'category': 'Tech', 'price': 60, 'description': 'Remote PC/Mac troubleshooting.', 'icon': '🖥️'},
+    {'id': 20, 'name': 'Mobile Mechanic', 'category': 'Auto', 'price': 90, 'description': 'Oil change and battery replacement at home.', 'icon': '🛠️'},
+    {'id': 23, 'name': 'Locksmith', 'category': 'Maintenance', 'price': 60, 'description': 'Emergency lockout or lock replacement.', 'icon': '🔐'},
+    {'id': 40, 'name': 'Home Lighting Installation', 'category': 'Maintenance', 'price': 80, 'description': 'Install ceiling lights and lamps.', 'icon': '💡'}
+]
+
+# PBKDF2 iterations for stored passwords
+PASSWORD_ITERATIONS = 120000
+
+def hash_password(password, salt=None):
+    """Returns 'salt$hash' for a password; pass the stored salt to re-derive it."""
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(salt), PASSWORD_ITERATIONS)
+    return f"{salt}${digest.hex()}"
+
+def verify_password(password, stored):
+    """Checks a password against a value produced by hash_password."""
+    salt, _, _ = stored.partition('$')
+    return secrets.compare_digest(hash_password(password, salt), stored)
+
+class MarketplaceStore:
+    """
+    Owns the marketplace database: schema, seeding and connections. Reads use a connection
+    checked out of a db_pool.ConnectionPool for the calling thread; it goes back to the pool
+    on release() or when the thread ends. Writes go through writer(), which serializes them
+    on a single connection inside BEGIN IMMEDIATE so concurrent worker processes queue on
+    SQLite's lock instead of failing.
+    """
+    def __init__(self, db_path="marketplace.db", busy_timeout_ms=5000, seed=True, max_readers=24,
+                 acquire_timeout=10.0):
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, max_readers=max_readers, busy_timeout_ms=busy_timeout_ms,
+                                   acquire_timeout=acquire_timeout, row_factory=sqlite3.Row)
+        self._create_tables()
+        if seed:
+            self.seed_if_empty()
+        self.users = UserRepository(self)
+        self.services = ServiceRepository(self)
+        self.orders = OrderRepository(self)
+
+    @property
+    def conn(self):
+        """Reader connection of the calling thread, checked out of the pool on first use."""
+        return self.pool.reader()
+
+    def release(self):
+        """Returns the calling thread's reader connection to the pool; call at the end of a run."""
+        self.pool.release()
+
+    def writer(self):
+        """Yields the writer connection inside a transaction, committing on success."""
+        return self.pool.writer()
+
+    def _create_tables(self):
+        """Creates the marketplace tables and indexes if they don't exist."""
+        with self.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    email TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    password_hash TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS services (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    category TEXT,
+                    price REAL NOT NULL,
+                    description TEXT,
+                    icon TEXT
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS orders (
+                    id TEXT PRIMARY KEY,
+                    user_email TEXT NOT NULL REFERENCES users(email),
+                    user_name TEXT,
+                    service_id INTEGER REFERENCES services(id),
+                    service_name TEXT NOT NULL,
+                    tech TEXT,
+                    date TEXT,
+                    status TEXT NOT NULL DEFAULT 'Pending',
+                    paid INTEGER NOT NULL DEFAULT 0,
+                    payment_method TEXT,
+                    notes TEXT,
+                    price REAL,
+                    created_at TEXT NOT NULL,
+                    claimed_by TEXT,
+                    payment_reference TEXT
+                )
+            ''')
+            for name, table, columns in SCHEMA_INDEXES:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        logger.info("Marketplace tables created or verified.")
+
+    def seed_if_empty(self):
+        """Adds the demo accounts and service catalog to an empty database."""
+        with self.writer() as conn:
+            cursor = conn.cursor()
+            if cursor.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
+                now = datetime.now().strftime(STORE_DATETIME_FORMAT)
+                cursor.executemany(
+                    "INSERT INTO users (email, name, role, password_hash, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(u['email'], u['name'], u['role'], hash_password(u['password']), now) for u in DEMO_USERS]
+                )
+            if cursor.execute("SELECT COUNT(*) FROM services").fetchone()[0] == 0:
+                cursor.executemany(
+                    "INSERT INTO services (id, name, category, price, description, icon) "
+                    "VALUES (:id, :name, :category, :price, :description, :icon)",
+                    DEMO_SERVICES
+                )
+
+    def close(self):
+        """Closes the writer and every pooled reader connection."""
+        self.pool.close()
+
+class UserRepository:
+    """Accounts keyed by email."""
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, email):
+        """Returns the user as a dict (without the password hash), or None."""
+        row = self.store.conn.execute(
+            "SELECT email, name, role FROM users WHERE email = ?", (email,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def authenticate(self, email, password, role=None):
+        """Returns the user if the password matches (and the role, when given), else None."""
+        row = self.store.conn.execute(
+            "SELECT email, name, role, password_hash FROM users WHERE email = ?", (email,)
+        ).fetchone()
+        if row is None or (role and row['role'] != role) or not verify_password(password, row['password_hash']):
+            return None
+        return {'email': row['email'], 'name': row['name'], 'role': row['role']}
+
+    def add(self, email, password, name, role):
+        """Creates an account; returns False if the email is already registered."""
+        try:
+            with self.store.writer() as conn:
+                conn.execute(
+                    "INSERT INTO users (email, name, role, password_hash, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (email, name, role, hash_password(password), datetime.now().strftime(STORE_DATETIME_FORMAT))
+                )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+class ServiceRepository:
+    """The bookable service catalog."""
+    def __init__(self, store):
+        self.store = store
+
+    def list(self, category=None):
+        """Returns services as dicts, optionally limited to one category."""
+        if category:
+            rows = self.store.conn.execute(
+                "SELECT * FROM services WHERE category = ? ORDER BY id", (category,)
+            ).fetchall()
+        else:
+            rows = self.store.conn.execute("SELECT * FROM services ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def categories(self):
+        """Returns the distinct service categories in alphabetical order."""
+        rows = self.store.conn.execute(
+            "SELECT DISTINCT category FROM services WHERE category IS NOT NULL ORDER BY category"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, service_id):
+        """Returns one service by id, or None."""
+        row = self.store.conn.execute("SELECT * FROM services WHERE id = ?", (service_id,)).fetchone()
+        return dict(row) if row else None
+
+class OrderRepository:
+    """
+    Bookings. Every lookup goes through an index: id (the primary key), customer email
+    and status, so its cost depends on the rows returned, not on the total order count.
+    """
+    COLUMNS = ('id', 'user_email', 'user_name', 'service_id', 'service_name', 'tech', 'date',
+               'status', 'paid', 'payment_method', 'notes', 'price', 'created_at', 'claimed_by',
+               'payment_reference')
+
+    def __init__(self, store):
+        self.store = store
+
+    def _rows(self, sql, params=()):
+        rows = self.store.conn.execute(sql, params).fetchall()
+        return [dict(row, paid=bool(row['paid'])) for row in rows]
+
+    def add(self, order):
+        """Stores a new order dict; created_at defaults to now."""
+        record = {column: order.get(column) for column in self.COLUMNS}
+        record['created_at'] = record['created_at'] or datetime.now().strftime(STORE_DATETIME_FORMAT)
+        record['status'] = record['status'] or 'Pending'
+        record['paid'] = int(bool(record['paid']))
+        with self.store.writer() as conn:
+            conn.execute(
+                f"INSERT INTO orders ({', '.join(self.COLUMNS)}) VALUES ({', '.join(':' + c for c in self.COLUMNS)})",
+                record
+            )
+        return record['id']
+
+    def for_user(self, user_email, limit=None):
+        """Returns a customer's orders, newest first."""
+        return self._rows(
+            "SELECT * FROM orders WHERE user_email = ? ORDER BY created_at DESC LIMIT ?",
+            (user_email, limit or -1)
+        )
+
+    def by_status(self, status, limit=None):
+        """Returns orders in the given status, oldest first."""
+        return self._rows(
+            "SELECT * FROM orders WHERE status = ? ORDER BY created_at LIMIT ?",
+            (status, limit or -1)
+        )
+
+    def page_by_status(self, status, sort='Oldest First', limit=25, offset=0):
+        """Returns one page of orders in the given status, ordered server-side by an ORDER_SORTS entry."""
+        return self._rows(
+            f"SELECT * FROM orders WHERE status = ? ORDER BY {ORDER_SORTS[sort]} LIMIT ? OFFSET ?",
+            (status, limit, offset)
+        )
+
+    def claimed_by(self, tech_email, status='In Progress', limit=None):
+        """Returns the orders a technician has claimed and not yet finished, oldest first."""
+        return self._rows(
+            "SELECT * FROM orders WHERE claimed_by = ? AND status = ? ORDER BY created_at LIMIT ?",
+            (tech_email, status, limit or -1)
+        )
+
+    def claim_next(self, tech_email, count, sort='Oldest First'):
+        """
+        Moves the first `count` pending orders (in board order) to In Progress for a technician
+        in one transaction; orders claimed concurrently by someone else are skipped. Returns the
+        number claimed.
+        """
+        with self.store.writer() as conn:
+            cursor = conn.execute(f"""
+                UPDATE orders SET status = 'In Progress', claimed_by = ?
+                WHERE id IN (
+                    SELECT id FROM orders WHERE status = 'Pending' ORDER BY {ORDER_SORTS[sort]} LIMIT ?
+                )
+            """, (tech_email, count))
+        return cursor.rowcount
+
+    def count_by_status(self, status):
+        """Number of orders in the given status, counted off the status index."""
+        return self.store.conn.execute("SELECT COUNT(*) FROM orders WHERE status = ?", (status,)).fetchone()[0]
+
+    def get(self, order_id):
+        """Returns one order by id, or None."""
+        rows = self._rows("SELECT * FROM orders WHERE id = ?", (order_id,))
+        return rows[0] if rows else None
+
+    def set_status(self, order_id, status, expected_status=None):
+        """
+        Updates an order's status through its primary key. With expected_status the update only
+        applies while the order is still in that status, so two technicians cannot both complete
+        the same order. Returns False if nothing was updated.
+        """
+        return self.transition(order_id, expected_status, status)
+
+    def transition(self, order_id, expected_status, status, **fields):
+        """Sets status (and any other order columns) only while the order is in expected_status."""
+        unknown = set(fields) - set(self.COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown order column(s): {', '.join(sorted(unknown))}")
+        if 'paid' in fields:
+            fields['paid'] = int(bool(fields['paid']))
+        assignments = ', '.join(['status = ?'] + [f"{column} = ?" for column in fields])
+        with self.store.writer() as conn:
+            cursor = conn.execute(
+                f"UPDATE orders SET {assignments} WHERE id = ? AND (? IS NULL OR status = ?)",
+                [status, *fields.values(), order_id, expected_status, expected_status]
+            )
+        return cursor.rowcount > 0
@@ -0,0 +1,188 @@
+"""
+Background processing for marketplace orders (app.py).
+
+Booking and completion return to the Streamlit script as soon as the order row is written
+in a transient status; a thread pool then charges or settles the order and moves it on.
+The script thread never waits on payment processing, so one worker can take bookings as
+fast as it can render pages.
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Order lifecycle: Processing -> Charging -> Pending (or Payment Failed) -> In Progress ->
+# Completing -> Settling -> Done. Charging and Settling are claimed by a guarded update before
+# the payment call, so only one job (in any process) ever starts it for an order.
+STATUS_PROCESSING = 'Processing'
+STATUS_CHARGING = 'Charging'
+STATUS_PENDING = 'Pending'
+STATUS_PAYMENT_FAILED = 'Payment Failed'
+STATUS_COMPLETING = 'Completing'
+STATUS_SETTLING = 'Settling'
+STATUS_DONE = 'Done'
+# Statuses a job will move on shortly; pages showing them poll for the update
+TRANSIENT_STATUSES = (STATUS_PROCESSING, STATUS_CHARGING, STATUS_COMPLETING, STATUS_SETTLING)
+
+# Payment methods charged at booking time; anything else is settled when the job is done
+ONLINE_PAYMENT_METHODS = ('Credit Card (Online)', 'Digital Wallet')
+
+# Attempts per payment call when the provider errors (as opposed to declining), and the
+# delay before the first retry, doubled for each later one
+PAYMENT_ATTEMPTS = 3
+PAYMENT_RETRY_DELAY = 0.5
+
+class LocalPaymentProcessor:
+    """
+    Stand-in for a payment provider. Charges succeed for any positive amount after `latency`
+    seconds, which models the provider round trip on the job thread rather than the script thread.
+    Like a real provider, calls are idempotent on idempotency_key: repeating one returns the
+    original reference instead of taking the money twice. This stand-in only remembers keys
+    within its own process; a real provider does so across every client.
+    """
+    def __init__(self, latency=1.5):
+        self.latency = latency
+        self._references = {}
+        self._lock = threading.Lock()
+
+    def _once(self, idempotency_key, prefix):
+        with self._lock:
+            return self._references.setdefault(idempotency_key, f"{prefix}_{uuid.uuid4().hex[:12]}")
+
+    def charge(self, order, idempotency_key):
+        """Returns a payment reference, or raises ValueError if the charge is declined."""
+        time.sleep(self.latency)
+        if not order.get('price') or order['price'] <= 0:
+            raise ValueError(f"invalid amount {order.get('price')!r}")
+        return self._once(f"charge:{idempotency_key}", "pay")
+
+    def settle(self, order, idempotency_key):
+        """Records cash collected on completion; returns a payment reference."""
+        time.sleep(self.latency / 3)
+        return self._once(f"settle:{idempotency_key}", "cash")
+
+class OrderPipeline:
+    """
+    Runs booking and completion jobs on a thread pool. Every transition is guarded by the
+    order's current status, and a job claims the order (Charging/Settling) in the database
+    before calling the payment provider, so concurrent jobs in other processes skip it.
+    Payment calls carry the order id as idempotency key, so resuming an order left mid-call
+    by a crash cannot take the money twice either.
+    """
+    def __init__(self, store, payments=None, max_workers=8):
+        self.store = store
+        self.payments = payments or LocalPaymentProcessor()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order-job")
+        self._inflight = set()
+        self._lock = threading.Lock()
+
+    def _submit(self, job, order_id):
+        """Queues job(order_id) unless one is already running for that order in this process."""
+        with self._lock:
+            if order_id in self._inflight:
+                return
+            self._inflight.add(order_id)
+        self._executor.submit(self._run, job, order_id)
+
+    def _run(self, job, order_id):
+        try:
+            job(order_id)
+        except Exception:
+            logger.exception(f"Order job {job.__name__} failed for {order_id}")
+        finally:
+            # Pool threads are long-lived; don't let each one pin a reader between jobs
+            self.store.release()
+            with self._lock:
+                self._inflight.discard(order_id)
+
+    def book(self, order):
+        """Stores the order as Processing and queues its payment; returns the order id immediately."""
+        order = dict(order, status=STATUS_PROCESSING, paid=False)
+        order_id = self.store.orders.add(order)
+        self._submit(self._process_booking, order_id)
+        return order_id
+
+    def complete(self, order_id, expected_status):
+        """Moves the order to Completing and queues settlement; False if its status had changed."""
+        if not self.store.orders.set_status(order_id, STATUS_COMPLETING, expected_status=expected_status):
+            return False
+        self._submit(self._process_completion, order_id)
+        return True
+
+    def _pay(self, call, order, claimed_status, status):
+        """
+        Makes a payment call for an order claimed in claimed_status and moves it on to status,
+        or to Payment Failed if the payment is declined or the provider keeps erroring.
+        """
+        order_id = order['id']
+        for attempt in range(PAYMENT_ATTEMPTS):
+            try:
+                reference = call(order, idempotency_key=order_id)
+                break
+            except ValueError as e:
+                logger.warning(f"Payment declined for order {order_id}: {e}")
+            except Exception:
+                if attempt + 1 < PAYMENT_ATTEMPTS:
+                    logger.warning(f"Payment provider error for order {order_id}; retrying", exc_info=True)
+                    time.sleep(PAYMENT_RETRY_DELAY * 2 ** attempt)
+                    continue
+                logger.exception(f"Payment provider failed for order {order_id}")
+            self.store.orders.transition(order_id, claimed_status, STATUS_PAYMENT_FAILED)
+            return
+        self.store.orders.transition(order_id, claimed_status, status, paid=True, payment_reference=reference)
+
+    def _process_booking(self, order_id):
+        order = self.store.orders.get(order_id)
+        if order is None:
+            return
+        if order['status'] == STATUS_PROCESSING:
+            if order['payment_method'] not in ONLINE_PAYMENT_METHODS:
+                self.store.orders.transition(order_id, STATUS_PROCESSING, STATUS_PENDING)
+                return
+            if not self.store.orders.transition(order_id, STATUS_PROCESSING, STATUS_CHARGING):
+                return
+        elif order['status'] != STATUS_CHARGING:
+            return
+        self._pay(self.payments.charge, order, STATUS_CHARGING, STATUS_PENDING)
+
+    def _process_completion(self, order_id):
+        order = self.store.orders.get(order_id)
+        if order is None:
+            return
+        if order['status'] == STATUS_COMPLETING:
+            if order['paid']:
+                self.store.orders.transition(order_id, STATUS_COMPLETING, STATUS_DONE)
+                return
+            if not self.store.orders.transition(order_id, STATUS_COMPLETING, STATUS_SETTLING):
+                return
+        elif order['status'] != STATUS_SETTLING:
+            return
+        self._pay(self.payments.settle, order, STATUS_SETTLING, STATUS_DONE)
+
+    def recover(self):
+        """
+        Requeues orders left in a transient status, e.g. by a restarted worker; returns how many.
+        Orders left in Charging or Settling resume their payment call under the same
+        idempotency key.
+        """
+        jobs = {
+            STATUS_PROCESSING: self._process_booking,
+            STATUS_CHARGING: self._process_booking,
+            STATUS_COMPLETING: self._process_completion,
+            STATUS_SETTLING: self._process_completion
+        }
+        recovered = 0
+        for status, job in jobs.items():
+            for order in self.store.orders.by_status(status):
+                self._submit(job, order['id'])
+                recovered += 1
+        if recovered:
+            logger.info(f"Requeued {recovered} in-flight order job(s)")
+        return recovered
+
+    def shutdown(self, wait=True):
+        """Stops accepting jobs; with wait, blocks until queued jobs finish."""
+        self._executor.shutdown(wait=wait)
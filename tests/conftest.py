@@ -0,0 +1,27 @@
+import importlib.util
+import logging
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# The app modules live at the repository root rather than in a package
+sys.path.insert(0, str(ROOT))
+
+@pytest.fixture(scope="session")
+def admin(tmp_path_factory):
+    """admin.py loaded as a module, running against a throwaway database directory."""
+    workdir = tmp_path_factory.mktemp("admin")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    logging.disable(logging.WARNING)
+    try:
+        spec = importlib.util.spec_from_file_location("admin", ROOT / "admin.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        logging.disable(logging.NOTSET)
+        os.chdir(cwd)
+    return module
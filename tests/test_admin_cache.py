@@ -0,0 +1,28 @@
+import sqlite3
+
+def test_cached_reads_see_commits_from_other_processes(admin, tmp_path):
+    path = str(tmp_path / "cache.db")
+    manager = admin.ProfessionalDBManager(path)
+    try:
+        before = len(manager.get_technicians_data())
+        assert len(manager.get_technicians_data()) == before
+        # Stands in for the CLI or another Streamlit worker writing to the same file
+        other = sqlite3.connect(path)
+        with other:
+            other.execute("INSERT INTO technicians (name, email) VALUES ('Outside', 'outside@example.com')")
+        other.close()
+        assert len(manager.get_technicians_data()) == before + 1
+    finally:
+        manager.close()
+
+def test_own_writes_keep_unrelated_entries_cached(admin, tmp_path):
+    manager = admin.ProfessionalDBManager(str(tmp_path / "cache.db"))
+    try:
+        manager.get_technicians_data()
+        with manager.pool.writer() as conn:
+            conn.execute("UPDATE support_tickets SET status = status")
+        hits = manager.cache_stats()['hits']
+        manager.get_technicians_data()
+        assert manager.cache_stats()['hits'] == hits + 1
+    finally:
+        manager.close()
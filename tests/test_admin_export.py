@@ -0,0 +1,31 @@
+import gzip
+import io
+
+import pandas as pd
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+CHUNKS = [
+    pd.DataFrame({'id': [1, 2], 'name': ['Ann', 'Bob'], 'notes': [None, None]}),
+    pd.DataFrame({'id': [3], 'name': ['Cy'], 'notes': ['late']})
+]
+
+def read_back(data, fmt):
+    if fmt == 'Parquet':
+        return pd.read_parquet(io.BytesIO(data))
+    if fmt == 'CSV (gzip)':
+        data = gzip.decompress(data)
+    return pd.read_csv(io.BytesIO(data))
+
+@pytest.mark.parametrize("fmt", ['CSV', 'CSV (gzip)', 'Parquet'])
+def test_export_is_accepted_by_download_button(admin, fmt):
+    if fmt not in admin.EXPORT_FORMATS:
+        pytest.skip(f"{fmt} export needs pyarrow")
+    data = admin.write_export(iter(CHUNKS), fmt)
+    converted, _ = convert_data_to_bytes_and_infer_mime(data, TypeError("unsupported"))
+    frame = read_back(converted, fmt)
+    assert frame['id'].tolist() == [1, 2, 3]
+    assert frame['name'].tolist() == ['Ann', 'Bob', 'Cy']
+
+def test_export_of_no_rows_is_empty(admin):
+    assert admin.write_export(iter([]), 'CSV') == b''
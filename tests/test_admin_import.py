@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+@pytest.fixture
+def manager(admin, tmp_path):
+    manager = admin.ProfessionalDBManager(str(tmp_path / "import.db"), seed=False)
+    yield manager
+    manager.close()
+
+def write_lines(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+def test_malformed_json_line_is_skipped_and_reported(manager, tmp_path):
+    source = write_lines(tmp_path / "tickets.jsonl", [
+        json.dumps({'client_name': 'Ann', 'issue': 'No heat'}),
+        '{"client_name": "Bob", ',
+        json.dumps({'client_name': 'Cy', 'issue': 'Leak'})
+    ])
+    report = manager.import_file('support_tickets', str(source))
+    assert (report.inserted, report.skipped) == (2, 1)
+    assert [line for line, _ in report.errors] == [2]
+    assert 'invalid JSON' in report.errors[0][1]
+
+def test_non_object_json_line_is_skipped_and_reported(manager, tmp_path):
+    source = write_lines(tmp_path / "tickets.jsonl", [
+        '[1, 2]',
+        '"just text"',
+        json.dumps({'client_name': 'Ann', 'issue': 'No heat'})
+    ])
+    report = manager.import_file('support_tickets', str(source))
+    assert (report.inserted, report.skipped) == (1, 2)
+    assert [line for line, _ in report.errors] == [1, 2]
+    assert 'got list' in report.errors[0][1]
+
+def test_unknown_technician_references_are_reported_per_line(manager, tmp_path):
+    manager.bulk_import('technicians', [(1, {'name': 'Ann', 'email': 'ann@example.com'})])
+    tech_id = manager.conn.execute("SELECT id FROM technicians WHERE email = 'ann@example.com'").fetchone()[0]
+    source = write_lines(tmp_path / "requests.jsonl", [
+        json.dumps({'client_name': 'A', 'assigned_tech_id': tech_id}),
+        json.dumps({'client_name': 'B', 'assigned_tech_id': 9999}),
+        json.dumps({'client_name': 'C', 'assigned_tech_email': 'nobody@example.com'}),
+        json.dumps({'client_name': 'D', 'assigned_tech_email': 'ann@example.com'}),
+        json.dumps({'client_name': 'E'})
+    ])
+    report = manager.import_file('service_requests', str(source))
+    assert (report.inserted, report.skipped) == (3, 2)
+    assert [line for line, _ in report.errors] == [2, 3]
+    assigned = manager.conn.execute(
+        "SELECT client_name, assigned_tech_id FROM service_requests ORDER BY client_name"
+    ).fetchall()
+    assert [tuple(row) for row in assigned] == [('A', tech_id), ('D', tech_id), ('E', None)]
+
+def test_imported_technicians_get_form_defaults(manager):
+    manager.bulk_import('technicians', [(1, {'name': 'Ann', 'email': 'ann@example.com'})])
+    row = manager.conn.execute(
+        "SELECT status, hourly_rate, experience FROM technicians WHERE email = 'ann@example.com'"
+    ).fetchone()
+    assert tuple(row) == ('Pending', 0, 'Not specified')
+
+def test_edit_form_tolerates_unknown_and_missing_choices(admin):
+    assert admin.select_options(admin.TECHNICIAN_LOCATIONS, 'Mars Base') == (admin.TECHNICIAN_LOCATIONS + ['Mars Base'], 5)
+    assert admin.select_options(admin.TECHNICIAN_LOCATIONS, None) == (admin.TECHNICIAN_LOCATIONS, None)
+    assert admin.value_or(float('nan'), 0) == 0
+
+def test_reimporting_unchanged_technicians_writes_nothing(manager):
+    record = {'name': 'Ann', 'email': 'ann@example.com', 'hourly_rate': 200}
+    manager.bulk_import('technicians', [(1, record)])
+    report = manager.bulk_import('technicians', [(1, dict(record))])
+    assert report.updated == 1
+    assert manager.conn.execute("SELECT version FROM technicians").fetchone()[0] == 1
+    manager.bulk_import('technicians', [(1, dict(record, hourly_rate=250))])
+    row = manager.conn.execute("SELECT name, hourly_rate, version FROM technicians").fetchone()
+    assert tuple(row) == ('Ann', 250, 2)
+
+def test_fractional_integers_are_rejected(manager):
+    report = manager.bulk_import('support_tickets', [
+        (2, {'client_name': 'Ann', 'resolution_time': '3.7'}),
+        (3, {'client_name': 'Bob', 'resolution_time': '4.0'})
+    ])
+    assert (report.inserted, report.skipped) == (1, 1)
+    assert report.errors[0][0] == 2 and 'resolution_time' in report.errors[0][1]
+    assert manager.conn.execute("SELECT resolution_time FROM support_tickets").fetchone()[0] == 4
+
+def test_bulk_import_does_not_log_activity(manager):
+    before = manager.conn.execute("SELECT COUNT(*) FROM activity_events").fetchone()[0]
+    manager.bulk_import('support_tickets', [(line, {'client_name': f'Client {line}'}) for line in range(1, 201)])
+    assert manager.conn.execute("SELECT COUNT(*) FROM activity_events").fetchone()[0] == before
+    assert manager.conn.execute("SELECT muted FROM activity_control").fetchone()[0] == 0
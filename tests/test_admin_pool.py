@@ -0,0 +1,28 @@
+import threading
+
+def run_in_thread(target):
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+
+def test_reader_of_finished_thread_returns_to_pool(admin, tmp_path):
+    pool = admin.ConnectionPool(str(tmp_path / "pool.db"), max_readers=1, acquire_timeout=1)
+    try:
+        # Threads that end without release(), like a script run cut short by st.rerun
+        for _ in range(5):
+            run_in_thread(lambda: pool.reader().execute("SELECT 1"))
+        stats = pool.stats()
+        assert (stats['in_use'], stats['idle'], stats['reclaimed']) == (0, 1, 5)
+    finally:
+        pool.close()
+
+def test_release_hands_back_the_same_connection(admin, tmp_path):
+    pool = admin.ConnectionPool(str(tmp_path / "pool.db"), max_readers=1)
+    try:
+        conn = pool.reader()
+        assert pool.reader() is conn
+        pool.release()
+        assert pool.stats()['in_use'] == 0
+        assert pool.reader() is conn
+    finally:
+        pool.close()
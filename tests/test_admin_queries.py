@@ -0,0 +1,14 @@
+def test_audited_reads_use_indexes_for_their_ranges(admin, tmp_path):
+    manager = admin.ProfessionalDBManager(str(tmp_path / "audit.db"))
+    try:
+        report = manager.audit_query_plans()
+        series = [entry for entry in report if 'FROM analytics' in entry['query']]
+        assert series and all('recorded_date>?' in entry['plan'] for entry in series)
+        assert not [entry['query'] for entry in report if entry['range_unindexed']]
+    finally:
+        manager.close()
+
+def test_range_predicate_ignores_parameterless_equality(admin):
+    assert admin.RANGE_PREDICATE.search("WHERE recorded_date >= '2026-01-01'")
+    assert admin.RANGE_PREDICATE.search("WHERE rating BETWEEN 1 AND 5")
+    assert not admin.RANGE_PREDICATE.search("WHERE category = 'monthly' AND status <> 'Done'")
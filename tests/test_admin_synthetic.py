@@ -0,0 +1,20 @@
+def test_generate_leaves_existing_technicians_alone(admin, tmp_path):
+    manager = admin.ProfessionalDBManager(str(tmp_path / "seeded.db"))
+    try:
+        conn = manager.conn
+        seeded = conn.execute("SELECT id, name, email, version FROM technicians ORDER BY id").fetchall()
+        # Ids with gaps, as on any database where technicians have been removed
+        with manager.pool.writer() as writer:
+            writer.execute("INSERT INTO technicians (id, name, email) VALUES (9000, 'Gap', 'gap@example.com')")
+        reports = admin.generate_synthetic_data(manager, technicians=5, requests=500, tickets=10, seed=7)
+        assert [report.skipped for report in reports] == [0, 0, 0]
+        assert not [error for report in reports for error in report.errors]
+        assert conn.execute("SELECT id, name, email, version FROM technicians WHERE id IN "
+                            f"({','.join(str(row[0]) for row in seeded)}) ORDER BY id").fetchall() == seeded
+        assigned = conn.execute("""
+            SELECT COUNT(*) FROM service_requests sr JOIN technicians t ON t.id = sr.assigned_tech_id
+            WHERE t.email LIKE ?
+        """, (f"%@{admin.SYNTHETIC_EMAIL_DOMAIN}",)).fetchone()[0]
+        assert assigned > 0
+    finally:
+        manager.close()
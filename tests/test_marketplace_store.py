@@ -0,0 +1,18 @@
+import threading
+
+from marketplace_store import MarketplaceStore
+
+def test_readers_of_finished_threads_return_to_pool(tmp_path):
+    store = MarketplaceStore(str(tmp_path / "marketplace.db"), max_readers=1, acquire_timeout=1)
+    try:
+        # Streamlit runs every script run on a fresh thread; none of these call release()
+        for _ in range(5):
+            thread = threading.Thread(target=store.services.list)
+            thread.start()
+            thread.join()
+        assert store.services.list()
+        store.release()
+        stats = store.pool.stats()
+        assert (stats['in_use'], stats['idle'], stats['reclaimed']) == (0, 1, 5)
+    finally:
+        store.close()
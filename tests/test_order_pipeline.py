@@ -0,0 +1,98 @@
+import threading
+import uuid
+
+import order_pipeline
+from marketplace_store import MarketplaceStore
+from order_pipeline import LocalPaymentProcessor, OrderPipeline
+
+class CountingProcessor(LocalPaymentProcessor):
+    """Local processor that counts charge calls and can fail the first few with a provider error."""
+    def __init__(self, failures=0):
+        super().__init__(latency=0.05)
+        self.calls = 0
+        self.failures = failures
+        self._count_lock = threading.Lock()
+
+    def charge(self, order, idempotency_key):
+        with self._count_lock:
+            self.calls += 1
+            if self.failures:
+                self.failures -= 1
+                raise TimeoutError("provider timed out")
+        return super().charge(order, idempotency_key)
+
+def make_store(tmp_path):
+    return MarketplaceStore(str(tmp_path / "marketplace.db"))
+
+def add_order(store, status, payment_method='Credit Card (Online)', price=50):
+    order_id = str(uuid.uuid4())
+    store.orders.add({
+        'id': order_id, 'user_email': 'user@example.com', 'user_name': 'Demo User', 'service_id': 1,
+        'service_name': 'House Cleaning', 'tech': 'Alice', 'date': '2026-01-01',
+        'payment_method': payment_method, 'price': price, 'status': status, 'paid': False
+    })
+    return order_id
+
+def test_concurrent_recovery_charges_each_order_once(tmp_path):
+    store = make_store(tmp_path)
+    order_ids = [add_order(store, 'Processing') for _ in range(10)]
+    payments = CountingProcessor()
+    # Two worker processes restarting against the same database
+    pipelines = [OrderPipeline(store, payments), OrderPipeline(store, payments)]
+    for pipeline in pipelines:
+        pipeline.recover()
+    for pipeline in pipelines:
+        pipeline.shutdown()
+    # A resumed call may repeat, but the idempotency key keeps it to one charge per order
+    assert len(payments._references) == 10
+    orders = [store.orders.get(order_id) for order_id in order_ids]
+    assert {order['status'] for order in orders} == {'Pending'}
+    assert {order['payment_reference'] for order in orders} == set(payments._references.values())
+    store.close()
+
+def test_resumed_charge_reuses_the_original_payment(tmp_path):
+    store = make_store(tmp_path)
+    order_id = add_order(store, 'Charging')
+    payments = CountingProcessor()
+    first = payments.charge(store.orders.get(order_id), idempotency_key=order_id)
+    pipeline = OrderPipeline(store, payments)
+    assert pipeline.recover() == 1
+    pipeline.shutdown()
+    order = store.orders.get(order_id)
+    assert (order['status'], order['paid'], order['payment_reference']) == ('Pending', True, first)
+    store.close()
+
+def test_provider_errors_are_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(order_pipeline, 'PAYMENT_RETRY_DELAY', 0)
+    store = make_store(tmp_path)
+    payments = CountingProcessor(failures=order_pipeline.PAYMENT_ATTEMPTS - 1)
+    pipeline = OrderPipeline(store, payments)
+    order_id = add_order(store, 'Processing')
+    pipeline.recover()
+    pipeline.shutdown()
+    assert store.orders.get(order_id)['status'] == 'Pending'
+    store.close()
+
+def test_persistent_provider_error_fails_the_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(order_pipeline, 'PAYMENT_RETRY_DELAY', 0)
+    store = make_store(tmp_path)
+    payments = CountingProcessor(failures=order_pipeline.PAYMENT_ATTEMPTS)
+    pipeline = OrderPipeline(store, payments)
+    order_id = add_order(store, 'Processing')
+    pipeline.recover()
+    pipeline.shutdown()
+    assert store.orders.get(order_id)['status'] == 'Payment Failed'
+    assert payments.calls == order_pipeline.PAYMENT_ATTEMPTS
+    store.close()
+
+def test_completion_settles_cash_orders(tmp_path):
+    store = make_store(tmp_path)
+    order_id = add_order(store, 'In Progress', payment_method='Cash on Delivery')
+    pipeline = OrderPipeline(store, LocalPaymentProcessor(latency=0))
+    assert pipeline.complete(order_id, expected_status='In Progress')
+    assert not pipeline.complete(order_id, expected_status='In Progress')
+    pipeline.shutdown()
+    order = store.orders.get(order_id)
+    assert (order['status'], order['paid']) == ('Done', True)
+    assert order['payment_reference'].startswith('cash_')
+    store.close()